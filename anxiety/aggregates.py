@@ -0,0 +1,153 @@
+"""Server-side chart aggregates for the Dashboard.
+
+The Altair charts used to receive the whole filtered DataFrame and let
+Vega-Lite compute ``count()``, ``mean()`` and ``transform_regression`` in the
+browser, so the page's JSON grew with every row. These helpers compute the
+same numbers with NumPy and return small tables for the charts to plot as-is.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+TARGET = 'Anxiety Level (1-10)'
+
+# Trend charts switch from one circle per distinct point to TREND_MODE
+# ('density' grid or 'sample') once the filtered data exceeds TREND_THRESHOLD rows
+TREND_THRESHOLD = int(os.environ.get('TREND_THRESHOLD', 50_000))
+TREND_MODE = os.environ.get('TREND_MODE', 'density')
+TREND_SAMPLE_SIZE = int(os.environ.get('TREND_SAMPLE_SIZE', 5_000))
+TREND_BINS = int(os.environ.get('TREND_BINS', 40))
+
+
+def _groups(keys):
+    uniques, codes = np.unique(np.asarray(keys).astype(str), return_inverse=True)
+    return uniques, codes.reshape(-1)
+
+
+def value_counts(df, col):
+    """Row count per value of ``col``, sorted by value."""
+    values = df[col].to_numpy()
+    if values.dtype.kind in 'biuf':
+        uniques, counts = np.unique(values, return_counts=True)
+    else:
+        uniques, codes = _groups(values)
+        counts = np.bincount(codes, minlength=len(uniques))
+    return pd.DataFrame({col: uniques, 'count': counts})
+
+
+def group_means(df, col, target=TARGET):
+    """Mean of ``target`` per value of ``col``."""
+    uniques, codes = _groups(df[col].to_numpy())
+    counts = np.bincount(codes, minlength=len(uniques))
+    sums = np.bincount(codes, weights=df[target].to_numpy(dtype=np.float64), minlength=len(uniques))
+    return pd.DataFrame({col: uniques, 'mean': sums / np.maximum(counts, 1)})
+
+
+def distinct_points(df, x_col, y_col=TARGET):
+    """Distinct (x, y) pairs with their multiplicity, for the scatter layers."""
+    xy = np.column_stack([df[x_col].to_numpy(dtype=np.float64), df[y_col].to_numpy(dtype=np.float64)])
+    uniques, counts = np.unique(xy, axis=0, return_counts=True)
+    return pd.DataFrame({x_col: uniques[:, 0], y_col: uniques[:, 1], 'count': counts})
+
+
+def grid_edges(x_min, x_max, y_min, y_max, bins=TREND_BINS):
+    """Bin edges of the density grid: ``bins`` x-bins, one row per anxiety level."""
+    x_edges = np.linspace(x_min, x_max if x_max > x_min else x_min + 1.0, bins + 1)
+    levels = np.arange(np.floor(y_min), np.ceil(y_max) + 1)
+    y_edges = np.append(levels, levels[-1] + 1) - 0.5
+    return x_edges, y_edges
+
+
+def grid_table(counts, x_edges, y_edges):
+    """Non-empty cells of a histogram2d result as rectangles."""
+    xi, yi = np.nonzero(counts)
+    return pd.DataFrame({
+        'x_start': x_edges[xi], 'x_end': x_edges[xi + 1],
+        'y_start': y_edges[yi], 'y_end': y_edges[yi + 1],
+        'count': counts[xi, yi].astype(np.int64),
+    })
+
+
+def density_grid(df, x_col, y_col=TARGET, bins=TREND_BINS):
+    """2D histogram of x against the anxiety level as binned rectangles.
+
+    The anxiety level only takes integer values, so each level gets its own
+    row of cells; x is split into ``bins`` equal-width bins.
+    """
+    x = df[x_col].to_numpy(dtype=np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+    if len(x) == 0:
+        return pd.DataFrame({c: [] for c in ['x_start', 'x_end', 'y_start', 'y_end', 'count']})
+    x_edges, y_edges = grid_edges(x.min(), x.max(), y.min(), y.max(), bins)
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    return grid_table(counts, x_edges, y_edges)
+
+
+def sample_quotas(counts, size):
+    """Rows to draw from each stratum for a proportional sample of ``size`` rows."""
+    quota = np.floor(counts * size / counts.sum()).astype(np.int64)
+    # Hand the rounding remainder to the largest strata
+    quota[np.argsort(-counts, kind='stable')[:size - quota.sum()]] += 1
+    return np.minimum(quota, counts)
+
+
+def stratified_sample(df, size=TREND_SAMPLE_SIZE, strata=TARGET, seed=0):
+    """Deterministic sample of at most ``size`` rows, proportional per anxiety level.
+
+    The same data and seed always give the same rows, so reruns do not make
+    the scatter flicker.
+    """
+    if len(df) <= size:
+        return df
+    rng = np.random.default_rng(seed)
+    values, codes = np.unique(df[strata].to_numpy(), return_inverse=True)
+    codes = codes.reshape(-1)
+    quota = sample_quotas(np.bincount(codes, minlength=len(values)), size)
+    picked = []
+    for code, k in enumerate(quota):
+        members = np.flatnonzero(codes == code)
+        picked.append(members[rng.choice(len(members), size=k, replace=False)])
+    return df.iloc[np.sort(np.concatenate(picked))]
+
+
+def trend_points(df, x_col, threshold=TREND_THRESHOLD, mode=TREND_MODE, sample_size=TREND_SAMPLE_SIZE):
+    """Return (mode, table) for the point layer of a trend chart.
+
+    mode is 'points' (distinct points of every row) at or below ``threshold``
+    rows, otherwise 'density' (``density_grid``) or 'sample' (distinct points
+    of a ``stratified_sample``).
+    """
+    if len(df) <= threshold:
+        return 'points', distinct_points(df, x_col)
+    if mode == 'sample':
+        return 'sample', distinct_points(stratified_sample(df, sample_size), x_col)
+    if mode == 'density':
+        return 'density', density_grid(df, x_col)
+    raise ValueError(f"Unknown trend mode: {mode!r}")
+
+
+def line_from_moments(x_col, n, sx, sy, sxx, sxy, x_min, x_max, y_col=TARGET):
+    """Least-squares line from running sums, drawn over [x_min, x_max]."""
+    if n < 2 or x_min == x_max:
+        return pd.DataFrame({x_col: [], y_col: []})
+    slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    intercept = (sy - slope * sx) / n
+    ends = np.array([x_min, x_max], dtype=np.float64)
+    return pd.DataFrame({x_col: ends, y_col: intercept + slope * ends})
+
+
+def regression_line(df, x_col, y_col=TARGET):
+    """Least-squares line over the x extent, as Vega-Lite's linear transform_regression draws it."""
+    x = df[x_col].to_numpy(dtype=np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+    if len(x) == 0:
+        return line_from_moments(x_col, 0, 0, 0, 0, 0, 0, 0, y_col)
+    return line_from_moments(
+        x_col, len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum(), x.min(), x.max(), y_col
+    )
+
+
+def payload_bytes(*tables):
+    """JSON size of the data tables handed to the charts (what Vega-Lite receives as records)."""
+    return sum(len(table.to_json(orient='records').encode('utf-8')) for table in tables)
@@ -0,0 +1,110 @@
+"""Batch scoring of survey exports.
+
+Usage:
+    python -m anxiety.batch data/anxiety_dataset.csv scores.csv --workers 4
+
+The input is read in fixed-size chunks and each chunk is scored by a worker
+process as a whole. At most ``2 * workers`` chunks are in flight at any time and
+results are written as soon as they come back (in input order), so memory
+stays flat no matter how large the CSV is.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .features import FEATURE_ORDER
+from .model import MODEL_DIR, decision_threshold, load_artifacts
+
+# Per-process artifacts, loaded once by _init_worker
+_model = None
+_preprocessor = None
+
+
+def _init_worker(model_dir):
+    global _model, _preprocessor
+    _model, _, _preprocessor = load_artifacts(model_dir)
+
+
+def score_chunk(chunk):
+    """Return P(High anxiety) for every row of a raw survey DataFrame chunk."""
+    features = _preprocessor.transform(_preprocessor.encode_frame(chunk))
+    return _model.predict_proba(features, validate_features=False)[:, 1]
+
+
+def _score_job(job):
+    start, chunk, ids = job
+    return start, ids, score_chunk(chunk)
+
+
+def _write_rows(writer, start, ids, proba, threshold):
+    labels = (proba >= threshold).astype(np.int8)
+    if ids is None:
+        ids = range(start, start + len(proba))
+    writer.writerows(zip(ids, np.round(proba, 6), labels))
+
+
+def _jobs(path, chunksize, id_column):
+    usecols = FEATURE_ORDER + ([id_column] if id_column else [])
+    start = 0
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        ids = chunk[id_column].tolist() if id_column else None
+        yield start, chunk[FEATURE_ORDER], ids
+        start += len(chunk)
+
+
+def run(input_path, output_path, model_dir=MODEL_DIR, chunksize=50_000,
+        workers=None, id_column=None):
+    """Score ``input_path`` into ``output_path`` and return (rows, seconds)."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    threshold = decision_threshold(model_dir)
+    rows = 0
+    t0 = time.perf_counter()
+
+    with open(output_path, 'w', newline='') as out, \
+            ProcessPoolExecutor(workers, initializer=_init_worker,
+                                initargs=(model_dir,)) as pool:
+        writer = csv.writer(out)
+        writer.writerow([id_column or 'row', 'proba_high', 'prediction'])
+
+        pending = deque()
+        for job in _jobs(input_path, chunksize, id_column):
+            pending.append(pool.submit(_score_job, job))
+            # Block on the oldest chunk once the window is full (keeps order and memory bounded)
+            while len(pending) >= max_in_flight:
+                start, ids, proba = pending.popleft().result()
+                _write_rows(writer, start, ids, proba, threshold)
+                rows += len(proba)
+        while pending:
+            start, ids, proba = pending.popleft().result()
+            _write_rows(writer, start, ids, proba, threshold)
+            rows += len(proba)
+
+    return rows, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a survey CSV with the trained model.")
+    parser.add_argument('input', help="CSV with the columns of data/anxiety_dataset.csv")
+    parser.add_argument('output', help="Destination CSV for the scores")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--chunksize', type=int, default=50_000, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--id-column', default=None, help="Input column copied to the output instead of the row number")
+    args = parser.parse_args(argv)
+
+    rows, elapsed = run(args.input, args.output, args.model_dir, args.chunksize,
+                        args.workers, args.id_column)
+    rate = rows / elapsed if elapsed else float('inf')
+    print(f"Scored {rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
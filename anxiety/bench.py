@@ -0,0 +1,337 @@
+"""Benchmark suite for the app's hot paths, with JSON output and a regression check.
+
+    python -m anxiety.bench run --output bench.json
+    python -m anxiety.bench run --only prediction,filters --quick
+    python -m anxiety.bench compare baseline.json bench.json --threshold 0.15
+
+Covered: single-row and 1k/100k-row prediction through the same artifacts
+the Prediction page loads, preprocessing, CSV loading, Dashboard filter
+combinations and view builds, and the serialized chart payload for the real
+11k rows and a synthetic 1M-row resample. Every result has a ``value`` in
+``unit`` (ms or bytes) where lower is better; ``compare`` flags any value
+that grew by more than the threshold against the baseline and exits with
+status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .features import BINARY_COLS, FEATURE_ORDER, FORM_RANGES
+from .model import MODEL_DIR
+
+DATA_PATH = os.path.join('data', 'anxiety_dataset.csv')
+SYNTHETIC_ROWS = 1_000_000
+
+
+def _timed(fn, repeat, number=1):
+    """Median/p95/min of ``repeat`` runs, each averaging ``number`` calls, in ms."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number * 1000.0)
+    times = np.array(times)
+    return {
+        'value': float(np.median(times)),
+        'unit': 'ms',
+        'p95': float(np.percentile(times, 95)),
+        'min': float(times.min()),
+        'repeat': repeat,
+    }
+
+
+def random_rows(n, seed=0):
+    """Encoded (n, 16) raw feature rows drawn from the Prediction form's slider grid."""
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, len(FEATURE_ORDER)))
+    for i, col in enumerate(FEATURE_ORDER):
+        if col in BINARY_COLS:
+            X[:, i] = rng.integers(0, 2, n)
+        else:
+            low, high, step = FORM_RANGES[col]
+            X[:, i] = low + step * rng.integers(0, int(round((high - low) / step)) + 1, n)
+    return X
+
+
+def filter_states(options, n_random=20, seed=0):
+    """Every single-filter state, a few age ranges and random combinations."""
+    from .dashboard import CONTROLS, FULL_AGE_RANGE
+    from .filters import ALL
+
+    base = [FULL_AGE_RANGE] + [ALL] * len(CONTROLS)
+    states = [tuple(base)]
+    for i, control in enumerate(CONTROLS, start=1):
+        for value in options[control]:
+            states.append(tuple(base[:i] + [value] + base[i + 1:]))
+    for age_range in ((18, 30), (30, 50), (45, 64)):
+        states.append((age_range,) + tuple(base[1:]))
+    rng = np.random.default_rng(seed)
+    for _ in range(n_random):
+        low = int(rng.integers(18, 50))
+        state = [(low, int(rng.integers(low, 65)))]
+        for control in CONTROLS:
+            choices = [ALL] + list(options[control])
+            state.append(choices[int(rng.integers(len(choices)))])
+        states.append(tuple(state))
+    return states
+
+
+class Context:
+    """Artifacts and data shared by the benchmarks, loaded on first use."""
+
+    def __init__(self, model_dir=MODEL_DIR, data_path=DATA_PATH, quick=False):
+        self.model_dir = model_dir
+        self.data_path = data_path
+        self.quick = quick
+        self._cache = {}
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def repeat(self, n):
+        return max(1, n // 5) if self.quick else n
+
+    @property
+    def artifacts(self):
+        # Same loader as the Prediction page's load_resources
+        from .model import shared_artifacts
+        return self._get('artifacts', lambda: shared_artifacts(self.model_dir))
+
+    @property
+    def df(self):
+        from .data import load_dataset
+        return self._get('df', lambda: load_dataset(self.data_path))
+
+    @property
+    def index(self):
+        from .filters import filter_index
+        return filter_index(self.df)
+
+    @property
+    def synthetic(self):
+        def build():
+            rng = np.random.default_rng(0)
+            rows = rng.integers(0, len(self.df), SYNTHETIC_ROWS)
+            return self.df.iloc[rows].reset_index(drop=True)
+        return self._get('synthetic', build)
+
+
+def bench_prediction(ctx):
+    model, _, preprocessor = ctx.artifacts
+    profile = dict(zip(FEATURE_ORDER, random_rows(1)[0]))
+    results = {
+        'prediction.single_row': _timed(
+            lambda: model.predict_proba(preprocessor.transform(profile), validate_features=False),
+            ctx.repeat(200)),
+    }
+    for n, repeat in ((1_000, 20), (100_000, 3)):
+        X = random_rows(n)
+        results[f'prediction.batch_{n // 1000}k'] = _timed(
+            lambda: model.predict_proba(preprocessor.transform(X), validate_features=False),
+            ctx.repeat(repeat))
+    return results
+
+
+def bench_preprocessing(ctx):
+    _, _, preprocessor = ctx.artifacts
+    profile = dict(zip(FEATURE_ORDER, random_rows(1)[0]))
+    X = random_rows(100_000)
+    frame = ctx.synthetic.iloc[:100_000][FEATURE_ORDER]
+    return {
+        'preprocessing.transform_dict': _timed(lambda: preprocessor.transform(profile), ctx.repeat(50), 100),
+        'preprocessing.transform_100k': _timed(lambda: preprocessor.transform(X), ctx.repeat(20)),
+        'preprocessing.encode_frame_100k': _timed(
+            lambda: preprocessor.transform(preprocessor.encode_frame(frame)), ctx.repeat(10)),
+    }
+
+
+def bench_csv(ctx):
+    import pandas as pd
+
+    from .data import clear_cache, load_dataset, read_dataset
+
+    load_dataset(ctx.data_path)  # make sure the sidecar exists
+    results = {
+        'csv.read_csv': _timed(lambda: pd.read_csv(ctx.data_path), ctx.repeat(10)),
+        'csv.read_dataset_typed': _timed(lambda: read_dataset(ctx.data_path), ctx.repeat(10)),
+        'csv.load_dataset_sidecar': _timed(lambda: (clear_cache(), load_dataset(ctx.data_path)), ctx.repeat(10)),
+    }
+    # clear_cache() replaced the process-wide frame: drop the context's old copy so
+    # the other benchmarks fetch the new one, which the last load left cached
+    ctx._cache.pop('df', None)
+    return results
+
+
+def bench_filters(ctx):
+    from .dashboard import CONTROLS, DashboardViews, FrameSource, compute_view
+
+    index = ctx.index
+    states = filter_states(index.options)
+
+    def select_all():
+        for state in states:
+            index.select(state[0], **dict(zip(CONTROLS, state[1:])))
+
+    def views_uncached():
+        for state in states:
+            compute_view(ctx.df.iloc[index.select(state[0], **dict(zip(CONTROLS, state[1:])))])
+
+    source = FrameSource(ctx.df, index)
+    views = DashboardViews(maxsize=len(states))
+    for state in states:
+        views.get(source, state)
+
+    def views_cached():
+        for state in states:
+            views.get(source, state)
+
+    results = {
+        'filters.select_per_combination': _timed(select_all, ctx.repeat(20)),
+        'dashboard.view_uncached_per_combination': _timed(views_uncached, ctx.repeat(3)),
+        'dashboard.view_cached_per_combination': _timed(views_cached, ctx.repeat(20)),
+    }
+    # Report per filter combination
+    for name in results:
+        for key in ('value', 'p95', 'min'):
+            results[name][key] /= len(states)
+        results[name]['combinations'] = len(states)
+    return results
+
+
+def bench_payload(ctx):
+    from . import aggregates as agg
+    from .dashboard import compute_view, view_tables
+
+    results = {}
+    for label, frame in (('11k', ctx.df), ('1m', ctx.synthetic)):
+        view = compute_view(frame)
+        results[f'payload.chart_bytes_{label}'] = {
+            'value': float(agg.payload_bytes(*view_tables(view))),
+            'unit': 'bytes',
+            'rows': len(frame),
+        }
+        results[f'payload.view_build_{label}'] = _timed(lambda: compute_view(frame), ctx.repeat(5 if label == '11k' else 2))
+    return results
+
+
+BENCHMARKS = {
+    'prediction': bench_prediction,
+    'preprocessing': bench_preprocessing,
+    'csv': bench_csv,
+    'filters': bench_filters,
+    'payload': bench_payload,
+}
+
+
+def _meta():
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+    }
+    try:
+        meta['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                        text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return meta
+
+
+def run(groups=tuple(BENCHMARKS), model_dir=MODEL_DIR, data_path=DATA_PATH, quick=False):
+    ctx = Context(model_dir, data_path, quick)
+    results = {}
+    for group in groups:
+        t0 = time.perf_counter()
+        results.update(BENCHMARKS[group](ctx))
+        print(f"[{time.perf_counter() - t0:7.2f}s] {group}", file=sys.stderr, flush=True)
+    return {'meta': _meta(), 'results': results}
+
+
+def compare(baseline, current, threshold=0.10):
+    """[(name, baseline value, current value, ratio, status)] for every current result."""
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append((name, None, result['value'], None, 'new'))
+            continue
+        ratio = result['value'] / base['value'] if base['value'] else float('inf')
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((name, base['value'], result['value'], ratio, status))
+    return rows
+
+
+def _print_results(report):
+    print(f"{'benchmark':<44} {'value':>14} {'p95':>12}")
+    for name, result in report['results'].items():
+        p95 = f"{result['p95']:,.3f}" if 'p95' in result else ''
+        print(f"{name:<44} {result['value']:>11,.3f} {result['unit']:<5} {p95:>12}")
+
+
+def _print_comparison(rows, threshold):
+    print(f"{'benchmark':<44} {'baseline':>12} {'current':>12} {'ratio':>7}  status (threshold {threshold:.0%})")
+    for name, base, value, ratio, status in rows:
+        base = f"{base:,.3f}" if base is not None else '-'
+        ratio = f"{ratio:.2f}x" if ratio is not None else '-'
+        print(f"{name:<44} {base:>12} {value:>12,.3f} {ratio:>7}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the prediction and Dashboard hot paths.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_run = sub.add_parser('run', help="Run the benchmarks")
+    p_run.add_argument('--only', default=','.join(BENCHMARKS), help=f"Subset of {','.join(BENCHMARKS)}")
+    p_run.add_argument('--model-dir', default=MODEL_DIR)
+    p_run.add_argument('--data', default=DATA_PATH)
+    p_run.add_argument('--quick', action='store_true', help="Fewer repetitions")
+    p_run.add_argument('--output', default=None, help="Write the results as JSON")
+    p_run.add_argument('--baseline', default=None, help="Compare with this JSON after running")
+    p_run.add_argument('--threshold', type=float, default=0.10)
+    p_cmp = sub.add_parser('compare', help="Compare two result files")
+    p_cmp.add_argument('baseline')
+    p_cmp.add_argument('current')
+    p_cmp.add_argument('--threshold', type=float, default=0.10,
+                       help="Relative growth that counts as a regression (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args.only.split(','), args.model_dir, args.data, args.quick)
+        _print_results(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        if not args.baseline:
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        current = report
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    _print_comparison(rows, args.threshold)
+    if any(status == 'REGRESSION' for *_, status in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""Versioned model bundle: one directory, no pickles.
+
+    model/bundle/
+        manifest.json   schema version, feature order, encodings, decision
+                        threshold, array table, and SHA-256, size and mtime
+                        of every file
+        arrays.bin      scaling constants and flattened trees, 64-byte aligned,
+                        memory-mapped on load
+        booster.ubj     the booster in xgboost's native format (optional engine)
+
+``load_bundle`` validates the manifest, maps the arrays without copying and
+returns a preprocessor plus the NumPy tree evaluator. Neither sklearn nor
+xgboost is imported. Hashing the files would read every byte a memory-mapped
+load is meant to leave on disk, so a load only compares their sizes and
+mtimes with the manifest; a file whose mtime changed (say, a copied bundle)
+is hashed once, and ``verify`` hashes everything. Build a bundle from the
+current pickles, check it and compare cold-start load time:
+
+    python -m anxiety.bundle build
+    python -m anxiety.bundle verify
+    python -m anxiety.bundle bench
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .features import BINARY_COLS, FEATURE_ORDER
+from .model import BUNDLE_DIR, DECISION_THRESHOLD, MODEL_DIR, MODEL_FILE, PREPROCESS_FILE
+from .preprocessing import CompiledPreprocessor
+from .trees import TreeEnsemble
+
+MANIFEST = 'manifest.json'
+ARRAYS_FILE = 'arrays.bin'
+BOOSTER_FILE = 'booster.ubj'
+FORMAT = 'anxiety-model-bundle'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+TREE_ARRAYS = ['feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots']
+REQUIRED_ARRAYS = ['scale', 'offset'] + TREE_ARRAYS
+# Node covers for the TreeSHAP explainer
+OPTIONAL_ARRAYS = ['cover']
+
+
+class BundleError(ValueError):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _manifest_hash(manifest):
+    body = {k: v for k, v in manifest.items() if k != 'manifest_sha256'}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def write_bundle(path, preprocessor, xgb_model, decision_threshold=DECISION_THRESHOLD, extra=None):
+    """Write a bundle for a CompiledPreprocessor and an XGBClassifier/Booster."""
+    from .trees import export_trees
+
+    os.makedirs(path, exist_ok=True)
+    trees = export_trees(xgb_model)
+    arrays = {'scale': preprocessor.scale, 'offset': preprocessor.offset}
+    arrays.update({name: trees[name] for name in TREE_ARRAYS + OPTIONAL_ARRAYS})
+
+    table = {}
+    offset = 0
+    with open(os.path.join(path, ARRAYS_FILE), 'wb') as f:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            pad = -offset % ALIGN
+            f.write(b'\0' * pad)
+            offset += pad
+            table[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            f.write(array.tobytes())
+            offset += array.nbytes
+
+    booster = xgb_model.get_booster() if hasattr(xgb_model, 'get_booster') else xgb_model
+    booster.save_model(os.path.join(path, BOOSTER_FILE))
+
+    manifest = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'feature_order': list(preprocessor.feature_order),
+        'encodings': {col: preprocessor.encodings[col] for col in BINARY_COLS},
+        'decision_threshold': decision_threshold,
+        'trees': {'depth': int(trees['depth']), 'base_margin': float(trees['base_margin']),
+                  'num_features': int(trees['num_features'])},
+        'arrays': table,
+        'files': {
+            ARRAYS_FILE: _sha256(os.path.join(path, ARRAYS_FILE)),
+            BOOSTER_FILE: _sha256(os.path.join(path, BOOSTER_FILE)),
+        },
+        'stats': {name: _stat(os.path.join(path, name)) for name in (ARRAYS_FILE, BOOSTER_FILE)},
+    }
+    if extra:
+        manifest.update(extra)
+    manifest['manifest_sha256'] = _manifest_hash(manifest)
+    with open(os.path.join(path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def _validate(manifest, path, verify_files):
+    if manifest.get('format') != FORMAT:
+        raise BundleError(f"Not a model bundle: {path}")
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle version {manifest.get('format_version')}")
+    if manifest.get('manifest_sha256') != _manifest_hash(manifest):
+        raise BundleError("Manifest hash mismatch")
+    if manifest.get('feature_order') != FEATURE_ORDER:
+        raise BundleError("Feature order does not match the app's FEATURE_ORDER")
+    if sorted(manifest.get('encodings', {})) != sorted(BINARY_COLS):
+        raise BundleError("Encodings missing for some binary columns")
+    missing = [name for name in REQUIRED_ARRAYS if name not in manifest.get('arrays', {})]
+    if missing:
+        raise BundleError(f"Missing arrays: {missing}")
+    n = len(FEATURE_ORDER)
+    for name in ('scale', 'offset'):
+        if manifest['arrays'][name]['shape'] != [n]:
+            raise BundleError(f"'{name}' must have shape [{n}]")
+    if manifest['trees']['num_features'] != n:
+        raise BundleError("Tree feature count does not match the feature order")
+    stats = manifest.get('stats', {})
+    for name, digest in manifest['files'].items():
+        file_path = os.path.join(path, name)
+        try:
+            current = _stat(file_path)
+        except OSError:
+            raise BundleError(f"Missing bundle file {name}") from None
+        recorded = stats.get(name)
+        if recorded is not None and current['size'] != recorded['size']:
+            raise BundleError(f"Size mismatch for {name}")
+        # Untouched since the build: trust the manifest without reading the file
+        if not verify_files and current == recorded:
+            continue
+        if _sha256(file_path) != digest:
+            raise BundleError(f"Checksum mismatch for {name}")
+
+
+class Bundle:
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self.decision_threshold = manifest['decision_threshold']
+        self.preprocessor = CompiledPreprocessor.from_arrays(
+            arrays['scale'], arrays['offset'], manifest['encodings'], manifest['feature_order']
+        )
+        tree_arrays = {name: arrays[name] for name in TREE_ARRAYS + OPTIONAL_ARRAYS if name in arrays}
+        tree_arrays.update(manifest['trees'])
+        self.model = TreeEnsemble(tree_arrays)
+
+    def load_booster(self):
+        """The original booster via xgboost (imported only here)."""
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(self.path, BOOSTER_FILE))
+        return booster
+
+
+def load_bundle(path, verify_files=False):
+    """Validate and memory-map a bundle directory.
+
+    Files are hashed only when their size or mtime differs from the manifest,
+    or for every file with ``verify_files``.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise BundleError(f"Cannot read bundle manifest in {path}: {e}") from e
+    _validate(manifest, path, verify_files)
+
+    arrays = {}
+    arrays_path = os.path.join(path, ARRAYS_FILE)
+    for name, meta in manifest['arrays'].items():
+        arrays[name] = np.memmap(arrays_path, dtype=np.dtype(meta['dtype']), mode='r',
+                                 offset=meta['offset'], shape=tuple(meta['shape']))
+    return Bundle(path, manifest, arrays)
+
+
+_PICKLE_SNIPPET = """
+import time; t0 = time.perf_counter()
+import joblib
+m = joblib.load({m!r}); p = joblib.load({p!r})
+print(time.perf_counter() - t0)
+"""
+
+_BUNDLE_SNIPPET = """
+import time; t0 = time.perf_counter()
+from anxiety.bundle import load_bundle
+b = load_bundle({p!r})
+print(time.perf_counter() - t0)
+"""
+
+
+def _cold(snippet, repeat):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or benchmark the model bundle.")
+    parser.add_argument('command', choices=['build', 'verify', 'bench'])
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    path = os.path.join(args.model_dir, BUNDLE_DIR)
+
+    if args.command == 'build':
+        import joblib
+        from .preprocessing import compile_preprocess
+        preprocessor = compile_preprocess(joblib.load(os.path.join(args.model_dir, PREPROCESS_FILE)))
+        write_bundle(path, preprocessor, joblib.load(os.path.join(args.model_dir, MODEL_FILE)))
+        print(f"Wrote bundle to {path}")
+        return
+    if args.command == 'verify':
+        try:
+            load_bundle(path, verify_files=True)
+        except BundleError as e:
+            sys.exit(f"{path}: {e}")
+        print(f"{path}: OK")
+        return
+
+    pickles = _PICKLE_SNIPPET.format(m=os.path.join(args.model_dir, MODEL_FILE),
+                                     p=os.path.join(args.model_dir, PREPROCESS_FILE))
+    t_pickle = _cold(pickles, args.repeat)
+    t_bundle = _cold(_BUNDLE_SNIPPET.format(p=path), args.repeat)
+    print(f"Cold start (imports + load, best of {args.repeat} fresh interpreters)")
+    print(f"  joblib pickles: {t_pickle * 1000:8.1f} ms")
+    print(f"  model bundle:   {t_bundle * 1000:8.1f} ms  ({t_pickle / t_bundle:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Process-wide LRU caches shared by every Streamlit session."""
+import threading
+from collections import OrderedDict
+
+from .features import FEATURE_ORDER
+
+# Step of every Prediction form control; anything else is an integer slider or Yes/No radio
+INPUT_STEPS = {
+    'Sleep Hours': 0.5,
+    'Physical Activity (hrs/week)': 0.5,
+    'Caffeine Intake (mg/day)': 10,
+}
+
+
+def quantize_inputs(values):
+    """Snap raw form values to the form's grid and return a hashable 16-tuple."""
+    return tuple(
+        int(round(float(values[col]) / INPUT_STEPS.get(col, 1)))
+        for col in FEATURE_ORDER
+    )
+
+
+class LRUCache:
+    """Thread-safe bounded LRU with hit/miss/eviction counters.
+
+    ``validate`` must be called with the signature of the data the entries
+    were derived from before use; a different signature empties the cache.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._signature = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validate(self, signature):
+        with self._lock:
+            if signature != self._signature:
+                self._data.clear()
+                self._signature = signature
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def peek(self, key):
+        """Look up without touching the LRU order or the counters."""
+        with self._lock:
+            return self._data.get(key)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
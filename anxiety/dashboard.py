@@ -0,0 +1,175 @@
+"""Derived Dashboard results per filter state, memoized in a shared LRU.
+
+A view holds everything the Dashboard renders for one filter state: the
+selected rows, the summary card means and every chart's aggregate table.
+Views are keyed by (age_range, gender, occupation, smoking, family, dizzy,
+med, event). On a miss, a cached parent state that differs in a single
+broader filter is narrowed instead of resolving the filters from scratch.
+The Statistics tab's tables (``anxiety.stats``) are cached per state too.
+"""
+import os
+import time
+
+import numpy as np
+
+from . import aggregates as agg
+from . import metrics
+from .cache import LRUCache
+from .filters import ALL, FILTER_COLUMNS
+from .stats import frame_statistics
+
+SUMMARY_COLUMNS = [
+    'Anxiety Level (1-10)', 'Stress Level (1-10)', 'Heart Rate (bpm)',
+    'Breathing Rate (breaths/min)', 'Sweating Level (1-5)'
+]
+
+TREND_COLUMNS = [
+    'Age', 'Caffeine Intake (mg/day)', 'Sleep Hours',
+    'Alcohol Consumption (drinks/week)', 'Physical Activity (hrs/week)',
+    'Therapy Sessions (per month)'
+]
+
+CATEGORY_COLUMNS = [
+    'Smoking', 'Family History of Anxiety', 'Dizziness',
+    'Medication', 'Recent Major Life Event'
+]
+
+FULL_AGE_RANGE = (18, 64)
+
+# Order of the filter controls inside a state tuple (after age_range)
+CONTROLS = list(FILTER_COLUMNS)
+
+
+def filter_state(age_range, gender, occupation, smoking, family, dizzy, med, event):
+    return (tuple(age_range), gender, occupation, smoking, family, dizzy, med, event)
+
+
+def _selected(state):
+    return dict(zip(CONTROLS, state[1:]))
+
+
+def _parents(state):
+    """States that differ from ``state`` in exactly one broader filter."""
+    age_range = state[0]
+    if age_range != FULL_AGE_RANGE:
+        yield (FULL_AGE_RANGE,) + state[1:], {'age_range': age_range}
+    for i, control in enumerate(CONTROLS, start=1):
+        if state[i] != ALL:
+            yield state[:i] + (ALL,) + state[i + 1:], {control: state[i]}
+
+
+def _mean(values):
+    return float(values.mean()) if len(values) else float('nan')
+
+
+def compute_view(filtered):
+    """Summary means and every chart table for an already filtered frame."""
+    return {
+        'count': len(filtered),
+        'summary': {col: _mean(filtered[col].to_numpy(dtype=np.float64)) for col in SUMMARY_COLUMNS},
+        'histogram': agg.value_counts(filtered, agg.TARGET),
+        'gender_counts': agg.value_counts(filtered, 'Gender'),
+        'gender_means': agg.group_means(filtered, 'Gender'),
+        'occupation_means': agg.group_means(filtered, 'Occupation'),
+        'trends': {
+            col: agg.trend_points(filtered, col) + (agg.regression_line(filtered, col),)
+            for col in TREND_COLUMNS
+        },
+        'category_means': {col: agg.group_means(filtered, col) for col in CATEGORY_COLUMNS},
+    }
+
+
+def view_tables(view):
+    """Every table the Dashboard hands to a chart, in render order."""
+    tables = [view['histogram'], view['gender_counts'], view['gender_means'], view['occupation_means']]
+    for _, points, line in view['trends'].values():
+        tables += [points, line]
+    return tables + list(view['category_means'].values())
+
+
+class FrameSource:
+    """View source over the in-memory dataset and its FilterIndex."""
+
+    supports_narrowing = True
+
+    def __init__(self, df, index):
+        self.df = df
+        self.index = index
+        self.signature = df.attrs.get('signature')
+        self.options = index.options
+
+    def compute(self, state, parent=None):
+        with metrics.span('filter.select'):
+            if parent is not None:
+                parent_view, narrowed = parent
+                rows = self.index.narrow(parent_view['rows'], **narrowed)
+            else:
+                rows = self.index.select(state[0], **_selected(state))
+        with metrics.span('dashboard.aggregates'):
+            view = compute_view(self.df.iloc[rows])
+        view['rows'] = rows
+        return view
+
+    def statistics(self, state, view):
+        return frame_statistics(self.df.iloc[view['rows']])
+
+
+class DashboardViews:
+    """LRU of computed views plus the time they saved.
+
+    ``source`` is a FrameSource, or a ``store.StoreSource`` in out-of-core mode.
+    """
+
+    def __init__(self, maxsize=int(os.environ.get('DASHBOARD_CACHE_SIZE', 64))):
+        self.cache = LRUCache(maxsize)
+        self.statistics_cache = LRUCache(maxsize)
+        self.parent_reuses = 0
+        self.time_saved = 0.0
+
+    def get(self, source, state):
+        """Return (view, seconds saved on this call)."""
+        self.cache.validate(source.signature)
+        view = self.cache.get(state)
+        if view is not None:
+            metrics.count('dashboard.view_cache.hit')
+            self.time_saved += view['elapsed']
+            return view, view['elapsed']
+        metrics.count('dashboard.view_cache.miss')
+
+        t0 = time.perf_counter()
+        parent = self._parent(state) if source.supports_narrowing else None
+        view = source.compute(state, parent)
+        view['elapsed'] = time.perf_counter() - t0
+        self.cache.put(state, view)
+        return view, 0.0
+
+    def statistics(self, source, state, view):
+        """Correlation, VIF and group-test tables for the rows of ``view``."""
+        self.statistics_cache.validate(source.signature)
+        result = self.statistics_cache.get(state)
+        if result is not None:
+            metrics.count('dashboard.statistics_cache.hit')
+            return result
+        metrics.count('dashboard.statistics_cache.miss')
+        with metrics.span('dashboard.statistics'):
+            result = source.statistics(state, view)
+        self.statistics_cache.put(state, result)
+        return result
+
+    def _parent(self, state):
+        """Smallest cached parent view and the filter that narrows it to ``state``."""
+        best = None
+        for parent, narrowed in _parents(state):
+            cached = self.cache.peek(parent)
+            if cached is not None and (best is None or len(cached['rows']) < len(best[0]['rows'])):
+                best = cached, narrowed
+        if best is not None:
+            metrics.count('dashboard.view_cache.parent_reuse')
+            self.parent_reuses += 1
+        return best
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['parent_reuses'] = self.parent_reuses
+        stats['time_saved'] = self.time_saved
+        return stats
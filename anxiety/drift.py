@@ -0,0 +1,423 @@
+"""Input drift monitoring for live predictions.
+
+Every scored feature vector is binned into a fixed per-feature grid. No raw
+inputs are kept, so memory does not grow with traffic. The grid is in the
+model's scaled units, where the MinMaxScalers map each feature's training
+range to [0, 1], so one grid serves all 16 features: ``GRID_BINS`` bins of
+width 0.005 over [-1, 2] plus a clamp bin at each end. The same counts act
+as a quantile sketch with an additive error of one bin width (0.5% of the
+training range). Values below 0 or above 1 are also counted per feature as
+out-of-range inputs, and NaN or infinite values as invalid inputs, which
+are left out of the grid. Single rows are staged in a 64-row buffer and
+binned together, which keeps ``observe`` at a few microseconds.
+
+Every ``CHECK_EVERY`` observations the counts are compared with the training
+reference profile exported next to the model (``model/drift_profile.json``):
+
+* PSI over the training deciles (0.1 worth a look, 0.25 drifted)
+* the KS statistic, the largest CDF gap on the grid
+
+The training pipeline writes the profile after exporting the model. To
+rebuild it from the training split, or to replay the test split through a
+monitor with one feature shifted (in raw units):
+
+    python -m anxiety.drift
+    python -m anxiety.drift --replay --shift "Caffeine Intake (mg/day)=150"
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from . import metrics
+from .features import FEATURE_ORDER
+from .model import DRIFT_PROFILE_FILE, MODEL_DIR
+
+FORMAT = 'anxiety-drift-profile'
+FORMAT_VERSION = 1
+# Sketch grid in scaled units; the training range is [0, 1] for every feature
+GRID_LOW = -1.0
+GRID_HIGH = 2.0
+GRID_BINS = 600
+# Scaled values this far past 0 or 1 count as out of range (float32 rounding)
+RANGE_TOLERANCE = 1e-6
+PSI_BINS = 10
+PSI_WARN = 0.1
+PSI_DRIFT = 0.25
+# Proportion floor so empty bins keep PSI finite
+PSI_EPSILON = 1e-4
+CHECK_EVERY = 256
+# Single observed rows are binned in batches of this many
+FLUSH_ROWS = 64
+MIN_OBSERVATIONS = 100
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+_INV_WIDTH = GRID_BINS / (GRID_HIGH - GRID_LOW)
+
+
+def bin_index(X):
+    """Grid column of every value of a scaled (n, d) array: 0 and GRID_BINS + 1 are the clamps."""
+    idx = np.floor((X - GRID_LOW) * _INV_WIDTH)
+    np.clip(idx, -1, GRID_BINS, out=idx)
+    return idx.astype(np.intp) + 1
+
+
+def bin_counts(X):
+    """(d, GRID_BINS + 2) grid counts of a scaled (n, d) array; NaN and inf are not counted."""
+    X = np.asarray(X, dtype=np.float64).reshape(len(X), -1)
+    width = GRID_BINS + 2
+    finite = np.isfinite(X)
+    flat = bin_index(np.where(finite, X, 0.0)) + np.arange(X.shape[1]) * width
+    return np.bincount(flat[finite], minlength=X.shape[1] * width).reshape(X.shape[1], width)
+
+
+def _bin_value(column):
+    """Scaled value at the left edge of a grid column."""
+    return GRID_LOW + (np.asarray(column, dtype=np.float64) - 1) / _INV_WIDTH
+
+
+def sketch_quantiles(counts, quantiles=QUANTILES, low=None, high=None):
+    """(d, q) scaled quantiles of (d, GRID_BINS + 2) grid counts, interpolated within the bin.
+
+    The clamp bins have no width; their quantiles are the observed extremes
+    ``low`` / ``high`` (one per feature) when given, else the grid ends.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    width = counts.shape[1]
+    cdf = np.cumsum(counts, axis=1)
+    total = cdf[:, -1:]
+    target = total * np.asarray(quantiles, dtype=np.float64)
+    # First column whose cumulative count reaches the target
+    column = np.minimum((cdf[:, None, :] < target[:, :, None]).sum(axis=2), width - 1)
+    before = np.where(column > 0, np.take_along_axis(cdf, np.maximum(column - 1, 0), axis=1), 0.0)
+    inside = np.maximum(np.take_along_axis(counts, column, axis=1), 1.0)
+    values = _bin_value(column) + (target - before) / inside / _INV_WIDTH
+    low = np.full(len(counts), GRID_LOW) if low is None else np.asarray(low, dtype=np.float64)
+    high = np.full(len(counts), GRID_HIGH) if high is None else np.asarray(high, dtype=np.float64)
+    values = np.where(column == 0, low[:, None], values)
+    values = np.where(column == width - 1, high[:, None], values)
+    return np.where(total > 0, values, np.nan)
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """Population stability index between count arrays over the same bins (last axis)."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    e = np.maximum(expected / np.maximum(expected.sum(axis=-1, keepdims=True), 1), epsilon)
+    a = np.maximum(actual / np.maximum(actual.sum(axis=-1, keepdims=True), 1), epsilon)
+    return np.sum((a - e) * np.log(a / e), axis=-1)
+
+
+def ks_statistic(expected, actual):
+    """Largest gap between the two empirical CDFs at the bin edges (last axis)."""
+    e = np.cumsum(expected, axis=-1, dtype=np.float64)
+    a = np.cumsum(actual, axis=-1, dtype=np.float64)
+    e /= np.maximum(e[..., -1:], 1)
+    a /= np.maximum(a[..., -1:], 1)
+    return np.max(np.abs(a - e), axis=-1)
+
+
+def build_profile(X, preprocessor):
+    """Reference profile of the scaled training rows X (FEATURE_ORDER columns)."""
+    # The live path scores float32 features, so bin the same values
+    X = np.asarray(X, dtype=np.float32).astype(np.float64)
+    counts = bin_counts(X)
+    raw = preprocessor.inverse_transform(X)
+    features = {}
+    for i, col in enumerate(FEATURE_ORDER):
+        deciles = np.quantile(X[:, i], np.linspace(0, 1, PSI_BINS + 1)[1:-1])
+        starts = np.unique(np.concatenate([[0], bin_index(deciles[:, None])[:, 0]]))
+        features[col] = {
+            'counts': counts[i].tolist(),
+            'psi_starts': starts.tolist(),
+            'min': float(raw[:, i].min()),
+            'max': float(raw[:, i].max()),
+            'quantiles': np.quantile(raw[:, i], QUANTILES).tolist(),
+        }
+    return {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'rows': len(X),
+        'grid': {'low': GRID_LOW, 'high': GRID_HIGH, 'bins': GRID_BINS},
+        'quantiles': list(QUANTILES),
+        'scale': preprocessor.scale.tolist(),
+        'offset': preprocessor.offset.tolist(),
+        'features': features,
+    }
+
+
+def write_profile(profile, model_dir=MODEL_DIR):
+    path = os.path.join(model_dir, DRIFT_PROFILE_FILE)
+    with open(path, 'w') as f:
+        json.dump(profile, f)
+    return path
+
+
+def profile_signature(model_dir=MODEL_DIR):
+    """mtime_ns of the profile file, None when it does not exist."""
+    path = os.path.join(model_dir, DRIFT_PROFILE_FILE)
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def load_profile(model_dir=MODEL_DIR, preprocessor=None):
+    """The profile dict, or None when the file is missing, unreadable or on another grid.
+
+    With a preprocessor, 'stale' flags a profile binned with other scaling
+    constants than the ones the model is served with.
+    """
+    try:
+        with open(os.path.join(model_dir, DRIFT_PROFILE_FILE)) as f:
+            profile = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if profile.get('format') != FORMAT or profile.get('format_version') != FORMAT_VERSION:
+        return None
+    if profile.get('grid') != {'low': GRID_LOW, 'high': GRID_HIGH, 'bins': GRID_BINS}:
+        return None
+    if preprocessor is not None:
+        profile['stale'] = not (np.allclose(profile['scale'], preprocessor.scale)
+                                and np.allclose(profile['offset'], preprocessor.offset))
+    return profile
+
+
+class DriftMonitor:
+    """Fixed-memory running counts of scored features, compared with a reference profile.
+
+    ``observe`` takes the scaled float32 rows that were just scored. Single
+    rows are copied into a ``FLUSH_ROWS`` staging buffer and binned together
+    when it fills, so one call is a row copy under a lock. The comparison
+    runs inline on the call that crosses each ``check_every`` boundary, and
+    ``report`` returns its latest result.
+    """
+
+    def __init__(self, profile, check_every=CHECK_EVERY):
+        self.profile = profile
+        self.features = list(profile['features'])
+        self.check_every = check_every
+        d = len(self.features)
+        self.counts = np.zeros((d, GRID_BINS + 2), dtype=np.int64)
+        self.below = np.zeros(d, dtype=np.int64)
+        self.above = np.zeros(d, dtype=np.int64)
+        self.invalid = np.zeros(d, dtype=np.int64)
+        self.low = np.full(d, np.inf)
+        self.high = np.full(d, -np.inf)
+        self.n = 0
+        self._buffer = np.empty((FLUSH_ROWS, d), dtype=np.float64)
+        self._pending = 0
+        self._reference = np.array([profile['features'][col]['counts'] for col in self.features])
+        # Flat reduceat offsets of every feature's PSI bins, and their (feature, slot) in a (d, PSI_BINS) table
+        starts = [np.asarray(profile['features'][col]['psi_starts']) for col in self.features]
+        width = GRID_BINS + 2
+        self._psi_offsets = np.concatenate([s + i * width for i, s in enumerate(starts)])
+        self._psi_slots = (np.concatenate([np.full(len(s), i) for i, s in enumerate(starts)]),
+                           np.concatenate([np.arange(len(s)) for s in starts]))
+        self._expected = self._psi_bins(self._reference)
+        self._scale = np.asarray(profile['scale'], dtype=np.float64)
+        self._offset = np.asarray(profile['offset'], dtype=np.float64)
+        self._checked = 0
+        self._report = None
+        self._lock = threading.Lock()
+
+    def observe(self, X):
+        """Add scaled rows (one (16,) vector or an (n, 16) batch)."""
+        X = np.asarray(X)
+        rows = 1 if X.ndim == 1 else len(X)
+        with self._lock:
+            if self._pending + rows <= FLUSH_ROWS:
+                self._buffer[self._pending:self._pending + rows] = X
+                self._pending += rows
+                if self._pending == FLUSH_ROWS:
+                    self._flush()
+            else:
+                self._flush()
+                self._add(np.asarray(X, dtype=np.float64))
+            self.n += rows
+            due = self.n - self._checked >= self.check_every
+            if due:
+                self._checked = self.n
+        if due:
+            self.check()
+
+    def _flush(self):
+        if self._pending:
+            try:
+                self._add(self._buffer[:self._pending])
+            finally:
+                # A row that cannot be added must not be retried on every later flush
+                self._pending = 0
+
+    def _add(self, X):
+        finite = np.isfinite(X)
+        self.counts += bin_counts(X)
+        self.invalid += (~finite).sum(axis=0)
+        self.below += ((X < -RANGE_TOLERANCE) & finite).sum(axis=0)
+        self.above += ((X > 1 + RANGE_TOLERANCE) & finite).sum(axis=0)
+        np.minimum(self.low, np.where(finite, X, np.inf).min(axis=0), out=self.low)
+        np.maximum(self.high, np.where(finite, X, -np.inf).max(axis=0), out=self.high)
+
+    def check(self):
+        """Compare the counts so far with the reference profile and publish the scores."""
+        with self._lock:
+            self._flush()
+            counts = self.counts.copy()
+            below, above, invalid = self.below.copy(), self.above.copy(), self.invalid.copy()
+            low, high, n = self.low.copy(), self.high.copy(), self.n
+        with metrics.span('drift.check'):
+            report = self._compare(counts, below, above, invalid, low, high, n)
+        with self._lock:
+            # A slower check for an earlier count must not replace a newer one
+            if self._report is None or self._report['observations'] <= n:
+                self._report = report
+        metrics.gauge('drift.observations', n)
+        metrics.gauge('drift.max_psi', report['max_psi'])
+        metrics.gauge('drift.invalid', report['invalid'])
+        for col, f in report['features'].items():
+            metrics.gauge(f'drift.psi.{col}', f['psi'])
+            metrics.gauge(f'drift.ks.{col}', f['ks'])
+            metrics.gauge(f'drift.out_of_range.{col}', f['below'] + f['above'])
+            metrics.gauge(f'drift.invalid.{col}', f['invalid'])
+        return report
+
+    def _psi_bins(self, counts):
+        table = np.zeros((len(self.features), PSI_BINS))
+        table[self._psi_slots] = np.add.reduceat(counts.ravel(), self._psi_offsets)
+        return table
+
+    def _compare(self, counts, below, above, invalid, low, high, n):
+        scores = psi(self._expected, self._psi_bins(counts)) if n else np.zeros(len(self.features))
+        ks = ks_statistic(self._reference, counts) if n else np.zeros(len(self.features))
+        # Back to the form's units
+        quantiles = (sketch_quantiles(counts, QUANTILES, low, high) - self._offset[:, None]) / self._scale[:, None]
+        low = (low - self._offset) / self._scale
+        high = (high - self._offset) / self._scale
+        features = {}
+        for i, col in enumerate(self.features):
+            if n < MIN_OBSERVATIONS:
+                status = 'warming up'
+            elif scores[i] >= PSI_DRIFT:
+                status = 'drift'
+            elif scores[i] >= PSI_WARN:
+                status = 'warn'
+            else:
+                status = 'ok'
+            features[col] = {
+                'psi': float(scores[i]),
+                'ks': float(ks[i]),
+                'status': status,
+                'below': int(below[i]),
+                'above': int(above[i]),
+                'invalid': int(invalid[i]),
+                'min': float(low[i]) if np.isfinite(low[i]) else None,
+                'max': float(high[i]) if np.isfinite(high[i]) else None,
+                'quantiles': quantiles[i].tolist(),
+                'reference_quantiles': self.profile['features'][col]['quantiles'],
+            }
+        return {
+            'observations': n,
+            'checked': time.time(),
+            'quantiles': list(QUANTILES),
+            'max_psi': float(scores.max()) if len(scores) else 0.0,
+            'out_of_range': int(below.sum() + above.sum()),
+            'invalid': int(invalid.sum()),
+            'drifted': [col for col, f in features.items() if f['status'] == 'drift'],
+            'stale_profile': bool(self.profile.get('stale')),
+            'features': features,
+        }
+
+    def report(self):
+        """Latest comparison; the first call runs one if none has yet."""
+        with self._lock:
+            report = self._report
+        return report if report is not None else self.check()
+
+    def reset(self):
+        with self._lock:
+            self.counts[:] = 0
+            self.below[:] = 0
+            self.above[:] = 0
+            self.invalid[:] = 0
+            self.low[:] = np.inf
+            self.high[:] = -np.inf
+            self.n = self._checked = self._pending = 0
+            self._report = None
+
+
+def load_monitor(model_dir=MODEL_DIR, preprocessor=None, check_every=CHECK_EVERY):
+    """A monitor on the exported profile, or None when there is none."""
+    profile = load_profile(model_dir, preprocessor)
+    return DriftMonitor(profile, check_every) if profile is not None else None
+
+
+def drift_table(report):
+    """One row per feature, most drifted first."""
+    import pandas as pd
+
+    median = report['quantiles'].index(0.5)
+    table = pd.DataFrame([
+        {
+            'feature': col,
+            'status': f['status'],
+            'PSI': f['psi'],
+            'KS': f['ks'],
+            'out of range': f['below'] + f['above'],
+            'invalid': f['invalid'],
+            'median': f['quantiles'][median],
+            'train median': f['reference_quantiles'][median],
+        }
+        for col, f in report['features'].items()
+    ])
+    return table.sort_values('PSI', ascending=False, ignore_index=True)
+
+
+def _parse_shift(text):
+    col, _, delta = text.rpartition('=')
+    if col not in FEATURE_ORDER:
+        raise argparse.ArgumentTypeError(f"unknown feature {col!r}")
+    return col, float(delta)
+
+
+def main(argv=None):
+    import pandas as pd
+
+    from .model import load_artifacts
+    from .train import DATA_PATH, prepare
+
+    parser = argparse.ArgumentParser(description="Export the training reference profile for drift monitoring.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--replay', action='store_true',
+                        help="Also replay the test split through a monitor, one row per observe call")
+    parser.add_argument('--shift', type=_parse_shift, action='append', default=[], metavar='FEATURE=DELTA',
+                        help="Add DELTA (raw units) to a feature of the replayed rows; repeatable")
+    args = parser.parse_args(argv)
+
+    # The notebook's X_train_encoded / X_test_encoded
+    X_train, X_test, _, _, _ = prepare(pd.read_csv(args.data))
+    preprocessor = load_artifacts(args.model_dir)[2]
+    path = write_profile(build_profile(X_train, preprocessor), args.model_dir)
+    print(f"Reference profile of {len(X_train):,} training rows -> {path}")
+    if not args.replay:
+        return
+
+    raw = preprocessor.inverse_transform(X_test)
+    for col, delta in args.shift:
+        raw[:, FEATURE_ORDER.index(col)] += delta
+    rows = preprocessor.transform(raw)
+    # Default check interval, so the periodic comparisons are part of the timing
+    monitor = load_monitor(args.model_dir, preprocessor)
+    t0 = time.perf_counter()
+    for row in rows:
+        monitor.observe(row)
+    elapsed = time.perf_counter() - t0
+    report = monitor.check()
+    print(f"Replayed {len(rows):,} rows: {elapsed / len(rows) * 1e6:.1f} us per observe, "
+          f"{report['out_of_range']} out-of-range and {report['invalid']} invalid values, max PSI {report['max_psi']:.3f}")
+    print(drift_table(report).to_string(index=False, float_format='{:.3f}'.format))
+
+
+if __name__ == '__main__':
+    main()
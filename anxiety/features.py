@@ -0,0 +1,71 @@
+"""Feature schema shared by the Prediction page, batch scoring and training."""
+
+# Target column and the Low/High split used in the notebook (1-4 -> 0, 5-10 -> 1)
+TARGET_COLUMN = 'Anxiety Level (1-10)'
+TARGET_THRESHOLD = 5
+
+# The correct feature order expected by the model
+FEATURE_ORDER = [
+    'Age', 'Sleep Hours', 'Physical Activity (hrs/week)',
+    'Caffeine Intake (mg/day)', 'Alcohol Consumption (drinks/week)',
+    'Smoking', 'Family History of Anxiety', 'Stress Level (1-10)',
+    'Heart Rate (bpm)', 'Breathing Rate (breaths/min)',
+    'Sweating Level (1-5)', 'Dizziness', 'Medication',
+    'Therapy Sessions (per month)', 'Recent Major Life Event',
+    'Diet Quality (1-10)'
+]
+
+# Numerical features scaled with a MinMaxScaler each
+NUMERICAL_COLS = [
+    'Age', 'Sleep Hours', 'Physical Activity (hrs/week)',
+    'Caffeine Intake (mg/day)', 'Alcohol Consumption (drinks/week)',
+    'Stress Level (1-10)', 'Heart Rate (bpm)', 'Breathing Rate (breaths/min)',
+    'Sweating Level (1-5)', 'Therapy Sessions (per month)', 'Diet Quality (1-10)'
+]
+
+# Binary Yes/No features, label encoded as No -> 0, Yes -> 1
+BINARY_COLS = [
+    'Smoking', 'Family History of Anxiety', 'Dizziness',
+    'Medication', 'Recent Major Life Event'
+]
+
+# Prediction form slider ranges (low, high, step)
+FORM_RANGES = {
+    'Age': (18, 80, 1),
+    'Sleep Hours': (3.0, 12.0, 0.5),
+    'Physical Activity (hrs/week)': (0.0, 20.0, 0.5),
+    'Caffeine Intake (mg/day)': (0, 500, 10),
+    'Alcohol Consumption (drinks/week)': (0, 20, 1),
+    'Stress Level (1-10)': (1, 10, 1),
+    'Heart Rate (bpm)': (50, 120, 1),
+    'Breathing Rate (breaths/min)': (10, 30, 1),
+    'Sweating Level (1-5)': (1, 5, 1),
+    'Therapy Sessions (per month)': (0, 10, 1),
+    'Diet Quality (1-10)': (1, 10, 1),
+}
+
+# Columns dropped before training (see the notebook's EDA/ANOVA section)
+DROPPED_COLS = ['Gender', 'Occupation']
+
+# Keys used for each column inside preprocess.pkl
+SCALER_KEYS = {
+    'Age': 'age',
+    'Sleep Hours': 'sleep_hours',
+    'Physical Activity (hrs/week)': 'physical_activity',
+    'Caffeine Intake (mg/day)': 'caffeine_intake',
+    'Alcohol Consumption (drinks/week)': 'alcohol_consumption',
+    'Stress Level (1-10)': 'stress_level',
+    'Heart Rate (bpm)': 'heart_rate',
+    'Breathing Rate (breaths/min)': 'breathing_rate',
+    'Sweating Level (1-5)': 'sweating_level',
+    'Therapy Sessions (per month)': 'therapy_sessions',
+    'Diet Quality (1-10)': 'diet_quality'
+}
+
+ENCODER_KEYS = {
+    'Smoking': 'smoking',
+    'Family History of Anxiety': 'family_history',
+    'Dizziness': 'dizziness',
+    'Medication': 'medication',
+    'Recent Major Life Event': 'recent_life_event'
+}
@@ -0,0 +1,109 @@
+"""Bitmap index for the Dashboard's filter controls.
+
+One packed bitmap (``np.packbits``) is built per value of every categorical
+filter column, plus a stable sort of the rows by Age. A filter combination
+then resolves to its rows with a binary search on the age index and a bitwise
+AND of at most seven bitmaps, without materializing intermediate frames.
+"""
+import threading
+
+import numpy as np
+
+# Dashboard control -> dataset column
+FILTER_COLUMNS = {
+    'gender': 'Gender',
+    'occupation': 'Occupation',
+    'smoking': 'Smoking',
+    'family': 'Family History of Anxiety',
+    'dizzy': 'Dizziness',
+    'med': 'Medication',
+    'event': 'Recent Major Life Event',
+}
+
+ALL = "All"
+
+
+class FilterIndex:
+    def __init__(self, df, age_column='Age'):
+        self.n_rows = len(df)
+        self.options = {}
+        self.bitmaps = {}
+        # Per-row value codes, used to narrow an already selected row set
+        self.codes = {}
+        for control, col in FILTER_COLUMNS.items():
+            values = df[col].astype(str).to_numpy()
+            uniques, codes = np.unique(values, return_inverse=True)
+            self.options[control] = uniques.tolist()
+            self.codes[control] = codes.reshape(-1).astype(np.int16)
+            self.bitmaps[control] = {
+                value: np.packbits(codes == i) for i, value in enumerate(uniques)
+            }
+
+        self.ages = df[age_column].to_numpy()
+        self.age_order = np.argsort(self.ages, kind='stable')
+        self.sorted_ages = self.ages[self.age_order]
+
+    def age_bitmap(self, low, high):
+        lo = np.searchsorted(self.sorted_ages, low, side='left')
+        hi = np.searchsorted(self.sorted_ages, high, side='right')
+        if lo == 0 and hi == self.n_rows:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.age_order[lo:hi]] = True
+        return np.packbits(mask)
+
+    def bitmap(self, age_range, **selected):
+        """Packed bitmap of the rows matching the filters (``None`` means every row)."""
+        result = self.age_bitmap(*age_range)
+        for control, value in selected.items():
+            if value == ALL:
+                continue
+            bits = self.bitmaps[control].get(str(value))
+            if bits is None:
+                bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            result = bits if result is None else result & bits
+        return result
+
+    def select(self, age_range, **selected):
+        """Positional row indices (ascending) matching the filters."""
+        bits = self.bitmap(age_range, **selected)
+        if bits is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def narrow(self, rows, age_range=None, **selected):
+        """Filter an existing row selection further, in O(len(rows))."""
+        keep = np.ones(len(rows), dtype=bool)
+        if age_range is not None:
+            ages = self.ages[rows]
+            keep &= (ages >= age_range[0]) & (ages <= age_range[1])
+        for control, value in selected.items():
+            if value == ALL:
+                continue
+            options = self.options[control]
+            if str(value) not in options:
+                return rows[:0]
+            keep &= self.codes[control][rows] == options.index(str(value))
+        return rows[keep]
+
+    def count(self, age_range, **selected):
+        bits = self.bitmap(age_range, **selected)
+        if bits is None:
+            return self.n_rows
+        return int(np.unpackbits(bits, count=self.n_rows).sum())
+
+
+# Last index built, keyed on the identity of the (shared, cached) dataset
+_index = (None, None)
+_lock = threading.Lock()
+
+
+def filter_index(df):
+    """Return the FilterIndex for ``df``, rebuilding it only when the frame changes."""
+    global _index
+    with _lock:
+        frame, index = _index
+        if frame is not df:
+            index = FilterIndex(df)
+            _index = (df, index)
+        return index
@@ -0,0 +1,383 @@
+"""Append-only ingestion of new survey rows into the column store.
+
+A batch (same columns as data/anxiety_dataset.csv) is validated against the
+dataset schema, appended to the store's column files and folded into the
+store's running aggregates (``aggregates.npz``) in O(batch):
+
+* per Age value and per value of every Gender/Occupation/Yes-No column: the
+  row count, the sum and sum of squares of each summary-card column and the
+  anxiety-level histogram
+* per pair of those columns: the count, sum and sum of squares of the
+  anxiety level
+
+The summary columns are integer scales, so every sum is an exact int64 and the
+maintained aggregates equal a full recompute bit for bit. They serve the
+Dashboard's summary cards, histogram and group-mean charts for the unfiltered
+view and every single-filter view; only the trend charts still need a scan.
+
+Appends are crash-safe: column files are cut back to the manifest's row count
+before writing, and the aggregates and manifest are swapped in afterwards.
+Aggregates whose revision does not match the manifest are rebuilt.
+
+    python -m anxiety.ingest append new_responses.csv --store data/anxiety_store
+    python -m anxiety.ingest verify --store data/anxiety_store
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .dashboard import FULL_AGE_RANGE, SUMMARY_COLUMNS
+from .data import DTYPES
+from .features import BINARY_COLS, TARGET_COLUMN
+from .filters import ALL, FILTER_COLUMNS
+from .store import GROUP_COLUMNS, MANIFEST, STORE_DIR, ColumnStore
+
+AGGREGATES_FILE = 'aggregates.npz'
+# Columns the aggregates are kept per value of; Age values index their axis directly
+KEY_COLUMNS = ['Age'] + GROUP_COLUMNS
+AGE_VALUES = 128
+# Bounded scales: checked on ingest and (for the target) the histogram bins.
+# Age is held to the surveyed range the Dashboard's age slider covers.
+SCALES = {
+    'Age': FULL_AGE_RANGE,
+    'Stress Level (1-10)': (1, 10),
+    'Sweating Level (1-5)': (1, 5),
+    'Diet Quality (1-10)': (1, 10),
+    'Anxiety Level (1-10)': (1, 10),
+}
+LEVELS = SCALES[TARGET_COLUMN][1] + 1
+_TARGET_POS = SUMMARY_COLUMNS.index(TARGET_COLUMN)
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def validate_batch(frame):
+    """Check a raw batch against the dataset schema and return it typed.
+
+    Text columns come back as str, numbers in the store's dtypes. Every
+    problem is reported at once in the SchemaError message.
+    """
+    missing = [col for col in DTYPES if col not in frame.columns]
+    if missing:
+        raise SchemaError(f"Missing columns: {missing}")
+    problems = []
+    typed = {}
+    for col, dtype in DTYPES.items():
+        values = frame[col]
+        nulls = values.isna().to_numpy()
+        if nulls.any():
+            problems.append(f"{col}: {nulls.sum()} empty values (first at row {np.flatnonzero(nulls)[0]})")
+            continue
+        if dtype == 'category':
+            values = values.astype(str).str.strip()
+            allowed = {'No', 'Yes'} if col in BINARY_COLS else None
+            bad = (values == '') if allowed is None else ~values.isin(allowed)
+            if bad.any():
+                problems.append(f"{col}: unexpected values {sorted(set(values[bad]))[:5]}")
+            typed[col] = values.to_numpy(dtype=object)
+            continue
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+        bad = ~np.isfinite(numbers) | (numbers < 0)
+        info = np.iinfo(dtype) if np.dtype(dtype).kind == 'i' else None
+        if info is not None or col in SCALES:
+            bad |= numbers != np.round(numbers)
+        if info is not None:
+            bad |= numbers > info.max
+        if col in SCALES:
+            low, high = SCALES[col]
+            bad |= (numbers < low) | (numbers > high)
+        if bad.any():
+            problems.append(f"{col}: {bad.sum()} invalid values (first at row {np.flatnonzero(bad)[0]}: "
+                            f"{values.iloc[np.flatnonzero(bad)[0]]!r})")
+        else:
+            typed[col] = numbers.astype(dtype)
+    if problems:
+        raise SchemaError('; '.join(problems))
+    return pd.DataFrame(typed, index=frame.index)
+
+
+class RunningAggregates:
+    """Exact per-value aggregates of the store, updated batch by batch."""
+
+    def __init__(self, categories, source=None, revision=0):
+        self.categories = {col: list(categories[col]) for col in GROUP_COLUMNS}
+        # Store this was computed for: source CSV hash and append revision
+        self.source = source
+        self.revision = revision
+        self.n_rows = 0
+        self.arrays = {}
+        self._resize()
+
+    def _size(self, col):
+        return AGE_VALUES if col == 'Age' else len(self.categories[col])
+
+    def _shapes(self):
+        n_sum = len(SUMMARY_COLUMNS)
+        for key in KEY_COLUMNS:
+            n = self._size(key)
+            yield f'count/{key}', (n,)
+            yield f'sum/{key}', (n, n_sum)
+            yield f'sumsq/{key}', (n, n_sum)
+            yield f'levels/{key}', (n, LEVELS)
+            for group in GROUP_COLUMNS:
+                for stat in ('count', 'sum', 'sumsq'):
+                    yield f'cross_{stat}/{key}/{group}', (n, self._size(group))
+
+    def _resize(self):
+        """Allocate missing arrays and zero-pad those a new category outgrew."""
+        for name, shape in self._shapes():
+            array = self.arrays.get(name)
+            if array is None:
+                self.arrays[name] = np.zeros(shape, dtype=np.int64)
+            elif array.shape != shape:
+                self.arrays[name] = np.pad(array, [(0, s - a) for s, a in zip(shape, array.shape)])
+
+    def add_categories(self, col, values):
+        new = [v for v in values if v not in self.categories[col]]
+        if new:
+            self.categories[col] += new
+            self._resize()
+
+    def update(self, codes, values):
+        """Fold in a batch: codes {key column: int codes (Age: the age)}, values (rows, summary columns)."""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        squares = values * values
+        y = values[:, _TARGET_POS]
+        levels = y.astype(np.int64)
+        A = self.arrays
+
+        def total(idx, n, weights=None):
+            # Integer-valued weights: float64 bincount sums are exact below 2**53
+            out = np.bincount(idx, weights=weights, minlength=n)
+            return out if weights is None else np.rint(out).astype(np.int64)
+
+        for key in KEY_COLUMNS:
+            k = np.asarray(codes[key], dtype=np.int64)
+            n = self._size(key)
+            A[f'count/{key}'] += total(k, n)
+            for s in range(values.shape[1]):
+                A[f'sum/{key}'][:, s] += total(k, n, values[:, s])
+                A[f'sumsq/{key}'][:, s] += total(k, n, squares[:, s])
+            A[f'levels/{key}'] += total(k * LEVELS + levels, n * LEVELS).reshape(n, LEVELS)
+            for group in GROUP_COLUMNS:
+                m = self._size(group)
+                idx = k * m + np.asarray(codes[group], dtype=np.int64)
+                A[f'cross_count/{key}/{group}'] += total(idx, n * m).reshape(n, m)
+                A[f'cross_sum/{key}/{group}'] += total(idx, n * m, y).reshape(n, m)
+                A[f'cross_sumsq/{key}/{group}'] += total(idx, n * m, y * y).reshape(n, m)
+        self.n_rows += len(values)
+
+    def _selection(self, state):
+        """(key column, rows of its axis) for a state the aggregates cover, else None.
+
+        Covered: an age range alone, or one other filter with an age range
+        that includes every stored age.
+        """
+        low, high = max(state[0][0], 0), min(state[0][1], AGE_VALUES - 1)
+        active = [(control, value) for control, value in zip(FILTER_COLUMNS, state[1:]) if value != ALL]
+        if not active:
+            return 'Age', slice(low, high + 1)
+        ages = self.arrays['count/Age']
+        if len(active) > 1 or ages[:low].any() or ages[high + 1:].any():
+            return None
+        control, value = active[0]
+        col = FILTER_COLUMNS[control]
+        if value not in self.categories[col]:
+            return col, slice(0, 0)
+        code = self.categories[col].index(value)
+        return col, slice(code, code + 1)
+
+    def _group_table(self, col, counts, sums=None):
+        cats = np.array(self.categories[col], dtype=object)
+        present = np.flatnonzero(counts)
+        order = present[np.argsort(cats[present].astype(str), kind='stable')]
+        if sums is None:
+            return pd.DataFrame({col: cats[order].astype(str), 'count': counts[order]})
+        return pd.DataFrame({col: cats[order].astype(str), 'mean': sums[order] / counts[order]})
+
+    def view(self, state):
+        """Count, summary means, histogram and group tables of a state, or None if not covered.
+
+        The tables equal those of ``ColumnStore.compute_view`` for the same state.
+        """
+        selected = self._selection(state)
+        if selected is None:
+            return None
+        key, rows = selected
+        A = self.arrays
+        count = int(A[f'count/{key}'][rows].sum())
+        sums = A[f'sum/{key}'][rows].sum(axis=0)
+        level_counts = A[f'levels/{key}'][rows].sum(axis=0)
+        present = np.flatnonzero(level_counts)
+        view = {
+            'count': count,
+            'summary': {col: sums[s] / count if count else float('nan') for s, col in enumerate(SUMMARY_COLUMNS)},
+            'histogram': pd.DataFrame({TARGET_COLUMN: present.astype(np.dtype(DTYPES[TARGET_COLUMN])),
+                                       'count': level_counts[present]}),
+            'rows': None,
+        }
+        cross = {group: (A[f'cross_count/{key}/{group}'][rows].sum(axis=0),
+                         A[f'cross_sum/{key}/{group}'][rows].sum(axis=0)) for group in GROUP_COLUMNS}
+        view['gender_counts'] = self._group_table('Gender', cross['Gender'][0])
+        view['gender_means'] = self._group_table('Gender', *cross['Gender'])
+        view['occupation_means'] = self._group_table('Occupation', *cross['Occupation'])
+        view['category_means'] = {col: self._group_table(col, *cross[col]) for col in GROUP_COLUMNS[2:]}
+        return view
+
+    def save(self, store_dir):
+        path = os.path.join(store_dir, AGGREGATES_FILE)
+        meta = {'source': self.source, 'revision': self.revision, 'n_rows': self.n_rows,
+                'categories': self.categories}
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **self.arrays)
+        os.replace(path + '.tmp', path)
+
+    def matches(self, store):
+        return (self.source, self.revision, self.n_rows) == (
+            store.manifest['source']['sha256'], store.manifest.get('revision', 0), store.n_rows)
+
+    @classmethod
+    def load(cls, store_dir):
+        with np.load(os.path.join(store_dir, AGGREGATES_FILE)) as data:
+            meta = json.loads(str(data['meta']))
+            self = cls(meta['categories'], meta['source'], meta['revision'])
+            self.n_rows = meta['n_rows']
+            for name in self.arrays:
+                self.arrays[name] = data[name]
+        return self
+
+    @classmethod
+    def from_store(cls, store):
+        """Full recompute over every row of a ColumnStore."""
+        self = cls({col: store.columns[col]['categories'] for col in GROUP_COLUMNS},
+                   store.manifest['source']['sha256'], store.manifest.get('revision', 0))
+        for window in store.chunks(KEY_COLUMNS + SUMMARY_COLUMNS):
+            self.update({col: window[col] for col in KEY_COLUMNS},
+                        np.column_stack([window[col] for col in SUMMARY_COLUMNS]))
+        return self
+
+
+def load_aggregates(store):
+    """The store's saved aggregates if they match its manifest, else a full recompute."""
+    try:
+        aggregates = RunningAggregates.load(store.store_dir)
+    except (OSError, KeyError, ValueError):
+        aggregates = None
+    if aggregates is None or not aggregates.matches(store):
+        aggregates = RunningAggregates.from_store(store)
+    return aggregates
+
+
+def append(store_dir, frame):
+    """Validate ``frame`` and append it to the store; return the new row count."""
+    batch = validate_batch(frame)
+    store = ColumnStore(store_dir)
+    aggregates = load_aggregates(store)
+    manifest = json.loads(json.dumps(store.manifest))
+    n_rows = manifest['n_rows']
+
+    codes = {}
+    for meta in manifest['columns']:
+        col = meta['name']
+        values = batch[col].to_numpy()
+        if 'categories' in meta:
+            for value in pd.unique(values):
+                if value not in meta['categories']:
+                    meta['categories'].append(value)
+            lookup = {value: i for i, value in enumerate(meta['categories'])}
+            values = np.array([lookup[v] for v in values], dtype=np.int16)
+            aggregates.add_categories(col, meta['categories'])
+            codes[col] = values
+        elif len(values):
+            meta['min'] = min(meta['min'], float(values.min()))
+            meta['max'] = max(meta['max'], float(values.max()))
+        values = np.ascontiguousarray(values, dtype=np.dtype(meta['dtype']))
+        with open(os.path.join(store_dir, meta['file']), 'r+b') as f:
+            # Drop bytes an interrupted append left behind
+            f.truncate(n_rows * values.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+    codes['Age'] = batch['Age'].to_numpy()
+    aggregates.update(codes, batch[SUMMARY_COLUMNS].to_numpy(dtype=np.float64))
+
+    manifest['n_rows'] = n_rows + len(batch)
+    manifest['revision'] = manifest.get('revision', 0) + 1
+    manifest.setdefault('appends', []).append(
+        {'rows': len(batch), 'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())})
+    aggregates.revision = manifest['revision']
+    aggregates.save(store_dir)
+    path = os.path.join(store_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.tmp', path)
+    return manifest['n_rows']
+
+
+def _covered_states(store):
+    from .dashboard import FULL_AGE_RANGE, filter_state
+
+    base = [FULL_AGE_RANGE] + [ALL] * len(FILTER_COLUMNS)
+    states = [filter_state(*base), filter_state((25, 40), *base[1:])]
+    for i, control in enumerate(FILTER_COLUMNS, start=1):
+        for value in store.options[control]:
+            states.append(filter_state(*base[:i], value, *base[i + 1:]))
+    return states
+
+
+def verify(store_dir=STORE_DIR):
+    """Compare the saved aggregates with a full recompute and with streamed views."""
+    from .store import _frames_equal
+
+    store = ColumnStore(store_dir)
+    saved = RunningAggregates.load(store_dir)
+    fresh = RunningAggregates.from_store(store)
+    mismatches = [name for name in fresh.arrays if not np.array_equal(saved.arrays[name], fresh.arrays[name])]
+    if not saved.matches(store):
+        mismatches.append('revision')
+    for state in _covered_states(store):
+        expected = store.compute_view(state)
+        actual = saved.view(state)
+        mismatches += [(state, key) for key in actual
+                       if key != 'rows' and not _frames_equal(expected[key], actual[key])]
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append survey rows to the column store.")
+    parser.add_argument('command', choices=['append', 'verify'])
+    parser.add_argument('csv', nargs='?', help="Batch to append (same columns as the dataset)")
+    parser.add_argument('--store', default=STORE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'append':
+        if not args.csv:
+            parser.error("append needs a CSV")
+        t0 = time.perf_counter()
+        try:
+            n_rows = append(args.store, pd.read_csv(args.csv, dtype=str))
+        except SchemaError as e:
+            print(f"Rejected {args.csv}: {e}")
+            sys.exit(1)
+        print(f"Appended {args.csv} in {(time.perf_counter() - t0) * 1000:.1f} ms, store now has {n_rows:,} rows")
+        return
+    mismatches = verify(args.store)
+    for mismatch in mismatches:
+        print(f"Mismatch: {mismatch}")
+    print('OK' if not mismatches else 'FAILED')
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""Precomputed permutation importance and partial dependence of the model.
+
+Replaces the notebook's ``permutation_importance(best_xgb, X_test, y_test,
+n_repeats=10, scoring='recall')`` and ``PartialDependenceDisplay`` over the
+11 numeric features. Instead of rescoring one permuted column or one grid
+value at a time, every permuted copy of a repeat (all 16 features) and every
+grid-substituted copy of a feature are stacked into one matrix and scored
+with a single ``predict_proba`` call. Repeats and features are spread over
+worker processes, and the results are written to ``model/insights.json`` for
+the Dashboard's Model Insights tab, which only reads the file.
+
+The training pipeline writes the file after exporting the model. To rebuild
+it on the notebook's test split:
+
+    python -m anxiety.insights --workers 4
+
+Permutations are drawn per (random_state, repeat) with NumPy, so individual
+repeats differ from sklearn's draws; the PDP grid uses linear percentiles.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .data import file_hash
+from .features import FEATURE_ORDER, NUMERICAL_COLS
+from .model import DECISION_THRESHOLD, INSIGHTS_FILE, MODEL_DIR, MODEL_FILE, load_artifacts
+
+FORMAT = 'anxiety-model-insights'
+FORMAT_VERSION = 1
+N_REPEATS = 10
+RANDOM_STATE = 42
+GRID_RESOLUTION = 50
+GRID_PERCENTILES = (5, 95)
+# Upper bound on the rows of one predict_proba call
+BATCH_ROWS = 262_144
+
+# Per-process state, set by _init_worker
+_model = None
+_X = None
+_y = None
+
+
+def load_scorer(model_dir=MODEL_DIR, engine='auto'):
+    """The model for large offline batches.
+
+    xgboost's predictor is several times faster than the NumPy evaluator on
+    batches of this size, so it is used whenever it is installed ('auto').
+    """
+    if engine == 'auto':
+        try:
+            import xgboost  # noqa: F401
+            engine = 'xgboost'
+        except ImportError:
+            engine = 'numpy'
+    if engine == 'numpy':
+        return load_artifacts(model_dir)[0]
+    import joblib
+    model = joblib.load(os.path.join(model_dir, MODEL_FILE))
+    # One thread per worker process
+    model.set_params(n_jobs=1)
+    return model
+
+
+def _init_worker(model_dir, engine, X, y):
+    global _model, _X, _y
+    _model = load_scorer(model_dir, engine)
+    _X, _y = X, y
+
+
+def _proba(X):
+    """P(High) for a stacked matrix, in as few calls as BATCH_ROWS allows."""
+    return np.concatenate([
+        _model.predict_proba(X[start:start + BATCH_ROWS], validate_features=False)[:, 1]
+        for start in range(0, len(X), BATCH_ROWS)
+    ])
+
+
+def recall(y, proba):
+    predicted = proba >= DECISION_THRESHOLD
+    positives = (y == 1).sum()
+    return float((predicted & (y == 1)).sum() / positives) if positives else 0.0
+
+
+def _permutation_job(repeat, features):
+    """Recall of every feature's permuted copy for one repeat (one model call)."""
+    rng = np.random.default_rng([RANDOM_STATE, repeat])
+    n = len(_X)
+    stacked = np.repeat(_X[None, :, :], len(features), axis=0)
+    for k, i in enumerate(features):
+        stacked[k, :, i] = _X[rng.permutation(n), i]
+    proba = _proba(stacked.reshape(-1, _X.shape[1])).reshape(len(features), n)
+    return [recall(_y, p) for p in proba]
+
+
+def _pdp_job(feature, grid):
+    """Average P(High) with ``feature`` set to each grid value (one model call)."""
+    stacked = np.repeat(_X[None, :, :], len(grid), axis=0)
+    stacked[:, :, feature] = np.asarray(grid)[:, None]
+    return _proba(stacked.reshape(-1, _X.shape[1])).reshape(len(grid), len(_X)).mean(axis=1).tolist()
+
+
+def _run_job(job):
+    kind, arg, payload = job
+    if kind == 'permutation':
+        return job, _permutation_job(arg, payload)
+    return job, _pdp_job(arg, payload)
+
+
+def pdp_grid(values, resolution=GRID_RESOLUTION, percentiles=GRID_PERCENTILES):
+    """Unique values if there are few, else an even grid between the percentiles (like sklearn)."""
+    uniques = np.unique(values)
+    if len(uniques) < resolution:
+        return uniques
+    low, high = np.percentile(values, percentiles)
+    return np.linspace(low, high, resolution)
+
+
+def compute_insights(X, y, model_dir=MODEL_DIR, workers=None, n_repeats=N_REPEATS,
+                     pdp_features=NUMERICAL_COLS, resolution=GRID_RESOLUTION, engine='auto'):
+    """Permutation importance (recall) and PDP curves for scaled rows X, labels y."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    features = list(range(X.shape[1]))
+    grids = {FEATURE_ORDER.index(col): pdp_grid(X[:, FEATURE_ORDER.index(col)], resolution)
+             for col in pdp_features}
+    jobs = [('permutation', repeat, features) for repeat in range(n_repeats)]
+    jobs += [('pdp', i, grid) for i, grid in grids.items()]
+
+    t0 = time.perf_counter()
+    preprocessor = load_artifacts(model_dir)[2]
+    baseline = recall(y, load_scorer(model_dir, engine).predict_proba(X, validate_features=False)[:, 1])
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(model_dir, engine, X, y)) as pool:
+        results = list(pool.map(_run_job, jobs))
+    elapsed = time.perf_counter() - t0
+
+    scores = np.zeros((len(features), n_repeats))
+    curves = {}
+    for (kind, arg, _), result in results:
+        if kind == 'permutation':
+            scores[:, arg] = result
+        else:
+            curves[arg] = result
+
+    stacked_rows = [len(features) * len(X)] * n_repeats + [len(g) * len(X) for g in grids.values()]
+    return {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'model': _model_stamp(model_dir),
+        'rows': len(X),
+        'scoring': 'recall',
+        'baseline_score': baseline,
+        'n_repeats': n_repeats,
+        'random_state': RANDOM_STATE,
+        'importance': {FEATURE_ORDER[i]: (baseline - scores[i]).tolist() for i in features},
+        'partial_dependence': {
+            FEATURE_ORDER[i]: {
+                # Grid back in the form's units
+                'values': ((grids[i] - preprocessor.offset[i]) / preprocessor.scale[i]).tolist(),
+                'average': curves[i],
+            }
+            for i in grids
+        },
+        'timing': {
+            'seconds': elapsed,
+            'workers': workers,
+            'model_calls': 1 + sum(-(-rows // BATCH_ROWS) for rows in stacked_rows),
+            'rows_scored': len(X) + sum(stacked_rows),
+        },
+    }
+
+
+def _model_stamp(model_dir):
+    path = os.path.join(model_dir, MODEL_FILE)
+    if not os.path.exists(path):
+        return None
+    return {'file': MODEL_FILE, 'sha256': file_hash(path)}
+
+
+def write_insights(insights, model_dir=MODEL_DIR):
+    path = os.path.join(model_dir, INSIGHTS_FILE)
+    with open(path, 'w') as f:
+        json.dump(insights, f, indent=1)
+    return path
+
+
+def insights_signature(model_dir=MODEL_DIR):
+    """mtime_ns of the insights file, None when it does not exist."""
+    path = os.path.join(model_dir, INSIGHTS_FILE)
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def load_insights(model_dir=MODEL_DIR):
+    """The insights dict plus a 'stale' flag, or None when the file is missing or unreadable."""
+    try:
+        with open(os.path.join(model_dir, INSIGHTS_FILE)) as f:
+            insights = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if insights.get('format') != FORMAT or insights.get('format_version') != FORMAT_VERSION:
+        return None
+    insights['stale'] = insights.get('model') != _model_stamp(model_dir)
+    return insights
+
+
+def importance_table(insights):
+    """(feature, mean, std) sorted by mean importance."""
+    import pandas as pd
+
+    scores = insights['importance']
+    table = pd.DataFrame({
+        'feature': list(scores),
+        'mean': [float(np.mean(v)) for v in scores.values()],
+        'std': [float(np.std(v)) for v in scores.values()],
+    })
+    return table.sort_values('mean', ascending=False, ignore_index=True)
+
+
+def pdp_table(insights, feature):
+    import pandas as pd
+
+    curve = insights['partial_dependence'][feature]
+    return pd.DataFrame({feature: curve['values'], 'average': curve['average']})
+
+
+def main(argv=None):
+    import pandas as pd
+
+    from .train import DATA_PATH, prepare
+
+    parser = argparse.ArgumentParser(description="Precompute permutation importance and PDP curves.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--repeats', type=int, default=N_REPEATS)
+    parser.add_argument('--grid-resolution', type=int, default=GRID_RESOLUTION)
+    parser.add_argument('--engine', choices=['auto', 'xgboost', 'numpy'], default='auto',
+                        help="Scorer for the stacked batches (auto: xgboost if installed)")
+    args = parser.parse_args(argv)
+
+    # The notebook's X_test_encoded / y_test_class
+    _, X_test, _, y_test, _ = prepare(pd.read_csv(args.data))
+    insights = compute_insights(X_test, y_test, args.model_dir, args.workers, args.repeats,
+                                resolution=args.grid_resolution, engine=args.engine)
+    path = write_insights(insights, args.model_dir)
+
+    timing = insights['timing']
+    print(f"{timing['rows_scored']:,} rows in {timing['model_calls']} model calls, "
+          f"{timing['seconds']:.2f}s on {timing['workers']} workers -> {path}")
+    print(f"Baseline recall: {insights['baseline_score']:.3f}")
+    print(importance_table(insights).head(10).to_string(index=False, float_format='{:.4f}'.format))
+
+
+if __name__ == '__main__':
+    main()
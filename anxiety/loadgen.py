@@ -0,0 +1,133 @@
+"""Load generator for ``anxiety.serve``.
+
+Starts the service once per (max_batch, window) setting, drives it with N
+concurrent keep-alive clients posting random form profiles and prints p50/p99
+latency and throughput for every combination:
+
+    python -m anxiety.loadgen --concurrency 1,8,32,128 --windows 0,1,5 --max-batch 64
+
+Pass --url to measure an already running service instead.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from .features import BINARY_COLS, FEATURE_ORDER, FORM_RANGES
+
+
+def random_profile(rng):
+    profile = {}
+    for col in FEATURE_ORDER:
+        if col in BINARY_COLS:
+            profile[col] = rng.choice(['No', 'Yes'])
+        else:
+            low, high, step = FORM_RANGES[col]
+            profile[col] = low + step * rng.randint(0, int(round((high - low) / step)))
+    return profile
+
+
+async def _client(host, port, bodies, deadline, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        i = 0
+        while time.perf_counter() < deadline:
+            body = bodies[i % len(bodies)]
+            i += 1
+            request = (
+                f"POST /predict HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode('latin-1') + body
+            t0 = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+async def run_level(host, port, concurrency, duration, seed=0):
+    rng = random.Random(seed)
+    bodies = [json.dumps(random_profile(rng)).encode('utf-8') for _ in range(512)]
+    latencies = []
+    deadline = time.perf_counter() + duration
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, bodies[i::concurrency] or bodies, deadline, latencies)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000.0
+    return {
+        'concurrency': concurrency,
+        'requests': len(lat),
+        'throughput': len(lat) / elapsed,
+        'p50_ms': float(np.percentile(lat, 50)) if len(lat) else float('nan'),
+        'p99_ms': float(np.percentile(lat, 99)) if len(lat) else float('nan'),
+    }
+
+
+def _start_server(port, max_batch, window_ms, model_dir):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'anxiety.serve', '--port', str(port), '--max-batch', str(max_batch),
+         '--window-ms', str(window_ms), '--model-dir', model_dir],
+        stdout=subprocess.PIPE, text=True,
+    )
+    proc.stdout.readline()  # "Serving on ..." once the artifacts are loaded
+    return proc
+
+
+def _print_row(label, result):
+    print(f"{label:<22} {result['concurrency']:>5} {result['requests']:>9,} "
+          f"{result['throughput']:>10,.0f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure latency/throughput of the inference service.")
+    parser.add_argument('--url', default=None, help="Use a running service instead of starting one")
+    parser.add_argument('--port', type=int, default=8601)
+    parser.add_argument('--model-dir', default='model')
+    parser.add_argument('--concurrency', default='1,8,32,128')
+    parser.add_argument('--windows', default='0,1,5', help="Batch windows in ms")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per measurement")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(',')]
+    print(f"{'setting':<22} {'conc':>5} {'requests':>9} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+
+    if args.url:
+        url = urlparse(args.url)
+        for level in levels:
+            _print_row('external', asyncio.run(run_level(url.hostname, url.port, level, args.duration)))
+        return
+
+    for window in (float(w) for w in args.windows.split(',')):
+        proc = _start_server(args.port, args.max_batch, window, args.model_dir)
+        try:
+            for level in levels:
+                result = asyncio.run(run_level('127.0.0.1', args.port, level, args.duration))
+                _print_row(f"batch={args.max_batch} win={window:g}ms", result)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""Headless concurrent-session load test for the Streamlit pages.
+
+Each simulated session is a Streamlit ``AppTest`` running one page in this
+process, as the server would: no browser, no network, shared process caches.
+Dashboard sessions pick random filter combinations and Prediction sessions
+fill the form with random answers and submit it. For every concurrency level
+all sessions run at once on their own threads:
+
+    python -m anxiety.loadtest --levels 1,10,50,100 --steps 10
+    python -m anxiety.loadtest --pages dashboard --levels 1,25 --json loadtest.json
+
+Reported per level: rerun latency p50/p95/p99, RSS growth per session, the
+Dashboard view cache hit rate and the share of Prediction submits that needed
+a model call.
+
+All sessions of a level share one mock Streamlit runtime, as the sessions
+of a server process share its runtime (see ``shared_runtime``). They also
+share one interpreter lock, so reruns slow down with the level: at 100
+sessions raise ``--timeout`` above the slowest rerun or timeouts are
+reported as errors.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from unittest.mock import patch
+
+import numpy as np
+
+from . import metrics
+
+# AppTest resolves relative script paths against the caller's directory, not the cwd
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    'dashboard': os.path.join(ROOT, 'pages', '2_📊_Dashboard.py'),
+    'prediction': os.path.join(ROOT, 'pages', '3_🔍_Prediction.py'),
+}
+
+
+def rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # Peak instead of current where /proc is unavailable (macOS reports bytes)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def _change_filters(at, rng):
+    low = rng.randint(18, 60)
+    at.slider[0].set_value((low, rng.randint(low, 64)))
+    # Mostly narrow a couple of filters, like a user exploring
+    for box in at.selectbox:
+        if rng.random() < 0.3:
+            box.select(rng.choice(box.options))
+        elif rng.random() < 0.3:
+            box.select(box.options[0])
+
+
+def _fill_form(at, rng):
+    for slider in at.slider:
+        steps = int(round((slider.max - slider.min) / slider.step))
+        slider.set_value(slider.min + slider.step * rng.randint(0, steps))
+    for radio in at.radio:
+        radio.set_value(rng.choice(radio.options))
+    at.button[0].click()
+
+
+ACTIONS = {'dashboard': _change_filters, 'prediction': _fill_form}
+
+
+@contextmanager
+def shared_runtime():
+    """Install one mock Streamlit runtime and config patch for concurrent AppTests.
+
+    ``AppTest.run`` installs its own mock ``Runtime._instance`` and patches
+    ``config.get_option`` for the length of each run, then resets both. With
+    sessions on several threads, one run's reset would tear down the runtime
+    of scripts still running on the others. Here both are installed once for
+    the whole level, and each run's own install goes to a throwaway subclass
+    and a no-op patch.
+
+    Every AppTest run also compiles its page into a fresh script cache, and
+    compiling on several threads at once can fail on CPython 3.11 ("AST
+    constructor recursion depth mismatch"). The sessions share one cache
+    instead, as a server's sessions share the runtime's, so each page is
+    compiled once under the cache's lock.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    class SessionRuntime(Runtime):
+        # Receives AppTest's per-run Runtime._instance assignments
+        _instance = None
+
+    # Built like the per-run mock in AppTest._run
+    runtime = app_test.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage('/mock/media'))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    components = app_test.BidiComponentManager()
+    components.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = components
+    script_cache = ScriptCache()
+
+    previous = Runtime._instance
+    Runtime._instance = runtime
+    try:
+        with app_test.patch_config_options({'global.appTest': True}), \
+                patch.object(app_test, 'Runtime', SessionRuntime), \
+                patch.object(app_test, 'patch_config_options', lambda overrides: nullcontext()), \
+                patch.object(local_script_runner, 'ScriptCache', lambda: script_cache):
+            yield runtime
+    finally:
+        Runtime._instance = previous
+
+
+def run_session(page, steps, seed, latencies, errors, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = None
+    try:
+        at = AppTest.from_file(PAGES[page], default_timeout=timeout)
+        for step in range(steps + 1):
+            if step:
+                ACTIONS[page](at, rng)
+            t0 = time.perf_counter()
+            at.run()
+            latencies.append((page, time.perf_counter() - t0))
+            if at.exception:
+                errors.append(f"{page}: {at.exception[0].value}")
+                break
+    except Exception as e:
+        errors.append(f"{page}: {e}")
+    return at
+
+
+def run_level(n_sessions, pages, steps, timeout=120, seed=0):
+    latencies, errors, sessions = [], [], []
+    before = metrics.snapshot()['counters']
+    gc.collect()
+    rss_before = rss_mb()
+
+    def target(i):
+        sessions.append(run_session(pages[i % len(pages)], steps, seed * 10_000 + i,
+                                    latencies, errors, timeout))
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n_sessions)]
+    with shared_runtime():
+        t0 = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - t0
+    gc.collect()
+    rss_after = rss_mb()
+
+    counters = metrics.snapshot()['counters']
+    delta = {k: counters.get(k, 0) - before.get(k, 0) for k in counters}
+    hits = delta.get('dashboard.view_cache.hit', 0)
+    misses = delta.get('dashboard.view_cache.miss', 0)
+    submits = delta.get('prediction.submit', 0)
+    calls = delta.get('prediction.model_call', 0)
+
+    result = {'sessions': n_sessions, 'elapsed_s': elapsed, 'error_count': len(errors), 'errors': errors[:5]}
+    for page in ['all'] + list(pages):
+        lat = np.array([t for p, t in latencies if page in ('all', p)]) * 1000.0
+        result[page] = {
+            'reruns': len(lat),
+            'p50_ms': float(np.percentile(lat, 50)) if len(lat) else float('nan'),
+            'p95_ms': float(np.percentile(lat, 95)) if len(lat) else float('nan'),
+            'p99_ms': float(np.percentile(lat, 99)) if len(lat) else float('nan'),
+        }
+    result['rss_mb'] = rss_after
+    result['rss_growth_per_session_mb'] = (rss_after - rss_before) / n_sessions
+    result['view_cache_hit_rate'] = hits / (hits + misses) if hits + misses else float('nan')
+    result['prediction_model_call_rate'] = calls / submits if submits else float('nan')
+    del sessions
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent headless sessions through the pages.")
+    parser.add_argument('--levels', default='1,10,50,100', help="Concurrent sessions per level")
+    parser.add_argument('--pages', default='dashboard,prediction', help=f"Subset of {','.join(PAGES)}")
+    parser.add_argument('--steps', type=int, default=10, help="Interactions per session after the first load")
+    parser.add_argument('--timeout', type=float, default=120, help="Seconds allowed per rerun")
+    parser.add_argument('--json', default=None, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    # The cache counters come from the instrumentation layer
+    metrics.ENABLED = True
+    pages = args.pages.split(',')
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'RSS MB':>8} {'MB/sess':>8} {'view hit':>9} {'model/submit':>13}")
+    results = []
+    for level in (int(n) for n in args.levels.split(',')):
+        r = run_level(level, pages, args.steps, args.timeout, seed=level)
+        results.append(r)
+        a = r['all']
+        print(f"{level:>8} {a['reruns']:>7} {a['p50_ms']:>9.1f} {a['p95_ms']:>9.1f} {a['p99_ms']:>9.1f} "
+              f"{r['rss_mb']:>8.0f} {r['rss_growth_per_session_mb']:>8.2f} "
+              f"{r['view_cache_hit_rate']:>9.0%} {r['prediction_model_call_rate']:>13.0%}", flush=True)
+        if r['error_count']:
+            print(f"    {r['error_count']} failed sessions, first errors:")
+        for error in r['errors']:
+            print(f"    error: {error}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
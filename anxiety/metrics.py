@@ -0,0 +1,238 @@
+"""Timing spans and counters for the pages' hot paths.
+
+Off unless ``APP_METRICS=1``: ``span`` then hands back one shared no-op
+context manager and ``count`` returns immediately. When on, every span is
+recorded for the current rerun (per script thread) and aggregated per
+process. The aggregates keep count, sum and the last samples per stage for
+p50/p95 and are exposed as:
+
+* the developer panel in the pages' sidebar (``render_panel``)
+* Prometheus text at http://127.0.0.1:$METRICS_PORT/metrics and JSON at
+  /metrics.json, when ``METRICS_PORT`` is set
+* gauges set with ``gauge`` (e.g. the drift monitor's scores) in the JSON
+  and Prometheus output
+* one JSON line per rerun appended to ``$METRICS_LOG``, when set
+"""
+import json
+import os
+import threading
+import time
+import warnings
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get('APP_METRICS', '').lower() in ('1', 'true', 'yes')
+METRICS_PORT = os.environ.get('METRICS_PORT')
+METRICS_LOG = os.environ.get('METRICS_LOG')
+# Samples kept per stage for the quantiles
+SAMPLES = 1024
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_stages = defaultdict(lambda: {'count': 0, 'sum': 0.0, 'samples': deque(maxlen=SAMPLES)})
+_counters = defaultdict(int)
+_gauges = {}
+_reruns = deque(maxlen=50)
+_server = None
+
+
+def _record(name, seconds):
+    with _lock:
+        stage = _stages[name]
+        stage['count'] += 1
+        stage['sum'] += seconds
+        stage['samples'].append(seconds)
+    spans = getattr(_local, 'spans', None)
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def _span(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - t0)
+
+
+def span(name):
+    """Context manager timing the enclosed block as stage ``name``."""
+    if not ENABLED:
+        return _NOOP
+    return _span(name)
+
+
+def count(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += n
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters[name] = counters.get(name, 0) + n
+
+
+def gauge(name, value):
+    """Set the current value of ``name`` (last write wins)."""
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[name] = value
+
+
+def begin_rerun(page):
+    """Start collecting spans for one script run on this thread."""
+    if not ENABLED:
+        return
+    _local.page = page
+    _local.spans = []
+    _local.counters = {}
+    _local.started = time.perf_counter()
+    if METRICS_PORT:
+        start_server(int(METRICS_PORT))
+
+
+def end_rerun():
+    """Close the current rerun and return its report (None when disabled)."""
+    if not ENABLED or getattr(_local, 'spans', None) is None:
+        return None
+    total = time.perf_counter() - _local.started
+    report = {
+        'page': _local.page,
+        'time': time.time(),
+        'total': total,
+        'spans': _local.spans,
+        'counters': _local.counters,
+    }
+    _local.spans = None
+    _record(f'rerun.{_local.page}', total)
+    with _lock:
+        _reruns.append(report)
+    if METRICS_LOG:
+        with _lock, open(METRICS_LOG, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+    return report
+
+
+def _quantile(sorted_samples, q):
+    if not sorted_samples:
+        return float('nan')
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+def snapshot():
+    """Per-stage count/sum/p50/p95 and the counters of this process."""
+    with _lock:
+        stages = {name: (s['count'], s['sum'], sorted(s['samples'])) for name, s in _stages.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+    return {
+        'stages': {
+            name: {'count': n, 'sum': total, 'p50': _quantile(samples, 0.5), 'p95': _quantile(samples, 0.95)}
+            for name, (n, total, samples) in sorted(stages.items())
+        },
+        'counters': counters,
+        'gauges': gauges,
+    }
+
+
+def stage_table():
+    """Rows (stage, count, p50 ms, p95 ms) for the developer panel."""
+    return [
+        (name, s['count'], s['p50'] * 1000, s['p95'] * 1000)
+        for name, s in snapshot()['stages'].items()
+    ]
+
+
+def _drift_rows(gauges):
+    from .features import FEATURE_ORDER
+
+    return [
+        {'feature': name, 'PSI': round(gauges[f'drift.psi.{name}'], 3), 'KS': round(gauges[f'drift.ks.{name}'], 3),
+         'out of range': gauges[f'drift.out_of_range.{name}'], 'invalid': gauges[f'drift.invalid.{name}']}
+        for name in FEATURE_ORDER if f'drift.psi.{name}' in gauges
+    ]
+
+
+def render_panel(st):
+    """Close the rerun and draw the "⏱ Performance" sidebar panel (nothing when disabled).
+
+    Shows this rerun's spans, the process-wide p50/p95 per stage and, once
+    the drift monitor has published scores, its per-feature table.
+    """
+    rerun = end_rerun()
+    if rerun is None:
+        return None
+    with st.sidebar.expander('⏱ Performance', expanded=False):
+        st.caption(f"This rerun: {rerun['total'] * 1000:.1f} ms")
+        st.table([{'stage': name, 'ms': round(secs * 1000, 2)} for name, secs in rerun['spans']])
+        st.caption('Process totals')
+        st.table([{'stage': name, 'count': n, 'p50 ms': round(p50, 2), 'p95 ms': round(p95, 2)}
+                  for name, n, p50, p95 in stage_table()])
+        gauges = snapshot()['gauges']
+        if 'drift.observations' in gauges:
+            st.caption(f"Input drift over {gauges['drift.observations']:,} predictions "
+                       f"(max PSI {gauges['drift.max_psi']:.3f})")
+            st.table(_drift_rows(gauges))
+    return rerun
+
+
+def prometheus_text():
+    snap = snapshot()
+    lines = [
+        '# HELP anxiety_stage_seconds Time spent per instrumented stage.',
+        '# TYPE anxiety_stage_seconds summary',
+    ]
+    for name, s in snap['stages'].items():
+        label = f'stage="{name}"'
+        lines.append(f'anxiety_stage_seconds{{{label},quantile="0.5"}} {s["p50"]:.6g}')
+        lines.append(f'anxiety_stage_seconds{{{label},quantile="0.95"}} {s["p95"]:.6g}')
+        lines.append(f'anxiety_stage_seconds_sum{{{label}}} {s["sum"]:.6g}')
+        lines.append(f'anxiety_stage_seconds_count{{{label}}} {s["count"]}')
+    lines += ['# HELP anxiety_events_total Counted events.', '# TYPE anxiety_events_total counter']
+    for name, n in sorted(snap['counters'].items()):
+        lines.append(f'anxiety_events_total{{event="{name}"}} {n}')
+    lines += ['# HELP anxiety_value Current value of a gauge.', '# TYPE anxiety_value gauge']
+    for name, value in sorted(snap['gauges'].items()):
+        lines.append(f'anxiety_value{{name="{name}"}} {value:.6g}')
+    return '\n'.join(lines) + '\n'
+
+
+def start_server(port, host='127.0.0.1'):
+    """Serve /metrics and /metrics.json from a daemon thread (once per process)."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, kind = prometheus_text(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, kind = json.dumps(snapshot()), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            body = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', kind)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            # Port taken (e.g. a second server process): keep the app running without it
+            _server = False
+            warnings.warn(f"Metrics endpoint not started on {host}:{port}: {e}", RuntimeWarning)
+            return _server
+        threading.Thread(target=_server.serve_forever, name='anxiety-metrics', daemon=True).start()
+        return _server
@@ -0,0 +1,107 @@
+"""Loading of the trained artifacts in model/.
+
+Only ``os`` is imported at module level so pages can read the constants and
+artifact signature without paying for numpy, joblib or xgboost; the loaders
+import what they need on first use.
+"""
+import json
+import os
+import threading
+
+MODEL_DIR = 'model'
+MODEL_FILE = 'best_xgb.pkl'
+PREPROCESS_FILE = 'preprocess.pkl'
+# Flat NumPy export of MODEL_FILE, written by `python -m anxiety.trees`
+TREES_FILE = 'best_xgb_trees.npz'
+# Versioned bundle directory and its manifest, written by `python -m anxiety.bundle`
+BUNDLE_DIR = 'bundle'
+BUNDLE_MANIFEST = os.path.join(BUNDLE_DIR, 'manifest.json')
+# Permutation importance and PDP curves, written by `python -m anxiety.insights`
+INSIGHTS_FILE = 'insights.json'
+# Training reference profile for input drift monitoring, written by `python -m anxiety.drift`
+DRIFT_PROFILE_FILE = 'drift_profile.json'
+
+# Probability above which a profile is reported as High anxiety (a bundle
+# records its own, see decision_threshold)
+DECISION_THRESHOLD = 0.5
+
+
+def artifact_signature(model_dir=MODEL_DIR):
+    """(file, mtime_ns, size) of every artifact, changes whenever one is rewritten."""
+    signature = []
+    for name in (MODEL_FILE, PREPROCESS_FILE, TREES_FILE, BUNDLE_MANIFEST):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            st = os.stat(path)
+            signature.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def load_model(model_dir=MODEL_DIR):
+    """Return the tree evaluator if its export is up to date, else the XGBClassifier."""
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    trees_path = os.path.join(model_dir, TREES_FILE)
+    if os.path.exists(trees_path) and os.path.getmtime(trees_path) >= os.path.getmtime(model_path):
+        from .trees import TreeEnsemble
+        return TreeEnsemble.load(trees_path)
+    import joblib
+    return joblib.load(model_path)
+
+
+def bundle_is_current(model_dir=MODEL_DIR):
+    """True if model/bundle/ exists and is not older than the pickled model or preprocessing."""
+    manifest = os.path.join(model_dir, BUNDLE_MANIFEST)
+    if not os.path.exists(manifest):
+        return False
+    built = os.path.getmtime(manifest)
+    for name in (MODEL_FILE, PREPROCESS_FILE):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path) and os.path.getmtime(path) > built:
+            return False
+    return True
+
+
+def decision_threshold(model_dir=MODEL_DIR):
+    """The current bundle's decision threshold, DECISION_THRESHOLD without one."""
+    if not bundle_is_current(model_dir):
+        return DECISION_THRESHOLD
+    try:
+        with open(os.path.join(model_dir, BUNDLE_MANIFEST)) as f:
+            return float(json.load(f)['decision_threshold'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return DECISION_THRESHOLD
+
+
+def load_artifacts(model_dir=MODEL_DIR):
+    """Return (model, preprocess dict, CompiledPreprocessor).
+
+    An up-to-date bundle is preferred over the pickles; the preprocess dict is
+    None in that case since no sklearn objects are loaded.
+    """
+    if bundle_is_current(model_dir):
+        from .bundle import load_bundle
+        bundle = load_bundle(os.path.join(model_dir, BUNDLE_DIR))
+        return bundle.model, None, bundle.preprocessor
+    import joblib
+    from .preprocessing import compile_preprocess
+    preprocess = joblib.load(os.path.join(model_dir, PREPROCESS_FILE))
+    return load_model(model_dir), preprocess, compile_preprocess(preprocess)
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_artifacts(model_dir=MODEL_DIR):
+    """``load_artifacts`` memoized per process until an artifact file changes.
+
+    The lock is held while loading, so a request arriving during the
+    background warm-up waits for it instead of loading a second copy.
+    """
+    signature = artifact_signature(model_dir)
+    with _shared_lock:
+        entry = _shared.get(model_dir)
+        if entry is None or entry[0] != signature:
+            entry = (signature, load_artifacts(model_dir))
+            _shared[model_dir] = entry
+        return entry[1]
@@ -0,0 +1,95 @@
+"""Compiled preprocessing: one scale/offset vector instead of 11 MinMaxScalers."""
+from collections.abc import Mapping
+
+import numpy as np
+
+from .features import BINARY_COLS, ENCODER_KEYS, FEATURE_ORDER, SCALER_KEYS
+
+
+def _lookup(objects, col, keys):
+    # preprocess.pkl stores objects under snake_case keys, accept column names too
+    if col in objects:
+        return objects[col]
+    return objects.get(keys.get(col))
+
+
+class CompiledPreprocessor:
+    """Turns raw form values into model-ready float32 features in one NumPy step.
+
+    Every MinMaxScaler computes ``X * scale_ + min_`` in float64, so folding them
+    into a single (16,) ``scale``/``offset`` pair (1/0 for the binary columns)
+    gives bit-identical results to calling each scaler's ``transform``.
+    """
+
+    def __init__(self, preprocess, feature_order=FEATURE_ORDER):
+        self.feature_order = list(feature_order)
+        self.scale = np.ones(len(self.feature_order), dtype=np.float64)
+        self.offset = np.zeros(len(self.feature_order), dtype=np.float64)
+        for i, col in enumerate(self.feature_order):
+            scaler = _lookup(preprocess.get('scalers', {}), col, SCALER_KEYS)
+            if scaler is not None:
+                self.scale[i] = scaler.scale_[0]
+                self.offset[i] = scaler.min_[0]
+
+        # Binary encoding map per column, e.g. {'No': 0.0, 'Yes': 1.0}
+        self.encodings = {}
+        for col in BINARY_COLS:
+            encoder = _lookup(preprocess.get('label_encoders', {}), col, ENCODER_KEYS)
+            classes = encoder.classes_ if encoder is not None else ['No', 'Yes']
+            self.encodings[col] = {str(c): float(i) for i, c in enumerate(classes)}
+
+    @classmethod
+    def from_arrays(cls, scale, offset, encodings, feature_order=FEATURE_ORDER):
+        """Rebuild from exported constants (no sklearn objects needed)."""
+        self = cls.__new__(cls)
+        self.feature_order = list(feature_order)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.encodings = {col: {str(k): float(v) for k, v in enc.items()} for col, enc in encodings.items()}
+        return self
+
+    def encode(self, values):
+        """Build a raw (1, 16) float64 row from a dict keyed by feature name."""
+        row = np.empty((1, len(self.feature_order)), dtype=np.float64)
+        for i, col in enumerate(self.feature_order):
+            value = values[col]
+            if isinstance(value, str):
+                value = self.encodings[col][value]
+            row[0, i] = value
+        return row
+
+    def encode_frame(self, frame):
+        """Build a raw (n, 16) float64 array from a DataFrame with Yes/No columns."""
+        X = np.empty((len(frame), len(self.feature_order)), dtype=np.float64)
+        for i, col in enumerate(self.feature_order):
+            values = frame[col]
+            if col in self.encodings and values.dtype.kind not in 'biuf':
+                mapped = values.astype(str).map(self.encodings[col])
+                if mapped.isna().any():
+                    unknown = sorted(set(values[mapped.isna()].astype(str)))
+                    raise ValueError(f"Unknown values in '{col}': {unknown}")
+                values = mapped
+            X[:, i] = values.to_numpy(dtype=np.float64)
+        return X
+
+    def transform(self, X):
+        """Scale a dict or an (n, 16) array of encoded values to float32 features."""
+        if isinstance(X, Mapping):
+            X = self.encode(X)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_order):
+            raise ValueError(
+                f"Expected {len(self.feature_order)} features, got {X.shape[1]}"
+            )
+        return (X * self.scale + self.offset).astype(np.float32)
+
+    def inverse_transform(self, X):
+        """Map scaled features back to the original units (float64)."""
+        X = np.asarray(X, dtype=np.float64)
+        return (X - self.offset) / self.scale
+
+
+def compile_preprocess(preprocess):
+    return CompiledPreprocessor(preprocess)
@@ -0,0 +1,215 @@
+"""Local HTTP/JSON inference service with dynamic micro-batching.
+
+    python -m anxiety.serve --port 8600 --max-batch 64 --window-ms 2
+
+POST /predict with the 16 model features as a JSON object (names as in
+``FEATURE_ORDER``, binary columns as "Yes"/"No" or 1/0):
+
+    {"Age": 30, "Sleep Hours": 7.0, ..., "Smoking": "No", ...}
+    -> {"probability": 0.73, "prediction": "High"}
+
+Concurrent requests are queued and scored together with a single
+``predict_proba`` call once ``max_batch`` requests are waiting or
+``window_ms`` has passed since the first one, whichever comes first.
+GET /health and GET /stats report liveness and batching counters. When
+model/drift_profile.json exists, every scored batch also feeds the input drift
+monitor (``anxiety.drift``) and GET /drift returns its latest report.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from . import metrics
+from .drift import load_monitor
+from .model import DECISION_THRESHOLD, MODEL_DIR, decision_threshold, load_artifacts
+
+MAX_BODY = 64 * 1024
+
+
+class MicroBatcher:
+    def __init__(self, model, preprocessor, max_batch=64, window_ms=2.0, monitor=None):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.monitor = monitor
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def predict(self, values):
+        # Encode in the request handler so a bad payload fails only its own request
+        row = self.preprocessor.encode(values)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    # Window over: still take whatever is already waiting
+                    while len(batch) < self.max_batch and not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    continue
+            rows = np.vstack([row for row, _ in batch])
+            try:
+                # Score off the event loop so new requests keep queueing meanwhile
+                proba = await loop.run_in_executor(None, self._score, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), p in zip(batch, proba):
+                if not future.done():
+                    future.set_result(float(p))
+
+    def _score(self, rows):
+        features = self.preprocessor.transform(rows)
+        proba = self.model.predict_proba(features, validate_features=False)[:, 1]
+        if self.monitor is not None:
+            try:
+                self.monitor.observe(features)
+            except Exception:
+                # Monitoring is best effort: a monitor failure must never fail a prediction
+                metrics.count('drift.observe_error')
+        return proba
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'queued': self.queue.qsize(),
+            'max_batch': self.max_batch,
+            'window_ms': self.window * 1000.0,
+        }
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode('utf-8')
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+              500: 'Internal Server Error'}[status]
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+class InferenceServer:
+    def __init__(self, batcher, threshold=DECISION_THRESHOLD):
+        self.batcher = batcher
+        self.threshold = threshold
+        self.started = time.time()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split(' ', 2)
+                if len(parts) != 3:
+                    writer.write(_response(400, {'error': 'malformed request line'}, False))
+                    await writer.drain()
+                    break
+                method, path, _ = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    writer.write(_response(400, {'error': 'invalid Content-Length'}, False))
+                    await writer.drain()
+                    break
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if length > MAX_BODY:
+                    writer.write(_response(413, {'error': 'body too large'}, False))
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await self.route(method, path.split('?', 1)[0], body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'uptime': time.time() - self.started}
+        if method == 'GET' and path == '/stats':
+            return 200, self.batcher.stats()
+        if method == 'GET' and path == '/drift':
+            if self.batcher.monitor is None:
+                return 404, {'error': 'no drift profile'}
+            return 200, self.batcher.monitor.report()
+        if method == 'POST' and path == '/predict':
+            try:
+                values = json.loads(body)
+                proba = await self.batcher.predict(values)
+            except (ValueError, KeyError, TypeError) as e:
+                return 400, {'error': f"invalid payload: {e}"}
+            except Exception as e:
+                return 500, {'error': str(e)}
+            label = 'High' if proba >= self.threshold else 'Low'
+            return 200, {'probability': proba, 'prediction': label}
+        return 404, {'error': 'not found'}
+
+
+async def serve(host='127.0.0.1', port=8600, model_dir=MODEL_DIR, max_batch=64, window_ms=2.0):
+    model, _, preprocessor = load_artifacts(model_dir)
+    batcher = MicroBatcher(model, preprocessor, max_batch, window_ms, load_monitor(model_dir, preprocessor))
+    server = InferenceServer(batcher, decision_threshold(model_dir))
+    worker = asyncio.create_task(batcher.run())
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving on http://{host}:{port} (max_batch={max_batch}, window={window_ms}ms)", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        worker.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching inference service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--max-batch', type=int, default=64, help="Flush once this many requests are queued")
+    parser.add_argument('--window-ms', type=float, default=2.0, help="Flush this long after the first queued request")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.model_dir, args.max_batch, args.window_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
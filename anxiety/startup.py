@@ -0,0 +1,88 @@
+"""Cold-start benchmark for the Streamlit scripts.
+
+Each script (app.py and every page) is rendered headlessly with Streamlit's
+AppTest in a fresh interpreter, so every measurement pays the full import and
+load cost of a new container:
+
+    python -m anxiety.startup
+    python -m anxiety.startup --repeat 5 --json startup.json
+
+Reported per script: process wall time (interpreter start to first render
+done), the script's first run, a warm rerun in the same process and which
+heavy libraries the first render imported.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['numpy', 'pandas', 'altair', 'joblib', 'sklearn', 'xgboost']
+
+_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout={timeout})
+at.run()
+t2 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+errors = [e.value for e in at.exception]
+at.run()
+t3 = time.perf_counter()
+print(json.dumps({{'framework_s': t1 - t0, 'first_render_s': t2 - t1, 'rerun_s': t3 - t2,
+                  'heavy_imports': heavy, 'errors': errors}}))
+"""
+
+
+def scripts(root='.'):
+    return ['app.py'] + sorted(glob.glob(os.path.join(root, 'pages', '*.py')))
+
+
+def measure(path, timeout=60, env=None):
+    snippet = _SNIPPET.format(path=path, timeout=timeout, heavy=HEAVY_MODULES)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True,
+                         check=True, env=env)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result['process_s'] = time.perf_counter() - t0
+    return result
+
+
+def run(paths, repeat=3, timeout=60, env=None):
+    """Best-of-``repeat`` results per script (by process wall time)."""
+    results = {}
+    for path in paths:
+        runs = [measure(path, timeout, env) for _ in range(repeat)]
+        results[path] = min(runs, key=lambda r: r['process_s'])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time-to-first-render of app.py and each page.")
+    parser.add_argument('scripts', nargs='*', help="Scripts to measure (default: app.py and pages/*.py)")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per script (best is kept)")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--warmup', action='store_true', help="Run with APP_WARMUP=1")
+    parser.add_argument('--json', default=None, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, APP_WARMUP='1') if args.warmup else None
+    results = run(args.scripts or scripts(), args.repeat, args.timeout, env)
+
+    print(f"{'script':<32} {'process ms':>11} {'render ms':>10} {'rerun ms':>9}  heavy imports")
+    for path, r in results.items():
+        print(f"{os.path.basename(path):<32} {r['process_s'] * 1000:>11.0f} {r['first_render_s'] * 1000:>10.0f} "
+              f"{r['rerun_s'] * 1000:>9.0f}  {','.join(r['heavy_imports']) or '-'}")
+        for error in r['errors']:
+            print(f"    error: {error}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""Correlations, VIFs and group tests for the Dashboard's Statistics tab.
+
+The notebook loops over every column pair with ``pearsonr``, calls
+``variance_inflation_factor`` column by column and runs the group tests one
+group at a time. Here everything follows from two sufficient statistics of
+the filtered rows, so the in-memory frame and the out-of-core store (one
+window at a time) share the same code:
+
+* the scatter matrix of the numeric columns gives the full correlation
+  matrix. The p-value of each pair depends only on r and n: the two-sided
+  tail of t = r * sqrt((n-2) / (1-r^2)) is the regularized incomplete beta
+  I_{1-r^2}((n-2)/2, 1/2), evaluated for the whole matrix at once. The VIFs
+  are the diagonal of the inverse correlation matrix.
+* a (anxiety level, group) count table per grouping column gives each
+  group's moments for the normality check and one-way ANOVA, and the
+  average ranks of the tied levels for Kruskal-Wallis.
+
+Normality is checked with D'Agostino-Pearson's K^2 (skewness and kurtosis)
+rather than the notebook's Shapiro-Wilk, which needs every group's sorted
+sample. As in the notebook, ANOVA is reported when every group looks normal
+and Kruskal-Wallis otherwise.
+
+Time against the notebook's loops and check against scipy.stats:
+    python -m anxiety.stats data/anxiety_dataset.csv --check
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .data import DTYPES
+from .features import TARGET_COLUMN
+
+# The notebook's df.select_dtypes(['int64', 'float64']) columns, in CSV order
+STAT_COLUMNS = [col for col, dtype in DTYPES.items() if dtype != 'category']
+GROUP_TEST_COLUMNS = ['Gender', 'Occupation']
+ALPHA = 0.05
+# Smallest group the kurtosis test is valid for
+MIN_NORMALITY_N = 20
+
+
+class Accumulator:
+    """Mergeable scatter matrix and level-by-group counts of a row stream."""
+
+    def __init__(self, n_categories, columns=STAT_COLUMNS, target=TARGET_COLUMN):
+        self.columns = list(columns)
+        self.target_pos = self.columns.index(target)
+        self.n_categories = dict(n_categories)
+        self.n = 0
+        self.mean = np.zeros(len(self.columns))
+        self.scatter = np.zeros((len(self.columns), len(self.columns)))
+        # {group column: {anxiety level: counts per category code}}
+        self.tables = {col: {} for col in self.n_categories}
+
+    def update(self, numeric, codes):
+        """Add a window: numeric (rows, columns) and {group column: int codes}."""
+        X = np.asarray(numeric, dtype=np.float64)
+        m = len(X)
+        if not m:
+            return
+        mean = X.mean(axis=0)
+        centered = X - mean
+        # Pairwise merge of centered scatter matrices (Chan et al.)
+        delta = mean - self.mean
+        total = self.n + m
+        self.scatter += centered.T @ centered + np.outer(delta, delta) * (self.n * m / total)
+        self.mean += delta * (m / total)
+        self.n = total
+
+        levels, inverse = np.unique(X[:, self.target_pos], return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for col, c in codes.items():
+            k = self.n_categories[col]
+            counts = np.bincount(inverse * k + np.asarray(c, dtype=np.int64),
+                                 minlength=len(levels) * k).reshape(len(levels), k)
+            table = self.tables[col]
+            for level, row in zip(levels.tolist(), counts):
+                table[level] = table[level] + row if level in table else row
+
+    def level_table(self, col):
+        """(levels (L,), counts (L, categories)) sorted by level."""
+        table = self.tables[col]
+        levels = np.array(sorted(table), dtype=np.float64)
+        if not len(levels):
+            return levels, np.zeros((0, self.n_categories[col]), dtype=np.int64)
+        return levels, np.vstack([table[level] for level in levels.tolist()])
+
+
+def correlation_matrix(scatter):
+    """Pearson r from a scatter matrix; constant columns give NaN."""
+    d = np.sqrt(np.diag(scatter))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        R = scatter / np.outer(d, d)
+    R[:, d == 0] = np.nan
+    R[d == 0, :] = np.nan
+    np.fill_diagonal(R, np.where(d > 0, 1.0, np.nan))
+    return np.clip(R, -1.0, 1.0)
+
+
+def correlation_pvalues(R, n):
+    """Two-sided p-values of every r, like ``pearsonr`` pair by pair (diagonal 1)."""
+    from scipy.special import betainc
+
+    if n < 3:
+        return np.full(R.shape, np.nan)
+    P = betainc((n - 2) / 2.0, 0.5, np.clip(1.0 - R * R, 0.0, 1.0))
+    np.fill_diagonal(P, 1.0)
+    return P
+
+
+def vif(R):
+    """Variance inflation factors (with intercept) from one matrix inverse."""
+    ok = np.isfinite(np.diag(R))
+    out = np.full(len(R), np.nan)
+    try:
+        out[ok] = np.diag(np.linalg.inv(R[np.ix_(ok, ok)]))
+    except np.linalg.LinAlgError:
+        # Exactly collinear columns
+        out[ok] = np.inf
+    return out
+
+
+def normality_pvalues(n, m2, m3, m4):
+    """D'Agostino-Pearson K^2 p-values from group sizes and central moments.
+
+    Same statistic as ``scipy.stats.normaltest``; groups smaller than
+    MIN_NORMALITY_N or without variance give NaN.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    valid = (n >= MIN_NORMALITY_N) & (m2 > 0)
+    n = np.where(valid, n, MIN_NORMALITY_N)
+    m2 = np.where(valid, m2, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Skewness test
+        b1 = m3 / m2 ** 1.5
+        y = b1 * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+        beta2 = 3.0 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2) * (n + 5) * (n + 7) * (n + 9))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2.0 / (w2 - 1))
+        y = np.where(y == 0, 1, y)
+        z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+        # Kurtosis test
+        b2 = m4 / (m2 * m2)
+        mean = 3.0 * (n - 1) / (n + 1)
+        var = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) ** 2 * (n + 3) * (n + 5))
+        x = (b2 - mean) / np.sqrt(var)
+        root_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(
+            6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+        a = 6.0 + 8.0 / root_beta1 * (2.0 / root_beta1 + np.sqrt(1 + 4.0 / root_beta1 ** 2))
+        denom = 1 + x * np.sqrt(2 / (a - 4.0))
+        term = np.sign(denom) * np.where(denom == 0, np.nan, ((1 - 2.0 / a) / np.abs(denom)) ** (1 / 3.0))
+        z_kurt = (1 - 2 / (9.0 * a) - term) / np.sqrt(2 / (9.0 * a))
+
+    # chi2 with 2 degrees of freedom
+    return np.where(valid, np.exp(-(z_skew ** 2 + z_kurt ** 2) / 2), np.nan)
+
+
+def group_test(levels, counts, labels):
+    """Normality, ANOVA and Kruskal-Wallis of the target across groups.
+
+    ``counts`` is the (level, group) table of the filtered rows; groups
+    without rows are left out.
+    """
+    from scipy.special import betainc, gammaincc
+
+    # Groups with rows, in label order
+    present = np.flatnonzero(counts.sum(axis=0) > 0)
+    present = present[np.argsort(np.asarray(labels, dtype=str)[present], kind='stable')]
+    counts = counts[:, present].astype(np.float64)
+    labels = np.asarray(labels, dtype=object)[present]
+    sizes = counts.sum(axis=0)
+    N, k = sizes.sum(), len(sizes)
+
+    means = levels @ counts / np.maximum(sizes, 1)
+    dev = levels[:, None] - means[None, :]
+    m2, m3, m4 = ((counts * dev ** p).sum(axis=0) / np.maximum(sizes, 1) for p in (2, 3, 4))
+    normal_p = normality_pvalues(sizes, m2, m3, m4)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.sqrt(m2 * sizes / (sizes - 1))
+
+    groups = pd.DataFrame({
+        'group': labels.astype(str), 'n': sizes.astype(np.int64), 'mean': means, 'std': std,
+        'skewness': m3 / m2 ** 1.5, 'kurtosis': m4 / (m2 * m2) - 3.0, 'normality p': normal_p,
+    })
+    result = {'groups': groups, 'n': int(N), 'anova': (np.nan, np.nan), 'kruskal': (np.nan, np.nan)}
+
+    if k >= 2 and N > k:
+        # One-way ANOVA
+        grand = levels @ counts.sum(axis=1) / N
+        between = (sizes * (means - grand) ** 2).sum()
+        within = (sizes * m2).sum()
+        d1, d2 = k - 1, N - k
+        with np.errstate(divide='ignore', invalid='ignore'):
+            F = (between / d1) / (within / d2)
+        p_anova = betainc(d2 / 2.0, d1 / 2.0, d2 / (d2 + d1 * F)) if np.isfinite(F) else np.nan
+        result['anova'] = (float(F), float(p_anova))
+
+        # Kruskal-Wallis: each level's rows share the average of their ranks
+        ties = counts.sum(axis=1)
+        ranks = np.cumsum(ties) - (ties - 1) / 2.0
+        rank_sums = ranks @ counts
+        H = 12.0 / (N * (N + 1)) * (rank_sums ** 2 / sizes).sum() - 3 * (N + 1)
+        correction = 1 - (ties ** 3 - ties).sum() / (N ** 3 - N)
+        if correction > 0:
+            H /= correction
+            result['kruskal'] = (float(H), float(gammaincc(d1 / 2.0, H / 2.0)))
+
+    tested = normal_p[~np.isnan(normal_p)]
+    result['normal'] = bool(len(tested) == k and (tested >= ALPHA).all())
+    result['test'] = 'ANOVA' if result['normal'] else 'Kruskal-Wallis'
+    result['statistic'], result['p'] = result['anova'] if result['normal'] else result['kruskal']
+    return result
+
+
+def summarize(acc, labels):
+    """Tables for the Statistics tab from an Accumulator.
+
+    ``labels`` maps each grouping column to its category names by code.
+    """
+    R = correlation_matrix(acc.scatter)
+    P = correlation_pvalues(R, acc.n)
+    columns = acc.columns
+    i, j = np.tril_indices(len(columns), -1)
+    return {
+        'n': acc.n,
+        'correlation': pd.DataFrame(R, index=columns, columns=columns),
+        'pvalues': pd.DataFrame(P, index=columns, columns=columns),
+        # Lower triangle in long form for the heatmap
+        'pairs': pd.DataFrame({'x': np.array(columns)[j], 'y': np.array(columns)[i],
+                               'r': R[i, j], 'p': P[i, j], 'stars': significance_stars(P[i, j])}),
+        'vif': pd.DataFrame({'feature': columns, 'VIF': vif(R)}),
+        'group_tests': {col: group_test(*acc.level_table(col), labels[col]) for col in acc.tables},
+    }
+
+
+def significance_stars(p):
+    p = np.asarray(p)
+    return np.select([p < 0.001, p < 0.01, p < ALPHA], ['***', '**', '*'], '')
+
+
+def frame_statistics(df, columns=STAT_COLUMNS, group_columns=GROUP_TEST_COLUMNS):
+    """Statistics of an (already filtered) dataset frame."""
+    cats = {col: df[col].cat.categories for col in group_columns}
+    acc = Accumulator({col: len(cats[col]) for col in group_columns}, columns)
+    codes = {col: df[col].cat.codes.to_numpy() for col in group_columns}
+    acc.update(df[columns].to_numpy(dtype=np.float64), codes)
+    return summarize(acc, {col: list(cats[col]) for col in group_columns})
+
+
+def _loop_statistics(df, columns, group_columns):
+    """The notebook's pair-by-pair and group-by-group version (for timing)."""
+    from scipy import stats
+
+    num = df[columns].astype(np.float64)
+    pvalues = np.ones((len(columns), len(columns)))
+    for a, row in enumerate(columns):
+        for b, col in enumerate(columns):
+            if row != col:
+                pvalues[a, b] = stats.pearsonr(num[row], num[col])[1]
+    X = np.column_stack([np.ones(len(num)), num.to_numpy()])
+    vifs = []
+    for i in range(1, X.shape[1]):
+        others = np.delete(X, i, axis=1)
+        fitted = others @ np.linalg.lstsq(others, X[:, i], rcond=None)[0]
+        r2 = 1 - ((X[:, i] - fitted) ** 2).sum() / ((X[:, i] - X[:, i].mean()) ** 2).sum()
+        vifs.append(1 / (1 - r2))
+    tests = {}
+    for col in group_columns:
+        samples = [g.to_numpy(dtype=np.float64) for _, g in df.groupby(col, observed=True)[TARGET_COLUMN]]
+        tests[col] = ([stats.normaltest(s).pvalue for s in samples], stats.f_oneway(*samples),
+                      stats.kruskal(*samples))
+    return pvalues, np.array(vifs), tests
+
+
+def main(argv=None):
+    from .data import read_dataset
+
+    parser = argparse.ArgumentParser(description="Correlation, VIF and group-test tables for a survey CSV.")
+    parser.add_argument('input')
+    parser.add_argument('--check', action='store_true', help="Compare with the scipy.stats loops")
+    parser.add_argument('--tolerance', type=float, default=1e-8)
+    args = parser.parse_args(argv)
+
+    df = read_dataset(args.input)
+    # Timings below exclude the one-off scipy imports
+    import scipy.special  # noqa: F401
+    import scipy.stats  # noqa: F401
+    t0 = time.perf_counter()
+    result = frame_statistics(df)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{result['n']:,} rows, {len(STAT_COLUMNS)} numeric columns: {elapsed * 1000:.1f} ms")
+    print(result['vif'].to_string(index=False, float_format='{:.3f}'.format))
+    for col, test in result['group_tests'].items():
+        print(f"{col}: {test['test']} statistic={test['statistic']:.4f} p={test['p']:.4f}")
+
+    if args.check:
+        t0 = time.perf_counter()
+        pvalues, vifs, tests = _loop_statistics(df, STAT_COLUMNS, GROUP_TEST_COLUMNS)
+        loops = time.perf_counter() - t0
+        gaps = [np.nanmax(np.abs(pvalues - result['pvalues'].to_numpy())),
+                np.nanmax(np.abs(vifs - result['vif']['VIF'].to_numpy()) / vifs)]
+        for col, (normal, anova, kruskal) in tests.items():
+            test = result['group_tests'][col]
+            gaps += [np.nanmax(np.abs(np.array(normal) - test['groups']['normality p'].to_numpy())),
+                     abs(anova.pvalue - test['anova'][1]), abs(kruskal.pvalue - test['kruskal'][1]),
+                     abs(kruskal.statistic - test['kruskal'][0]) / kruskal.statistic]
+        print(f"Loops: {loops * 1000:.1f} ms ({loops / elapsed:.0f}x slower), max difference {max(gaps):.2e}")
+        if max(gaps) > args.tolerance:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,442 @@
+"""Out-of-core columnar store for survey archives larger than RAM.
+
+``build`` converts a CSV (same columns as data/anxiety_dataset.csv) into one
+raw binary file per column plus a JSON manifest. Text columns are stored as
+int16 codes into the manifest's category list, numbers in the compact dtypes
+of ``anxiety.data.DTYPES``. ``ColumnStore`` maps those files window by
+window, so every Dashboard view is computed in a streaming pass whose memory
+depends on the chunk size, not on the number of rows.
+
+    python -m anxiety.store build data/anxiety_dataset.csv data/anxiety_store
+    python -m anxiety.store verify data/anxiety_dataset.csv data/anxiety_store
+
+``verify`` compares the streamed views with the in-memory Dashboard path and
+reports peak RSS. Everything but the regression lines must match exactly;
+the lines are fitted from float sums taken window by window, which round
+differently from one whole-array sum, so they are compared to ``LINE_RTOL``.
+
+New rows are appended with ``python -m anxiety.ingest``, which also keeps the
+running aggregates that ``StoreSource`` uses for counts, means and group
+tables.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import aggregates as agg
+from . import metrics
+from . import stats
+from .dashboard import CATEGORY_COLUMNS, CONTROLS, SUMMARY_COLUMNS, TREND_COLUMNS
+from .data import DTYPES, file_hash
+from .filters import ALL, FILTER_COLUMNS
+
+STORE_DIR = os.path.join('data', 'anxiety_store')
+MANIFEST = 'manifest.json'
+STORE_VERSION = 1
+CHUNK_ROWS = 1_000_000
+# Relative tolerance of streamed vs in-memory regression lines (see verify)
+LINE_RTOL = 1e-9
+
+GROUP_COLUMNS = ['Gender', 'Occupation'] + CATEGORY_COLUMNS
+
+
+def _file_name(i):
+    return f'col{i:02d}.bin'
+
+
+def build(csv_path, store_dir=STORE_DIR, chunk_rows=CHUNK_ROWS):
+    """Convert ``csv_path`` into a column store, streaming ``chunk_rows`` rows at a time.
+
+    Empty cells raise ValueError. The manifest is written last, so a failed
+    build leaves no store that can be opened.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest_path = os.path.join(store_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    names = list(DTYPES)
+    categories = {col: {} for col in names if DTYPES[col] == 'category'}
+    read_dtypes = {col: (str if col in categories else dtype) for col, dtype in DTYPES.items()}
+    bounds = {}
+    n_rows = 0
+
+    files = [open(os.path.join(store_dir, _file_name(i)), 'wb') for i in range(len(names))]
+    try:
+        for chunk in pd.read_csv(csv_path, dtype=read_dtypes, chunksize=chunk_rows):
+            for i, col in enumerate(names):
+                if col in categories:
+                    local_codes, uniques = pd.factorize(chunk[col])
+                    _reject_empty(col, local_codes < 0, n_rows)
+                    mapping = categories[col]
+                    lookup = np.array([mapping.setdefault(u, len(mapping)) for u in uniques], dtype=np.int16)
+                    values = lookup[local_codes]
+                else:
+                    values = chunk[col].to_numpy()
+                    if values.dtype.kind == 'f':
+                        _reject_empty(col, np.isnan(values), n_rows)
+                    lo, hi = values.min(), values.max()
+                    old = bounds.get(col)
+                    bounds[col] = (lo, hi) if old is None else (min(old[0], lo), max(old[1], hi))
+                files[i].write(np.ascontiguousarray(values).tobytes())
+            n_rows += len(chunk)
+    finally:
+        for f in files:
+            f.close()
+
+    columns = []
+    for i, col in enumerate(names):
+        entry = {'name': col, 'file': _file_name(i)}
+        if col in categories:
+            entry['dtype'] = 'int16'
+            entry['categories'] = list(categories[col])
+        else:
+            entry['dtype'] = DTYPES[col]
+            entry['min'], entry['max'] = (float(v) for v in bounds.get(col, (0, 0)))
+        columns.append(entry)
+
+    manifest = {
+        'version': STORE_VERSION,
+        'n_rows': n_rows,
+        'source': {'path': os.path.abspath(csv_path), 'sha256': file_hash(csv_path)},
+        'columns': columns,
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return ColumnStore(store_dir)
+
+
+def _reject_empty(col, empty, offset):
+    if empty.any():
+        raise ValueError(f"{col}: {empty.sum()} empty values (first at row {offset + np.flatnonzero(empty)[0]})")
+
+
+class ColumnStore:
+    def __init__(self, store_dir=STORE_DIR, chunk_rows=CHUNK_ROWS):
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported store version: {self.manifest.get('version')}")
+        self.store_dir = store_dir
+        self.chunk_rows = chunk_rows
+        self.n_rows = self.manifest['n_rows']
+        self.columns = {c['name']: c for c in self.manifest['columns']}
+        # Appends (``anxiety.ingest``) bump the revision
+        self.signature = (os.path.abspath(store_dir), self.manifest['source']['sha256'],
+                          self.manifest.get('revision', 0))
+        self.manifest_mtime = os.stat(os.path.join(store_dir, MANIFEST)).st_mtime_ns
+
+        # Filter options sorted like FilterIndex.options, and the code of each option
+        self.options = {}
+        self.option_codes = {}
+        for control, col in FILTER_COLUMNS.items():
+            cats = self.columns[col]['categories']
+            self.options[control] = sorted(cats)
+            self.option_codes[control] = {value: cats.index(value) for value in cats}
+
+    def chunks(self, columns):
+        """Yield {column: array} windows of at most ``chunk_rows`` rows.
+
+        Each window is mapped, copied and unmapped again, so resident memory
+        stays at one window per column however large the files are.
+        """
+        for start in range(0, self.n_rows, self.chunk_rows):
+            n = min(self.chunk_rows, self.n_rows - start)
+            window = {}
+            for col in columns:
+                meta = self.columns[col]
+                dtype = np.dtype(meta['dtype'])
+                mm = np.memmap(os.path.join(self.store_dir, meta['file']), dtype=dtype, mode='r',
+                               offset=start * dtype.itemsize, shape=(n,))
+                window[col] = np.array(mm)
+                del mm
+            yield window
+
+    def _mask(self, window, state):
+        age = window['Age']
+        mask = (age >= state[0][0]) & (age <= state[0][1])
+        for control, value in zip(CONTROLS, state[1:]):
+            if value == ALL:
+                continue
+            code = self.option_codes[control].get(value)
+            if code is None:
+                return np.zeros(len(age), dtype=bool)
+            mask &= window[FILTER_COLUMNS[control]] == code
+        return mask
+
+    def _group_table(self, col, counts, sums=None):
+        cats = np.array(self.columns[col]['categories'], dtype=object)
+        present = np.flatnonzero(counts)
+        order = present[np.argsort(cats[present].astype(str), kind='stable')]
+        if sums is None:
+            return pd.DataFrame({col: cats[order].astype(str), 'count': counts[order]})
+        return pd.DataFrame({col: cats[order].astype(str), 'mean': sums[order] / counts[order]})
+
+    def changed(self):
+        """True once the manifest on disk is newer than the one this store was opened with."""
+        return os.stat(os.path.join(self.store_dir, MANIFEST)).st_mtime_ns != self.manifest_mtime
+
+    def compute_view(self, state, threshold=agg.TREND_THRESHOLD, mode=agg.TREND_MODE,
+                     sample_size=agg.TREND_SAMPLE_SIZE, totals=None):
+        """Same view as ``dashboard.compute_view`` for a filter state, in streaming passes.
+
+        ``totals`` is the state's count, summary, histogram and group tables
+        from the running aggregates (``anxiety.ingest``); the pass then reads
+        only the trend and filter columns.
+        """
+        target = agg.TARGET
+        if totals is None:
+            columns = list(DTYPES)
+        else:
+            columns = list(dict.fromkeys(TREND_COLUMNS + [target] + list(FILTER_COLUMNS.values())))
+        count = 0
+        summary = dict.fromkeys(SUMMARY_COLUMNS, 0.0)
+        levels = {}
+        groups = {col: (np.zeros(len(self.columns[col]['categories']), dtype=np.int64),
+                        np.zeros(len(self.columns[col]['categories']), dtype=np.float64))
+                  for col in GROUP_COLUMNS}
+        moments = {col: np.array([0.0, 0.0, 0.0, 0.0, np.inf, -np.inf]) for col in TREND_COLUMNS}
+        points = []
+
+        for window in self.chunks(columns):
+            mask = self._mask(window, state)
+            if not mask.any():
+                continue
+            w = {col: window[col][mask] for col in columns}
+            count += len(w[target])
+            y = w[target].astype(np.float64)
+            if totals is None:
+                for col in SUMMARY_COLUMNS:
+                    summary[col] += w[col].astype(np.float64).sum()
+                for value, n in zip(*np.unique(w[target], return_counts=True)):
+                    levels[value] = levels.get(value, 0) + int(n)
+                for col in GROUP_COLUMNS:
+                    n_cats = len(groups[col][0])
+                    groups[col][0][:] += np.bincount(w[col], minlength=n_cats)
+                    groups[col][1][:] += np.bincount(w[col], weights=y, minlength=n_cats)
+            for col in TREND_COLUMNS:
+                x = w[col].astype(np.float64)
+                m = moments[col]
+                m[:4] += (x.sum(), y.sum(), (x * x).sum(), (x * y).sum())
+                m[4], m[5] = min(m[4], x.min()), max(m[5], x.max())
+            # Raw points are only kept while the view stays in 'points' mode
+            if count <= threshold:
+                points.append({col: w[col] for col in TREND_COLUMNS + [target]})
+            else:
+                points = None
+
+        if totals is not None:
+            view = dict(totals)
+            level_values = totals['histogram'][target].to_numpy()
+            level_counts = totals['histogram']['count'].to_numpy()
+        else:
+            view = {
+                'count': count,
+                'summary': {col: summary[col] / count if count else float('nan') for col in SUMMARY_COLUMNS},
+                'rows': None,
+            }
+            level_values = np.array(sorted(levels), dtype=np.dtype(DTYPES[target]))
+            level_counts = np.array([levels[v] for v in level_values], dtype=np.int64)
+            view['histogram'] = pd.DataFrame({target: level_values, 'count': level_counts})
+            view['gender_counts'] = self._group_table('Gender', groups['Gender'][0])
+            view['gender_means'] = self._group_table('Gender', *groups['Gender'])
+            view['occupation_means'] = self._group_table('Occupation', *groups['Occupation'])
+            view['category_means'] = {col: self._group_table(col, *groups[col]) for col in CATEGORY_COLUMNS}
+
+        lines = {col: agg.line_from_moments(col, count, *moments[col][:4], *moments[col][4:])
+                 for col in TREND_COLUMNS}
+        if count <= threshold:
+            frame = _concat(points, TREND_COLUMNS + [target])
+            trend_mode, tables = 'points', {col: agg.distinct_points(frame, col) for col in TREND_COLUMNS}
+        elif mode == 'sample':
+            frame = self._sample(state, level_values, level_counts, sample_size)
+            trend_mode, tables = 'sample', {col: agg.distinct_points(frame, col) for col in TREND_COLUMNS}
+        elif mode == 'density':
+            trend_mode, tables = 'density', self._density(state, moments, level_values)
+        else:
+            raise ValueError(f"Unknown trend mode: {mode!r}")
+        view['trends'] = {col: (trend_mode, tables[col], lines[col]) for col in TREND_COLUMNS}
+        return view
+
+    def statistics(self, state):
+        """Same tables as ``stats.frame_statistics`` for a filter state, in one streaming pass."""
+        groups = stats.GROUP_TEST_COLUMNS
+        acc = stats.Accumulator({col: len(self.columns[col]['categories']) for col in groups})
+        needed = list(dict.fromkeys(['Age'] + list(FILTER_COLUMNS.values()) + stats.STAT_COLUMNS + groups))
+        for window in self.chunks(needed):
+            mask = self._mask(window, state)
+            if mask.any():
+                acc.update(np.column_stack([window[col][mask] for col in stats.STAT_COLUMNS]),
+                           {col: window[col][mask] for col in groups})
+        return stats.summarize(acc, {col: self.columns[col]['categories'] for col in groups})
+
+    def _density(self, state, moments, level_values):
+        edges = {col: agg.grid_edges(moments[col][4], moments[col][5], level_values[0], level_values[-1])
+                 for col in TREND_COLUMNS}
+        grids = {col: 0 for col in TREND_COLUMNS}
+        for window in self.chunks(TREND_COLUMNS + list(FILTER_COLUMNS.values()) + [agg.TARGET]):
+            mask = self._mask(window, state)
+            y = window[agg.TARGET][mask].astype(np.float64)
+            for col in TREND_COLUMNS:
+                counts, _, _ = np.histogram2d(window[col][mask].astype(np.float64), y, bins=edges[col])
+                grids[col] = grids[col] + counts
+        return {col: agg.grid_table(grids[col], *edges[col]) for col in TREND_COLUMNS}
+
+    def _sample(self, state, level_values, level_counts, size):
+        """Stream the rows ``agg.stratified_sample`` would pick (same seed, same draws)."""
+        if level_counts.sum() <= size:
+            chosen = [np.arange(n) for n in level_counts]
+        else:
+            rng = np.random.default_rng(0)
+            chosen = [np.sort(rng.choice(n, size=k, replace=False))
+                      for n, k in zip(level_counts, agg.sample_quotas(level_counts, size))]
+        seen = np.zeros(len(level_values), dtype=np.int64)
+        picked = []
+        for window in self.chunks(TREND_COLUMNS + list(FILTER_COLUMNS.values()) + [agg.TARGET]):
+            mask = self._mask(window, state)
+            codes = np.searchsorted(level_values, window[agg.TARGET][mask])
+            keep = np.zeros(len(codes), dtype=bool)
+            for code in range(len(level_values)):
+                members = np.flatnonzero(codes == code)
+                ranks = seen[code] + np.arange(len(members))
+                keep[members[np.isin(ranks, chosen[code])]] = True
+                seen[code] += len(members)
+            picked.append({col: window[col][mask][keep] for col in TREND_COLUMNS + [agg.TARGET]})
+        return _concat(picked, TREND_COLUMNS + [agg.TARGET])
+
+
+def _concat(parts, columns):
+    return pd.DataFrame({
+        col: np.concatenate([p[col] for p in parts]) if parts else np.array([])
+        for col in columns
+    })
+
+
+class StoreSource:
+    """Dashboard view source backed by a ColumnStore (see dashboard.FrameSource)."""
+
+    supports_narrowing = False
+
+    def __init__(self, store):
+        self.store = store
+        self.signature = store.signature
+        self.options = store.options
+        self._aggregates = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reopen the store after an ingest appended rows (cheap ``stat`` otherwise)."""
+        if self.store.changed():
+            with self._lock:
+                if self.store.changed():
+                    store = ColumnStore(self.store.store_dir, self.store.chunk_rows)
+                    self.store, self.signature, self.options = store, store.signature, store.options
+                    self._aggregates = None
+
+    def aggregates(self):
+        """Running aggregates of the current store revision."""
+        with self._lock:
+            if self._aggregates is None:
+                from .ingest import load_aggregates
+                self._aggregates = load_aggregates(self.store)
+            return self._aggregates
+
+    def compute(self, state, parent=None):
+        # Counts, means and group tables come from the aggregates when they cover the state
+        totals = self.aggregates().view(state)
+        metrics.count('store.aggregates.hit' if totals is not None else 'store.aggregates.miss')
+        with metrics.span('store.scan'):
+            return self.store.compute_view(state, totals=totals)
+
+    def statistics(self, state, view):
+        with metrics.span('store.scan'):
+            return self.store.statistics(state)
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def _frames_equal(a, b):
+    if isinstance(a, pd.DataFrame):
+        a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+        return list(a.columns) == list(b.columns) and len(a) == len(b) and all(
+            np.array_equal(a[c].to_numpy(), b[c].to_numpy()) for c in a.columns
+        )
+    if isinstance(a, tuple):
+        return all(_frames_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_frames_equal(a[k], b[k]) for k in a)
+    return a == b or (a != a and b != b)
+
+
+def _trends_match(a, b, rtol=LINE_RTOL):
+    """Same trend modes and point tables, and regression lines within ``rtol``."""
+    def lines_close(x, y):
+        return list(x.columns) == list(y.columns) and len(x) == len(y) and all(
+            np.allclose(x[c].to_numpy(), y[c].to_numpy(), rtol=rtol, atol=0) for c in x.columns
+        )
+
+    return a.keys() == b.keys() and all(
+        a[col][0] == b[col][0] and _frames_equal(a[col][1], b[col][1]) and lines_close(a[col][2], b[col][2])
+        for col in a
+    )
+
+
+def verify(csv_path, store_dir=STORE_DIR, chunk_rows=CHUNK_ROWS):
+    """Compare streamed and in-memory views for a few filter states; return mismatches."""
+    from .dashboard import FrameSource, filter_state
+    from .data import read_dataset
+    from .filters import FilterIndex
+
+    df = read_dataset(csv_path)
+    memory = FrameSource(df, FilterIndex(df))
+    store = ColumnStore(store_dir, chunk_rows)
+    states = [
+        filter_state((18, 64), ALL, ALL, ALL, ALL, ALL, ALL, ALL),
+        filter_state((25, 40), ALL, ALL, ALL, ALL, ALL, ALL, ALL),
+        filter_state((18, 64), 'Female', ALL, 'Yes', ALL, ALL, ALL, ALL),
+        filter_state((30, 50), 'Male', 'Doctor', ALL, 'No', ALL, 'Yes', ALL),
+    ]
+    mismatches = []
+    for state in states:
+        expected = memory.compute(state)
+        actual = store.compute_view(state)
+        for key in expected:
+            if key in ('rows', 'elapsed'):
+                continue
+            match = _trends_match if key == 'trends' else _frames_equal
+            if not match(expected[key], actual[key]):
+                mismatches.append((state, key))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or verify the out-of-core column store.")
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('csv')
+    parser.add_argument('store', nargs='?', default=STORE_DIR)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        store = build(args.csv, args.store, args.chunk_rows)
+        print(f"Stored {store.n_rows:,} rows in {args.store} (peak RSS {_peak_rss_mb():.0f} MB)")
+        return
+    mismatches = verify(args.csv, args.store, args.chunk_rows)
+    for state, key in mismatches:
+        print(f"Mismatch in {key!r} for {state}")
+    print(f"{'OK' if not mismatches else 'FAILED'} (peak RSS {_peak_rss_mb():.0f} MB)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Reproducible training pipeline (the notebook's modelling section as a CLI).
+
+    python -m anxiety.train --n-jobs -1
+    python -m anxiety.train --search halving --early-stopping 20
+
+Runs the notebook's steps in order: split, label encoding, per-column
+MinMaxScalers, the five recall-scored CV searches and evaluation. It then
+writes model/best_xgb.pkl and model/preprocess.pkl in the format the app
+loads, plus the NumPy tree export, the model bundle (model/bundle/), the
+permutation importance / PDP curves of the test split
+(model/insights.json) and the drift reference profile of the training
+split (model/drift_profile.json). The feature matrices are built once as
+contiguous float64 arrays and shared by every search. joblib memory-maps
+them into the worker processes instead of copying them per fit. Wall-clock
+time per stage is printed at the end.
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .features import (BINARY_COLS, DROPPED_COLS, ENCODER_KEYS, FEATURE_ORDER,
+                       NUMERICAL_COLS, SCALER_KEYS, TARGET_COLUMN, TARGET_THRESHOLD)
+from .model import BUNDLE_DIR, MODEL_DIR, MODEL_FILE, PREPROCESS_FILE, TREES_FILE
+
+DATA_PATH = os.path.join('data', 'anxiety_dataset.csv')
+
+# Same estimators and grids as the notebook
+SEARCHES = {
+    'lr': ('Logistic Regression', {'C': [0.01, 0.1, 1, 10, 100], 'penalty': ['l1', 'l2']}),
+    'knn': ('KNN', {'n_neighbors': [3, 5, 7, 9], 'weights': ['uniform', 'distance']}),
+    'dt': ('Decision Tree', {'max_depth': [None, 3, 5, 7], 'min_samples_leaf': [1, 5, 10]}),
+    'rf': ('Random Forest', {'n_estimators': [10, 20, 30, 40, 50, 100, 150],
+                             'max_depth': [None, 5, 10], 'min_samples_leaf': [1, 5]}),
+    'xgb': ('XGBoost', {'n_estimators': [10, 50, 100], 'max_depth': [2, 4, 6],
+                        'learning_rate': [0.01, 0.1, 0.2]}),
+}
+
+
+def _estimator(key):
+    if key == 'lr':
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(solver='liblinear', random_state=42)
+    if key == 'knn':
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier()
+    if key == 'dt':
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(random_state=42)
+    if key == 'rf':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(random_state=42)
+    if key == 'xgb':
+        import xgboost as xgb
+        # One thread per fit: the search already runs fits in parallel
+        return xgb.XGBClassifier(eval_metric='logloss', random_state=42, n_jobs=1)
+    raise ValueError(f"Unknown model: {key}")
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        yield
+        self.stages.append((name, time.perf_counter() - t0))
+        print(f"[{self.stages[-1][1]:8.2f}s] {name}", flush=True)
+
+    def report(self):
+        total = sum(t for _, t in self.stages)
+        print("\n=== Wall-clock per stage ===")
+        for name, t in self.stages:
+            print(f"{name:<40} {t:8.2f}s")
+        print(f"{'Total':<40} {total:8.2f}s")
+
+
+def prepare(df):
+    """Split, encode and scale exactly like the notebook.
+
+    Returns (X_train, X_test, y_train, y_test, preprocessing_objects), with
+    X as C-contiguous float64 arrays in FEATURE_ORDER.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df.drop(columns=TARGET_COLUMN), df[TARGET_COLUMN],
+        test_size=0.2, random_state=11, stratify=df[TARGET_COLUMN],
+    )
+    X_train = X_train.drop(columns=DROPPED_COLS)
+    X_test = X_test.drop(columns=DROPPED_COLS)
+
+    label_encoders = {}
+    for col in BINARY_COLS:
+        le = LabelEncoder().fit(['No', 'Yes'])
+        X_train[col] = le.transform(X_train[col].astype(str))
+        X_test[col] = le.transform(X_test[col].astype(str))
+        label_encoders[ENCODER_KEYS[col]] = le
+
+    scalers = {}
+    for col in NUMERICAL_COLS:
+        scaler = MinMaxScaler()
+        X_train[col] = scaler.fit_transform(X_train[[col]])
+        X_test[col] = scaler.transform(X_test[[col]])
+        scalers[SCALER_KEYS[col]] = scaler
+
+    def matrix(frame):
+        return np.ascontiguousarray(frame[FEATURE_ORDER].to_numpy(dtype=np.float64))
+
+    y_train = (y_train.to_numpy() >= TARGET_THRESHOLD).astype(np.int64)
+    y_test = (y_test.to_numpy() >= TARGET_THRESHOLD).astype(np.int64)
+    preprocess = {'scalers': scalers, 'label_encoders': label_encoders}
+    return matrix(X_train), matrix(X_test), y_train, y_test, preprocess
+
+
+def search(key, X, y, n_jobs=None, method='grid'):
+    name, grid = SEARCHES[key]
+    if method == 'halving':
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+        gs = HalvingGridSearchCV(_estimator(key), grid, cv=5, scoring='recall',
+                                 n_jobs=n_jobs, random_state=42)
+    else:
+        from sklearn.model_selection import GridSearchCV
+        gs = GridSearchCV(_estimator(key), grid, cv=5, scoring='recall', n_jobs=n_jobs)
+    gs.fit(X, y)
+    return gs
+
+
+def refit_xgb_early_stopping(params, X, y, rounds):
+    """Refit XGBoost with up to 10x the searched trees, stopping on a held-out 10% of train."""
+    from sklearn.model_selection import train_test_split
+
+    X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=0.1, random_state=42, stratify=y)
+    model = _estimator('xgb')
+    model.set_params(**params)
+    model.set_params(n_estimators=params.get('n_estimators', 100) * 10,
+                     early_stopping_rounds=rounds, n_jobs=-1)
+    model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    return model
+
+
+def evaluate(models, X_train, X_test, y_train, y_test):
+    from sklearn.metrics import (average_precision_score, f1_score, precision_score,
+                                 recall_score, roc_auc_score)
+    rows = []
+    for name, model in models:
+        row = {'Model': name}
+        for split, X, y in (('Train', X_train, y_train), ('Test', X_test, y_test)):
+            pred = model.predict(X)
+            prob = model.predict_proba(X)[:, 1]
+            row[f'{split} Precision'] = precision_score(y, pred, pos_label=1)
+            row[f'{split} Recall'] = recall_score(y, pred, pos_label=1)
+            row[f'{split} F1-score'] = f1_score(y, pred, pos_label=1)
+            row[f'{split} ROC AUC'] = roc_auc_score(y, prob)
+            row[f'{split} Avg Precision'] = average_precision_score(y, prob)
+        row['Recall Gap (Train - Test)'] = row['Train Recall'] - row['Test Recall']
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('Model').round(3)
+
+
+def run(data_path=DATA_PATH, model_dir=MODEL_DIR, models=tuple(SEARCHES), n_jobs=-1,
+        method='grid', early_stopping=None, export=True):
+    timer = StageTimer()
+    with timer.stage("Load dataset"):
+        df = pd.read_csv(data_path)
+    with timer.stage("Split / encode / scale"):
+        X_train, X_test, y_train, y_test, preprocess = prepare(df)
+
+    fitted = []
+    best_xgb = None
+    for key in models:
+        name = SEARCHES[key][0]
+        with timer.stage(f"{method.title()} search: {name}"):
+            gs = search(key, X_train, y_train, n_jobs=n_jobs, method=method)
+        print(f"    best {gs.best_params_} recall={gs.best_score_:.3f}")
+        best = gs.best_estimator_
+        if key == 'xgb':
+            if early_stopping:
+                with timer.stage("XGBoost early-stopping refit"):
+                    best = refit_xgb_early_stopping(gs.best_params_, X_train, y_train, early_stopping)
+                print(f"    stopped at {best.best_iteration + 1} trees")
+            best_xgb = best
+        fitted.append((name, best))
+
+    with timer.stage("Evaluate"):
+        print(evaluate(fitted, X_train, X_test, y_train, y_test).to_string())
+
+    if export and best_xgb is not None:
+        with timer.stage("Export artifacts"):
+            os.makedirs(model_dir, exist_ok=True)
+            joblib.dump(best_xgb, os.path.join(model_dir, MODEL_FILE))
+            joblib.dump(preprocess, os.path.join(model_dir, PREPROCESS_FILE))
+            from .trees import TreeEnsemble, export_trees
+            TreeEnsemble(export_trees(best_xgb)).save(os.path.join(model_dir, TREES_FILE))
+            from .bundle import write_bundle
+            from .preprocessing import compile_preprocess
+            write_bundle(os.path.join(model_dir, BUNDLE_DIR), compile_preprocess(preprocess), best_xgb)
+        with timer.stage("Model insights (importance + PDP)"):
+            from .insights import compute_insights, write_insights
+            workers = None if n_jobs is None or n_jobs < 0 else n_jobs
+            write_insights(compute_insights(X_test, y_test, model_dir, workers), model_dir)
+        with timer.stage("Drift reference profile"):
+            from .drift import build_profile, write_profile
+            write_profile(build_profile(X_train, compile_preprocess(preprocess)), model_dir)
+    timer.report()
+    return fitted, preprocess
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the anxiety models and export the app artifacts.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--models', default=','.join(SEARCHES),
+                        help=f"Comma-separated subset of {','.join(SEARCHES)}")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel CV fits (-1: all cores)")
+    parser.add_argument('--search', choices=['grid', 'halving'], default='grid',
+                        help="Exhaustive grid search or successive halving")
+    parser.add_argument('--early-stopping', type=int, default=None, metavar='ROUNDS',
+                        help="Refit the best XGBoost with early stopping on a validation split")
+    parser.add_argument('--no-export', action='store_true', help="Do not write the model/ artifacts")
+    args = parser.parse_args(argv)
+    run(args.data, args.model_dir, args.models.split(','), args.n_jobs, args.search,
+        args.early_stopping, not args.no_export)
+
+
+if __name__ == '__main__':
+    main()
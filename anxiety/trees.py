@@ -0,0 +1,210 @@
+"""Pure-NumPy evaluator for the trained XGBoost trees.
+
+The booster in best_xgb.pkl is flattened once into a handful of arrays
+(feature index, threshold, left/right child, default direction, leaf value
+and cover per node), which are all that is needed to score and explain a row.
+Loading them does not import xgboost and a single prediction is a few array
+lookups per tree level instead of a DMatrix round-trip.
+
+Export (requires xgboost) and check parity against the booster:
+    python -m anxiety.trees --check data/anxiety_dataset.csv
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+# Rows per block in the batch path, bounds the (rows, trees) node matrix
+BLOCK_ROWS = 8192
+
+
+def _base_margin(learner):
+    # base_score is stored in probability space, e.g. "5E-1" or "[5E-1]" (xgboost >= 3)
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"Unsupported objective: {objective}")
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def _depth(left, right):
+    depth, level = 0, [0]
+    while level:
+        depth += 1
+        level = [c for n in level for c in (left[n], right[n]) if c != -1]
+    return depth - 1
+
+
+def export_trees(booster):
+    """Flatten an xgboost Booster (or XGBClassifier) into a dict of arrays."""
+    if hasattr(booster, 'get_booster'):
+        booster = booster.get_booster()
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+    trees = learner['gradient_booster']['model']['trees']
+    # Early-stopped models predict with the trees up to the best round only
+    best_iteration = learner.get('attributes', {}).get('best_iteration')
+    if best_iteration is not None:
+        trees = trees[:int(best_iteration) + 1]
+
+    feature, threshold, left, right, default_left, value, cover, roots = [], [], [], [], [], [], [], []
+    depth = 0
+    offset = 0
+    for tree in trees:
+        lc = tree['left_children']
+        rc = tree['right_children']
+        n = len(lc)
+        roots.append(offset)
+        # Training hessian sum per node, used by the TreeSHAP explainer
+        cover.extend(tree['sum_hessian'])
+        for i in range(n):
+            if lc[i] == -1:
+                # Leaves point at themselves so extra walking steps are no-ops
+                feature.append(0)
+                threshold.append(0.0)
+                left.append(offset + i)
+                right.append(offset + i)
+                default_left.append(True)
+                value.append(tree['split_conditions'][i])
+            else:
+                feature.append(tree['split_indices'][i])
+                threshold.append(tree['split_conditions'][i])
+                left.append(offset + lc[i])
+                right.append(offset + rc[i])
+                default_left.append(bool(tree['default_left'][i]))
+                value.append(0.0)
+        depth = max(depth, _depth(lc, rc))
+        offset += n
+
+    return {
+        'feature': np.asarray(feature, dtype=np.int32),
+        'threshold': np.asarray(threshold, dtype=np.float32),
+        'left': np.asarray(left, dtype=np.int32),
+        'right': np.asarray(right, dtype=np.int32),
+        'default_left': np.asarray(default_left, dtype=bool),
+        'value': np.asarray(value, dtype=np.float32),
+        'cover': np.asarray(cover, dtype=np.float32),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'depth': np.int32(depth),
+        'base_margin': np.float64(_base_margin(learner)),
+        'num_features': np.int32(int(learner['learner_model_param']['num_feature'])),
+    }
+
+
+class TreeEnsemble:
+    """Scores float32 feature rows with the flattened trees.
+
+    Mirrors ``XGBClassifier.predict_proba`` so it can stand in for the model
+    object returned by ``load_artifacts``.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.default_left = arrays['default_left']
+        self.value = arrays['value']
+        # Exports written before covers were added have none (no explanations)
+        self.cover = arrays.get('cover')
+        self.roots = arrays['roots']
+        self.depth = int(arrays['depth'])
+        self.base_margin = float(arrays['base_margin'])
+        self.n_features_in_ = int(arrays['num_features'])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def save(self, path):
+        extra = {} if self.cover is None else {'cover': self.cover}
+        np.savez(
+            path, feature=self.feature, threshold=self.threshold, left=self.left,
+            right=self.right, default_left=self.default_left, value=self.value,
+            roots=self.roots, depth=np.int32(self.depth),
+            base_margin=np.float64(self.base_margin),
+            num_features=np.int32(self.n_features_in_), **extra,
+        )
+
+    def _step(self, nodes, x):
+        go_left = x < self.threshold[nodes]
+        missing = np.isnan(x)
+        if missing.any():
+            go_left = np.where(missing, self.default_left[nodes], go_left)
+        return np.where(go_left, self.left[nodes], self.right[nodes])
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape (n, n_trees)."""
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.depth):
+            nodes = self._step(nodes, X[rows, self.feature[nodes]])
+        return nodes
+
+    def margin_one(self, x):
+        """Single-row fast path: walk all trees at once on 1-D arrays."""
+        nodes = self.roots
+        for _ in range(self.depth):
+            nodes = self._step(nodes, x[self.feature[nodes]])
+        return self.base_margin + self.value[nodes].sum(dtype=np.float64)
+
+    def margin(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        if len(X) == 1:
+            return np.array([self.margin_one(X[0])])
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            out[start:start + len(block)] = self.value[self.leaves(block)].sum(axis=1, dtype=np.float64)
+        return out + self.base_margin
+
+    def predict_proba(self, X, validate_features=True):
+        # validate_features is accepted for XGBClassifier compatibility, the
+        # feature count is always checked
+        proba = 1.0 / (1.0 + np.exp(-self.margin(X)))
+        return np.column_stack([1.0 - proba, proba])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(np.int64)
+
+
+def main(argv=None):
+    from .model import MODEL_DIR, MODEL_FILE, TREES_FILE, load_artifacts
+
+    parser = argparse.ArgumentParser(description="Export best_xgb.pkl to flat tree arrays.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--check', metavar='CSV', default=None,
+                        help="Compare probabilities with the xgboost booster on this dataset")
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    xgb_model = joblib.load(os.path.join(args.model_dir, MODEL_FILE))
+    ensemble = TreeEnsemble(export_trees(xgb_model))
+    path = os.path.join(args.model_dir, TREES_FILE)
+    ensemble.save(path)
+    print(f"Wrote {len(ensemble.roots)} trees ({len(ensemble.value)} nodes, depth {ensemble.depth}) to {path}")
+
+    if args.check:
+        import pandas as pd
+
+        _, _, preprocessor = load_artifacts(args.model_dir)
+        features = preprocessor.transform(preprocessor.encode_frame(pd.read_csv(args.check)))
+        expected = xgb_model.predict_proba(features, validate_features=False)[:, 1]
+        actual = ensemble.predict_proba(features)[:, 1]
+        single = np.array([ensemble.predict_proba(row)[0, 1] for row in features[:1000]])
+        diff = max(np.abs(actual - expected).max(), np.abs(single - expected[:1000]).max())
+        print(f"Max |p_numpy - p_xgboost| over {len(features):,} rows: {diff:.2e}")
+        if diff > args.tolerance:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Optional background warm-up for the Streamlit server.
+
+Set ``APP_WARMUP=1`` and the first script run in a server process (any page)
+starts a daemon thread that imports the heavy libraries, loads the model
+artifacts and parses the dataset with its filter index. The first Prediction
+or Dashboard request then finds them ready in the process caches instead of
+paying for them itself. Without the variable nothing is loaded until a page
+needs it.
+"""
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_thread = None
+_status = {}
+
+
+def _timed(name, fn):
+    t0 = time.perf_counter()
+    try:
+        fn()
+        _status[name] = time.perf_counter() - t0
+    except Exception as e:
+        # A missing artifact must not break the app; the page reports it on first use
+        _status[name] = f"failed: {e}"
+
+
+def _model():
+    from .model import MODEL_DIR, shared_artifacts
+    shared_artifacts(MODEL_DIR)
+
+
+def _dataset():
+    if os.environ.get('DATASET_MODE') == 'out-of-core':
+        return
+    from .data import load_dataset
+    from .filters import filter_index
+    filter_index(load_dataset())
+
+
+def _charts():
+    import altair  # noqa: F401
+    from . import dashboard  # noqa: F401
+
+
+def _run():
+    _timed('model', _model)
+    _timed('dataset', _dataset)
+    _timed('charts', _charts)
+
+
+def start():
+    """Start the warm-up thread once per process; returns it."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='anxiety-warmup', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def maybe_start():
+    """Start the warm-up if APP_WARMUP is set."""
+    if os.environ.get('APP_WARMUP', '').lower() in ('1', 'true', 'yes'):
+        start()
+
+
+def status():
+    """Seconds spent per warm-up step so far (or the error message)."""
+    return dict(_status)
@@ -0,0 +1,49 @@
+"""What-if sensitivity curves for a submitted profile.
+
+Every numeric form feature is swept over its slider range (every slider
+step) while the other features keep their submitted values. The submitted
+profile and all sweeps, several hundred rows in total, are stacked into one
+matrix and scored with a single ``predict_proba`` call.
+"""
+import numpy as np
+
+from . import metrics
+from .features import FEATURE_ORDER, FORM_RANGES, NUMERICAL_COLS
+
+
+def slider_values(col, ranges=FORM_RANGES):
+    low, high, step = ranges[col]
+    return low + step * np.arange(int(round((high - low) / step)) + 1)
+
+
+def sweep_rows(row, columns=NUMERICAL_COLS, ranges=FORM_RANGES):
+    """Stack the encoded profile (row 0) and one sweep block per column.
+
+    Returns (rows, {col: (values, slice into rows)}).
+    """
+    row = np.asarray(row, dtype=np.float64).reshape(-1)
+    blocks = [row[None, :]]
+    segments = {}
+    start = 1
+    for col in columns:
+        values = slider_values(col, ranges)
+        block = np.repeat(row[None, :], len(values), axis=0)
+        block[:, FEATURE_ORDER.index(col)] = values
+        blocks.append(block)
+        segments[col] = (values, slice(start, start + len(values)))
+        start += len(values)
+    return np.vstack(blocks), segments
+
+
+def whatif_curves(model, preprocessor, values, columns=NUMERICAL_COLS, ranges=FORM_RANGES):
+    """Score a profile and all its sweeps in one model call.
+
+    Returns (probability of the profile, {col: (values, probabilities)}).
+    """
+    with metrics.span('preprocess.transform'):
+        rows, segments = sweep_rows(preprocessor.encode(values), columns, ranges)
+        features = preprocessor.transform(rows)
+    with metrics.span('model.predict_proba'):
+        proba = model.predict_proba(features, validate_features=False)[:, 1]
+    curves = {col: (xs, proba[sl]) for col, (xs, sl) in segments.items()}
+    return float(proba[0]), curves
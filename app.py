@@ -1,5 +1,9 @@
 import streamlit as st
 
+from anxiety.warmup import maybe_start
+
+maybe_start()
+
 # Set page config
 st.set_page_config(page_title="Yuono Dwi Raharjo - Portfolio", layout="wide")
 
@@ -1,5 +1,9 @@
 import streamlit as st
 
+from anxiety.warmup import maybe_start
+
+maybe_start()
+
 st.title("📖 Introduction: Understanding Social Anxiety")
 
 st.markdown("""
@@ -1,12 +1,46 @@
+import os
+
 import streamlit as st
-import pandas as pd
 import altair as alt
 
+from anxiety import aggregates as agg
+from anxiety import metrics
+from anxiety.dashboard import DashboardViews, FrameSource, filter_state
+from anxiety.data import load_dataset
+from anxiety.filters import filter_index
+from anxiety.insights import importance_table, insights_signature, load_insights, pdp_table
+from anxiety.model import artifact_signature
+from anxiety.stats import ALPHA
+from anxiety.warmup import maybe_start
+
+maybe_start()
+metrics.begin_rerun("dashboard")
+
 st.set_page_config(layout="wide")
 st.title("📊 Anxiety Profiling Dashboard")
 
-# Load dataset
-df = pd.read_csv("data/anxiety_dataset.csv")
+# Load dataset: parsed once per process (typed columns), or streamed from the
+# column store built by `python -m anxiety.store build` when DATASET_MODE=out-of-core
+@st.cache_resource
+def load_store_source():
+    from anxiety.store import ColumnStore, StoreSource
+    return StoreSource(ColumnStore(os.environ.get("DATASET_STORE", os.path.join("data", "anxiety_store"))))
+
+with metrics.span("dataset.load"):
+    if os.environ.get("DATASET_MODE") == "out-of-core":
+        source = load_store_source()
+        # Pick up rows appended by `python -m anxiety.ingest` since the last rerun
+        source.refresh()
+    else:
+        df = load_dataset()
+        source = FrameSource(df, filter_index(df))
+
+# Derived results per filter state, shared by all sessions
+@st.cache_resource
+def load_dashboard_views():
+    return DashboardViews()
+
+views = load_dashboard_views()
 
 # --- Filter Controls ---
 st.markdown("### 🔍 Filter Data")
@@ -15,164 +49,274 @@ col1, col2, col3, col4, col5, col6, col7, col8 = st.columns(8)
 with col1:
     age_range = st.slider("Age", 18, 64, (18, 64))
 with col2:
-    gender = st.selectbox("Gender", ["All"] + sorted(df["Gender"].unique().tolist()))
+    gender = st.selectbox("Gender", ["All"] + source.options["gender"])
 with col3:
-    occupation = st.selectbox("Occupation", ["All"] + sorted(df["Occupation"].unique().tolist()))
+    occupation = st.selectbox("Occupation", ["All"] + source.options["occupation"])
 with col4:
-    smoking = st.selectbox("Smoking", ["All"] + sorted(df["Smoking"].unique().tolist()))
+    smoking = st.selectbox("Smoking", ["All"] + source.options["smoking"])
 with col5:
-    family = st.selectbox("Family History", ["All"] + sorted(df["Family History of Anxiety"].unique().tolist()))
+    family = st.selectbox("Family History", ["All"] + source.options["family"])
 with col6:
-    dizzy = st.selectbox("Dizziness", ["All"] + sorted(df["Dizziness"].unique().tolist()))
+    dizzy = st.selectbox("Dizziness", ["All"] + source.options["dizzy"])
 with col7:
-    med = st.selectbox("Medication", ["All"] + sorted(df["Medication"].unique().tolist()))
+    med = st.selectbox("Medication", ["All"] + source.options["med"])
 with col8:
-    event = st.selectbox("Major Event", ["All"] + sorted(df["Recent Major Life Event"].unique().tolist()))
-
-# Apply filtering
-filtered = df[df['Age'].between(*age_range)]
-if gender != "All":
-    filtered = filtered[filtered["Gender"] == gender]
-if occupation != "All":
-    filtered = filtered[filtered["Occupation"] == occupation]
-if smoking != "All":
-    filtered = filtered[filtered["Smoking"] == smoking]
-if family != "All":
-    filtered = filtered[filtered["Family History of Anxiety"] == family]
-if dizzy != "All":
-    filtered = filtered[filtered["Dizziness"] == dizzy]
-if med != "All":
-    filtered = filtered[filtered["Medication"] == med]
-if event != "All":
-    filtered = filtered[filtered["Recent Major Life Event"] == event]
-
-# --- Summary Cards ---
-st.markdown("### 📌 Summary")
-col1, col2, col3, col4, col5, col6 = st.columns(6)
-col1.metric("Total People", f"{len(filtered):,}")
-col2.metric("Anxiety Level", f"{filtered['Anxiety Level (1-10)'].mean():.2f}")
-col3.metric("Stress Level", f"{filtered['Stress Level (1-10)'].mean():.2f}")
-col4.metric("Heart Rate", f"{filtered['Heart Rate (bpm)'].mean():.2f}")
-col5.metric("Breathing Rate", f"{filtered['Breathing Rate (breaths/min)'].mean():.2f}")
-col6.metric("Sweating Level", f"{filtered['Sweating Level (1-5)'].mean():.2f}")
-
-# --- Main Charts ---
-st.markdown("### 📈 Visualizations")
-
-# Row 1: Distribution & Gender Pie
-col1, col2, col3 = st.columns([1.5, 1, 1.2])
+    event = st.selectbox("Major Event", ["All"] + source.options["event"])
 
-with col1:
-    st.markdown("**Distribution of Anxiety Level**")
-    chart1 = alt.Chart(filtered).mark_bar(color='#FF6F61').encode(
-        x=alt.X("Anxiety Level (1-10):O", title="Anxiety Level"),
-        y=alt.Y("count():Q", title="Qty")
-    ).properties(height=250)
-    st.altair_chart(chart1, use_container_width=True)
+# Apply filtering (bitmap index) and compute summary + chart tables, memoized per filter state
+state = filter_state(age_range, gender, occupation, smoking, family, dizzy, med, event)
+with metrics.span("dashboard.view"):
+    view, time_saved = views.get(source, state)
+summary = view['summary']
 
-with col2:
-    st.markdown("**Gender Distribution**")
-    gender_chart = alt.Chart(filtered).mark_arc(innerRadius=50).encode(
-        theta="count():Q",
-        color="Gender:N"
-    ).properties(height=250)
-    st.altair_chart(gender_chart, use_container_width=True)
+overview_tab, statistics_tab, insights_tab = st.tabs(["📈 Overview", "📐 Statistics", "🧠 Model Insights"])
 
-with col3:
-    st.markdown("**Anxiety Level by Gender**")
-    chart_gender = alt.Chart(filtered).mark_bar(color='#FF6F61').encode(
-        y=alt.Y("Gender:N"),
-        x=alt.X("mean(Anxiety Level (1-10)):Q", title="Average Anxiety Level")
-    ).properties(height=250)
-    st.altair_chart(chart_gender, use_container_width=True)
-
-# Row 2: Occupation
-st.markdown("**Anxiety Level by Occupation**")
-occupation_chart = alt.Chart(filtered).mark_bar(color='#FF6F61').encode(
-    x=alt.X("mean(Anxiety Level (1-10)):Q", title="Average of Anxiety Level (1-10)"),
-    y=alt.Y("Occupation:N", sort="-x")
-).properties(height=300)
-st.altair_chart(occupation_chart, use_container_width=True)
-
-# Row 3: Anxiety Trends by Numeric Features (Updated with contrasting trend lines)
-st.markdown("### 🔄 Anxiety Trends by Numeric Features")
-
-def create_trend_chart(data, x_col, title):
-    # Base chart
-    base = alt.Chart(data).encode(
-        x=alt.X(f"{x_col}:Q", title=title),
-        y=alt.Y("Anxiety Level (1-10):Q", title="Anxiety Level")
-    )
+with overview_tab:
+    # --- Summary Cards ---
+    st.markdown("### 📌 Summary")
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    col1.metric("Total People", f"{view['count']:,}")
+    col2.metric("Anxiety Level", f"{summary['Anxiety Level (1-10)']:.2f}")
+    col3.metric("Stress Level", f"{summary['Stress Level (1-10)']:.2f}")
+    col4.metric("Heart Rate", f"{summary['Heart Rate (bpm)']:.2f}")
+    col5.metric("Breathing Rate", f"{summary['Breathing Rate (breaths/min)']:.2f}")
+    col6.metric("Sweating Level", f"{summary['Sweating Level (1-5)']:.2f}")
+
+    # --- Main Charts ---
+    st.markdown("### 📈 Visualizations")
+
+    # Charts receive the view's small aggregate tables, not the filtered rows.
+    # Every table goes through chart_data() so the payload of this rerun is recorded.
+    chart_tables = []
+
+    def chart_data(table):
+        chart_tables.append(table)
+        return table
+
+    # Rendering (Vega-Lite spec + data serialization) is timed per chart
+    def show_chart(name, chart):
+        with metrics.span(f"chart.{name}"):
+            st.altair_chart(chart, use_container_width=True)
+
+    # Row 1: Distribution & Gender Pie
+    col1, col2, col3 = st.columns([1.5, 1, 1.2])
+
+    with col1:
+        st.markdown("**Distribution of Anxiety Level**")
+        chart1 = alt.Chart(chart_data(view['histogram'])).mark_bar(color='#FF6F61').encode(
+            x=alt.X("Anxiety Level (1-10):O", title="Anxiety Level"),
+            y=alt.Y("count:Q", title="Qty")
+        ).properties(height=250)
+        show_chart("histogram", chart1)
+
+    with col2:
+        st.markdown("**Gender Distribution**")
+        gender_chart = alt.Chart(chart_data(view['gender_counts'])).mark_arc(innerRadius=50).encode(
+            theta="count:Q",
+            color="Gender:N"
+        ).properties(height=250)
+        show_chart("gender_distribution", gender_chart)
+
+    with col3:
+        st.markdown("**Anxiety Level by Gender**")
+        chart_gender = alt.Chart(chart_data(view['gender_means'])).mark_bar(color='#FF6F61').encode(
+            y=alt.Y("Gender:N"),
+            x=alt.X("mean:Q", title="Average Anxiety Level")
+        ).properties(height=250)
+        show_chart("gender_means", chart_gender)
+
+    # Row 2: Occupation
+    st.markdown("**Anxiety Level by Occupation**")
+    occupation_chart = alt.Chart(chart_data(view['occupation_means'])).mark_bar(color='#FF6F61').encode(
+        x=alt.X("mean:Q", title="Average of Anxiety Level (1-10)"),
+        y=alt.Y("Occupation:N", sort="-x")
+    ).properties(height=300)
+    show_chart("occupation_means", occupation_chart)
+
+    # Row 3: Anxiety Trends by Numeric Features (Updated with contrasting trend lines)
+    st.markdown("### 🔄 Anxiety Trends by Numeric Features")
+
+    def create_trend_chart(trend, x_col, title):
+        # Shared encoding
+        x = alt.X(f"{x_col}:Q", title=title)
+        y = alt.Y("Anxiety Level (1-10):Q", title="Anxiety Level")
     
-    # Scatter plot with blue dots
-    scatter = base.mark_circle(
-        opacity=0.7, 
-        color='#71C7EC',  # Light blue
-        size=60
-    )
+        # Point layer: blue dots, or a density grid / sample once the data is large
+        mode, points, line = trend
+        if mode == 'density':
+            scatter = alt.Chart(chart_data(points)).mark_rect().encode(
+                x=alt.X("x_start:Q", bin="binned", title=title),
+                x2="x_end:Q",
+                y=alt.Y("y_start:Q", bin="binned", title="Anxiety Level"),
+                y2="y_end:Q",
+                color=alt.Color("count:Q", scale=alt.Scale(scheme="blues"), title="Qty")
+            )
+        else:
+            scatter = alt.Chart(chart_data(points)).encode(x=x, y=y).mark_circle(
+                opacity=0.7, 
+                color='#71C7EC',  # Light blue
+                size=60
+            )
     
-    # Trend line with contrasting color
-    trend = base.transform_regression(
-        x_col,
-        'Anxiety Level (1-10)'
-    ).mark_line(
-        color='#FF6F61',  # Coral color
-        strokeWidth=3
-    )
+        # Trend line with contrasting color, fitted on the server over all filtered rows
+        trend = alt.Chart(chart_data(line)).encode(x=x, y=y).mark_line(
+            color='#FF6F61',  # Coral color
+            strokeWidth=3
+        )
     
-    return (scatter + trend).properties(height=300)
+        return (scatter + trend).properties(height=300)
 
-# First row of charts (Age vs Caffeine Intake)
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown("**Anxiety Level (1-10) vs Age**")
-    chart = create_trend_chart(filtered, "Age", "Age")
-    st.altair_chart(chart, use_container_width=True)
+    # First row of charts (Age vs Caffeine Intake)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Anxiety Level (1-10) vs Age**")
+        chart = create_trend_chart(view['trends']["Age"], "Age", "Age")
+        show_chart("trend.Age", chart)
 
-with col2:
-    st.markdown("**Anxiety Level (1-10) vs Caffeine Intake**")
-    chart = create_trend_chart(filtered, "Caffeine Intake (mg/day)", "Caffeine Intake (mg/day)")
-    st.altair_chart(chart, use_container_width=True)
+    with col2:
+        st.markdown("**Anxiety Level (1-10) vs Caffeine Intake**")
+        chart = create_trend_chart(view['trends']["Caffeine Intake (mg/day)"], "Caffeine Intake (mg/day)", "Caffeine Intake (mg/day)")
+        show_chart("trend.Caffeine Intake (mg/day)", chart)
 
-# Second row of charts (Sleep Hours vs Alcohol Consumption)
-col3, col4 = st.columns(2)
-with col3:
-    st.markdown("**Anxiety Level (1-10) vs Sleep Hours**")
-    chart = create_trend_chart(filtered, "Sleep Hours", "Sleep Hours")
-    st.altair_chart(chart, use_container_width=True)
+    # Second row of charts (Sleep Hours vs Alcohol Consumption)
+    col3, col4 = st.columns(2)
+    with col3:
+        st.markdown("**Anxiety Level (1-10) vs Sleep Hours**")
+        chart = create_trend_chart(view['trends']["Sleep Hours"], "Sleep Hours", "Sleep Hours")
+        show_chart("trend.Sleep Hours", chart)
 
-with col4:
-    st.markdown("**Anxiety Level (1-10) vs Alcohol Consumption**")
-    chart = create_trend_chart(filtered, "Alcohol Consumption (drinks/week)", "Alcohol Consumption (drinks/week)")
-    st.altair_chart(chart, use_container_width=True)
+    with col4:
+        st.markdown("**Anxiety Level (1-10) vs Alcohol Consumption**")
+        chart = create_trend_chart(view['trends']["Alcohol Consumption (drinks/week)"], "Alcohol Consumption (drinks/week)", "Alcohol Consumption (drinks/week)")
+        show_chart("trend.Alcohol Consumption (drinks/week)", chart)
 
-# Third row of charts (Physical Activity vs Therapy Sessions)
-col5, col6 = st.columns(2)
-with col5:
-    st.markdown("**Anxiety Level (1-10) vs Physical Activity**")
-    chart = create_trend_chart(filtered, "Physical Activity (hrs/week)", "Physical Activity (hrs/week)")
-    st.altair_chart(chart, use_container_width=True)
+    # Third row of charts (Physical Activity vs Therapy Sessions)
+    col5, col6 = st.columns(2)
+    with col5:
+        st.markdown("**Anxiety Level (1-10) vs Physical Activity**")
+        chart = create_trend_chart(view['trends']["Physical Activity (hrs/week)"], "Physical Activity (hrs/week)", "Physical Activity (hrs/week)")
+        show_chart("trend.Physical Activity (hrs/week)", chart)
 
-with col6:
-    st.markdown("**Anxiety Level (1-10) vs Therapy Sessions**")
-    chart = create_trend_chart(filtered, "Therapy Sessions (per month)", "Therapy Sessions (per month)")
-    st.altair_chart(chart, use_container_width=True)
-
-# Row 5: Categoricals
-cat_cols = [
-    "Smoking",
-    "Family History of Anxiety",
-    "Dizziness",
-    "Medication",
-    "Recent Major Life Event"
-]
-
-st.markdown("### 🔠 Anxiety by Category")
-cat_col1, cat_col2, cat_col3, cat_col4, cat_col5 = st.columns(5)
-for col, feat in zip([cat_col1, cat_col2, cat_col3, cat_col4, cat_col5], cat_cols):
-    with col:
-        chart = alt.Chart(filtered).mark_bar(color="#FF6F61").encode(
-            x=alt.X(f"{feat}:N"),
-            y=alt.Y("mean(Anxiety Level (1-10)):Q", title="Avg Anxiety")
+    with col6:
+        st.markdown("**Anxiety Level (1-10) vs Therapy Sessions**")
+        chart = create_trend_chart(view['trends']["Therapy Sessions (per month)"], "Therapy Sessions (per month)", "Therapy Sessions (per month)")
+        show_chart("trend.Therapy Sessions (per month)", chart)
+
+    # Row 5: Categoricals
+    cat_cols = [
+        "Smoking",
+        "Family History of Anxiety",
+        "Dizziness",
+        "Medication",
+        "Recent Major Life Event"
+    ]
+
+    st.markdown("### 🔠 Anxiety by Category")
+    cat_col1, cat_col2, cat_col3, cat_col4, cat_col5 = st.columns(5)
+    for col, feat in zip([cat_col1, cat_col2, cat_col3, cat_col4, cat_col5], cat_cols):
+        with col:
+            chart = alt.Chart(chart_data(view['category_means'][feat])).mark_bar(color="#FF6F61").encode(
+                x=alt.X(f"{feat}:N"),
+                y=alt.Y("mean:Q", title="Avg Anxiety")
+            )
+            show_chart(f"category.{feat}", chart)
+
+    # Chart data sent to the browser on this rerun
+    st.caption(
+        f"Chart payload: {agg.payload_bytes(*chart_tables) / 1024:,.1f} KB "
+        f"in {len(chart_tables)} aggregate tables ({view['count']:,} filtered rows)"
+    )
+    cache_stats = views.stats()
+    st.caption(
+        f"View cache: {cache_stats['hit_rate']:.0%} hit rate ({cache_stats['hits']} hits, "
+        f"{cache_stats['misses']} misses, {cache_stats['parent_reuses']} parent reuses), "
+        f"{time_saved * 1000:.1f} ms saved this rerun, {cache_stats['time_saved']:.2f} s in total"
+    )
+
+# --- Statistics: correlations, VIFs and group tests of the filtered rows, cached per filter state.
+# st.tabs runs every tab's body on each rerun, so they are only computed once switched on ---
+with statistics_tab:
+    if view['count'] < 3:
+        st.info("Not enough rows in the current filter for the statistics.")
+    elif not st.toggle("Compute statistics for the current filters"):
+        st.caption("The statistics take an extra pass over the filtered rows, so they are only computed on request. "
+                   "Once switched on they follow the filters and are cached per filter state.")
+    else:
+        result = views.statistics(source, state, view)
+        st.caption(f"Computed on the {result['n']:,} filtered rows. * p < 0.05, ** p < 0.01, *** p < 0.001")
+
+        st.markdown("**Correlation Matrix with Significance Stars**")
+        pairs = result['pairs'].assign(label=lambda t: t['r'].map("{:.2f}".format) + t['stars'])
+        base = alt.Chart(pairs).encode(
+            x=alt.X("x:N", sort=list(result['correlation'].columns), title=None),
+            y=alt.Y("y:N", sort=list(result['correlation'].index), title=None)
+        )
+        heatmap = base.mark_rect().encode(
+            color=alt.Color("r:Q", scale=alt.Scale(scheme="redblue", domain=[-1, 1], reverse=True)),
+            tooltip=["x:N", "y:N", alt.Tooltip("r:Q", format=".3f"), alt.Tooltip("p:Q", format=".2e")]
+        )
+        labels = base.mark_text(fontSize=10).encode(text="label:N")
+        show_chart("statistics.correlation", (heatmap + labels).properties(height=520))
+
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.markdown("**Variance Inflation Factors**")
+            st.dataframe(result['vif'].round(3), hide_index=True, use_container_width=True)
+        with col2:
+            for col, test in result['group_tests'].items():
+                st.markdown(f"**Anxiety Level by {col}**")
+                if test['normal']:
+                    reason = "every group passes the normality test"
+                else:
+                    reason = f"not every group passes the normality test (p ≥ {ALPHA})"
+                st.caption(
+                    f"{test['test']}: statistic = {test['statistic']:.4f}, p = {test['p']:.4g} ({reason}). "
+                    f"ANOVA F = {test['anova'][0]:.4f}, p = {test['anova'][1]:.4g}; "
+                    f"Kruskal-Wallis H = {test['kruskal'][0]:.4f}, p = {test['kruskal'][1]:.4g}"
+                )
+                st.dataframe(test['groups'].round(4), hide_index=True, use_container_width=True)
+
+# --- Model Insights: permutation importance and PDP curves precomputed by
+# `python -m anxiety.insights` (or training); the page only reads model/insights.json.
+# Keyed on the model artifacts too, so 'stale' is rechecked when the model is retrained ---
+@st.cache_resource
+def load_model_insights(signature, model_signature):
+    return load_insights()
+
+with insights_tab:
+    insights = load_model_insights(insights_signature(), artifact_signature())
+    if insights is None:
+        st.info("No model insights yet. Run `python -m anxiety.insights` to compute them.")
+    else:
+        if insights['stale']:
+            st.warning("The model changed since these insights were computed. Re-run `python -m anxiety.insights`.")
+        st.caption(
+            f"Computed {insights['created']} on {insights['rows']:,} test rows: {insights['n_repeats']} repeats, "
+            f"baseline recall {insights['baseline_score']:.3f}"
         )
-        st.altair_chart(chart, use_container_width=True)
\ No newline at end of file
+
+        st.markdown("**Permutation Feature Importance (Recall)**")
+        top = importance_table(insights).head(10).assign(
+            low=lambda t: t['mean'] - t['std'], high=lambda t: t['mean'] + t['std']
+        )
+        y = alt.Y("feature:N", sort=list(top['feature']), title=None)
+        bars = alt.Chart(top).mark_bar(color="skyblue").encode(
+            x=alt.X("mean:Q", title="Importance Score"),
+            y=y,
+            tooltip=["feature:N", alt.Tooltip("mean:Q", format=".4f"), alt.Tooltip("std:Q", format=".4f")]
+        )
+        spread = alt.Chart(top).mark_rule(color="#555555").encode(x="low:Q", x2="high:Q", y=y)
+        show_chart("insights.importance", (bars + spread).properties(height=300))
+
+        st.markdown("**Partial Dependence Plots (Numerical Features Only)**")
+        pdp_cols = st.columns(3)
+        for i, feature in enumerate(insights['partial_dependence']):
+            with pdp_cols[i % 3]:
+                chart = alt.Chart(pdp_table(insights, feature)).mark_line(color="#FF6F61", strokeWidth=3).encode(
+                    x=alt.X(f"{feature}:Q", title=feature),
+                    y=alt.Y("average:Q", title="Avg P(High)")
+                ).properties(height=200)
+                show_chart(f"insights.pdp.{feature}", chart)
+
+# Developer panel (APP_METRICS=1): stages of this rerun and p50/p95 per stage for the process
+metrics.render_panel(st)
\ No newline at end of file
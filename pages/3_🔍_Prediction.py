@@ -1,8 +1,16 @@
 import streamlit as st
-import pandas as pd
-import joblib
 import os
-import numpy as np
+import time
+
+# Light imports only: numpy, pandas and the model are loaded on the first prediction
+from anxiety import metrics
+from anxiety.cache import LRUCache, quantize_inputs
+from anxiety.features import BINARY_COLS, FEATURE_ORDER
+from anxiety.model import MODEL_DIR, artifact_signature, decision_threshold, shared_artifacts
+from anxiety.warmup import maybe_start
+
+maybe_start()
+metrics.begin_rerun("prediction")
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -68,17 +76,35 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# 1. Load Model and Preprocessing
+# 1. Load Model and Preprocessing (deferred until the form is submitted)
+# The signature argument makes Streamlit reload whenever an artifact file changes
+@st.cache_resource
+def load_resources(signature):
+    return shared_artifacts(MODEL_DIR)
+
+# TreeSHAP explainer, tabulated once per process from the loaded trees
+@st.cache_resource
+def load_explainer(signature):
+    from anxiety.explain import explainer_for
+    model, _, _ = load_resources(signature)
+    return explainer_for(model)
+
+# Input drift monitor shared by all sessions, None without model/drift_profile.json
 @st.cache_resource
-def load_resources():
-    model_path = os.path.join('model', 'best_xgb.pkl')
-    preprocess_path = os.path.join('model', 'preprocess.pkl')
-    return (
-        joblib.load(model_path),
-        joblib.load(preprocess_path)
-    )
+def load_drift_monitor(signature, profile_signature):
+    from anxiety.drift import load_monitor
+    _, _, preprocessor = load_resources(signature)
+    return load_monitor(MODEL_DIR, preprocessor)
 
-model, preprocess = load_resources()
+# Probability and what-if curves per quantized profile (a few hundred points each),
+# shared by all sessions in this process: a miss is the page's one model call
+@st.cache_resource
+def load_whatif_cache():
+    return LRUCache(maxsize=int(os.environ.get("WHATIF_CACHE_SIZE", 512)))
+
+signature = artifact_signature(MODEL_DIR)
+whatif_cache = load_whatif_cache()
+whatif_cache.validate(signature)
 
 # 2. Input Form - ALL MODEL FEATURES
 with st.form("input_form"):
@@ -124,18 +150,7 @@ with st.form("input_form"):
 # 3. Prediction Process
 if submitted:
     try:
-        # Define the correct feature order expected by the model
-        correct_feature_order = [
-            'Age', 'Sleep Hours', 'Physical Activity (hrs/week)',
-            'Caffeine Intake (mg/day)', 'Alcohol Consumption (drinks/week)',
-            'Smoking', 'Family History of Anxiety', 'Stress Level (1-10)',
-            'Heart Rate (bpm)', 'Breathing Rate (breaths/min)',
-            'Sweating Level (1-5)', 'Dizziness', 'Medication',
-            'Therapy Sessions (per month)', 'Recent Major Life Event',
-            'Diet Quality (1-10)'
-        ]
-        
-        # Create DataFrame with manual encoding and correct column order
+        # Raw inputs with manual encoding
         input_dict = {
             'Age': age,
             'Sleep Hours': sleep,
@@ -155,26 +170,33 @@ if submitted:
             'Diet Quality (1-10)': diet
         }
         
-        # Create DataFrame with correct column order
-        input_data = pd.DataFrame([input_dict])[correct_feature_order]
-        
-        # NUMERICAL SCALING
-        numerical_cols = [
-            'Age', 'Sleep Hours', 'Physical Activity (hrs/week)',
-            'Caffeine Intake (mg/day)', 'Alcohol Consumption (drinks/week)',
-            'Stress Level (1-10)', 'Heart Rate (bpm)', 'Breathing Rate (breaths/min)',
-            'Sweating Level (1-5)', 'Therapy Sessions (per month)', 'Diet Quality (1-10)'
-        ]
+        metrics.count("prediction.submit")
+        with metrics.span("model.load"):
+            model, preprocess, preprocessor = load_resources(signature)
         
-        for col in numerical_cols:
-            if col in input_data.columns and col in preprocess['scalers']:
-                input_data[col] = preprocess['scalers'][col].transform(input_data[[col]])
+        # Scale all numerical columns in a single vectorized step
+        with metrics.span("preprocess.transform"):
+            features = preprocessor.transform(input_dict)
         
-        # Ensure all columns are numeric
-        input_data = input_data.astype(float)
+        # 5. Prediction - the profile and every what-if sweep are scored in one batched model call,
+        # repeated profiles come from the cache
+        from anxiety.whatif import whatif_curves
+        key = quantize_inputs(input_dict)
+        def score_profile():
+            metrics.count("prediction.model_call")
+            return whatif_curves(model, preprocessor, input_dict)
+        proba, curves = whatif_cache.get_or_compute(key, score_profile)
         
-        # 5. Prediction - Convert to Python float explicitly
-        proba = float(model.predict_proba(input_data)[0][1])  # Konversi ke float standard
+        # Every served prediction feeds the drift monitor, cached or not
+        from anxiety.drift import profile_signature
+        monitor = load_drift_monitor(signature, profile_signature(MODEL_DIR))
+        if monitor is not None:
+            # Monitoring is best effort: a monitor failure must never hide the prediction
+            try:
+                with metrics.span("drift.observe"):
+                    monitor.observe(features)
+            except Exception:
+                metrics.count("drift.observe_error")
         
         # 6. Show Results with better visualization
         st.divider()
@@ -188,7 +210,7 @@ if submitted:
         <p style="text-align:center; margin-top:5px;"><b>{proba*100:.1f}% Risk Score</b></p>
         """, unsafe_allow_html=True)
         
-        if proba >= 0.5:
+        if proba >= decision_threshold(MODEL_DIR):
             st.markdown(f"""
             <div style='background-color:#fde8e8; padding:20px; border-radius:10px; margin-top:20px;'>
                 <h3 style='color:#e74c3c;'>🔴 High Risk: {proba*100:.1f}%</h3>
@@ -217,6 +239,45 @@ if submitted:
             </div>
             """, unsafe_allow_html=True)
         
+        # 7. Explanation - top feature contributions for this profile
+        try:
+            from anxiety.explain import top_contributions
+            with metrics.span("explain.load"):
+                explainer = load_explainer(signature)
+            t0 = time.perf_counter()
+            with metrics.span("explain.shap_values"):
+                contributions = explainer.shap_values(features)[0]
+            explain_ms = (time.perf_counter() - t0) * 1000
+            
+            st.markdown("<h3 style='color:#2c3e50; margin-top:20px;'>What drove this prediction</h3>", unsafe_allow_html=True)
+            for name, value in top_contributions(contributions, FEATURE_ORDER, k=5):
+                shown = ("Yes" if input_dict[name] else "No") if name in BINARY_COLS else input_dict[name]
+                arrow, color, effect = ("▲", "#e74c3c", "raises") if value > 0 else ("▼", "#2ecc71", "lowers")
+                st.markdown(f"""
+                <p style='margin:4px 0;'><span style='color:{color};'>{arrow}</span>
+                <b>{name}</b> = {shown} {effect} the risk <span style='color:#7f8c8d;'>({value:+.2f} log-odds)</span></p>
+                """, unsafe_allow_html=True)
+            st.caption(f"TreeSHAP contributions relative to the average profile, computed in {explain_ms:.2f} ms")
+        except ValueError as e:
+            st.info(f"Explanation unavailable: {e}")
+        
+        # 8. What-if curves - risk as one slider moves and everything else stays as submitted
+        with st.expander("📈 What if? Risk as one factor changes", expanded=True):
+            import altair as alt
+            import pandas as pd
+            st.caption("Each curve sweeps one slider across its range while keeping your other answers. The red dot is your current value.")
+            chart_cols = st.columns(3)
+            for i, (col, (xs, curve)) in enumerate(curves.items()):
+                line = alt.Chart(pd.DataFrame({"value": xs, "risk": curve * 100})).mark_line(color="#3498db").encode(
+                    x=alt.X("value:Q", title=col),
+                    y=alt.Y("risk:Q", title="Risk (%)", scale=alt.Scale(domain=[0, 100]))
+                )
+                marker = alt.Chart(pd.DataFrame({"value": [input_dict[col]], "risk": [proba * 100]})).mark_point(
+                    color="#e74c3c", size=80, filled=True
+                ).encode(x="value:Q", y="risk:Q")
+                with chart_cols[i % 3], metrics.span("chart.whatif"):
+                    st.altair_chart((line + marker).properties(height=180), use_container_width=True)
+        
         # Disclaimer with icon
         st.markdown("""
         <div style='background-color:#f2f4f4; padding:15px; border-radius:8px; margin-top:30px;'>
@@ -230,8 +291,18 @@ if submitted:
         
         # Optional: Show raw data in expander
         with st.expander("Show input data"):
+            import pandas as pd
+            input_data = pd.DataFrame(features, columns=FEATURE_ORDER)
             st.dataframe(input_data.style.highlight_max(axis=0, color='#f39c12'))
+            stats = whatif_cache.stats()
+            st.caption(
+                f"Prediction cache: {stats['size']}/{stats['maxsize']} entries, "
+                f"{stats['hits']} hits, {stats['misses']} model calls, {stats['evictions']} evictions"
+            )
     
     except Exception as e:
         st.error(f"Prediction error: {str(e)}")
-        st.warning("Please check your inputs and try again")
\ No newline at end of file
+        st.warning("Please check your inputs and try again")
+
+# Developer panel (APP_METRICS=1): stages of this rerun and p50/p95 per stage for the process
+metrics.render_panel(st)
\ No newline at end of file
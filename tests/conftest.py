@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, 'data', 'anxiety_dataset.csv')
+MODEL_DIR = os.path.join(ROOT, 'model')
+
+# Run from anywhere: the package is imported from the checkout
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def dataset():
+    """The typed survey dataset (read once, not through the process cache)."""
+    pytest.importorskip('pandas')
+    from anxiety.data import read_dataset
+    return read_dataset(DATA_PATH)
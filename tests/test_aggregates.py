@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from anxiety import aggregates as agg  # noqa: E402
+from anxiety.dashboard import compute_view  # noqa: E402
+from conftest import ROOT  # noqa: E402
+
+
+def _large(dataset, rows=agg.TREND_THRESHOLD + 5_000):
+    """The dataset repeated past the trend threshold, with jittered x values."""
+    repeats = -(-rows // len(dataset))
+    frame = pd.concat([dataset] * repeats, ignore_index=True).iloc[:rows].copy()
+    rng = np.random.default_rng(0)
+    frame['Sleep Hours'] = frame['Sleep Hours'] + rng.normal(0, 0.3, len(frame)).astype(np.float32)
+    return frame
+
+
+def test_mode_switches_above_threshold(dataset):
+    threshold = 1000
+    mode, table = agg.trend_points(dataset.iloc[:threshold], 'Age', threshold=threshold)
+    assert mode == 'points'
+    assert table['count'].sum() == threshold
+    assert agg.trend_points(dataset.iloc[:threshold + 1], 'Age', threshold=threshold, mode='density')[0] == 'density'
+    assert agg.trend_points(dataset.iloc[:threshold + 1], 'Age', threshold=threshold, mode='sample')[0] == 'sample'
+    with pytest.raises(ValueError):
+        agg.trend_points(dataset, 'Age', threshold=0, mode='hexbin')
+
+
+def test_environment_overrides():
+    env = dict(os.environ, TREND_THRESHOLD='123', TREND_MODE='sample', TREND_SAMPLE_SIZE='45', TREND_BINS='7',
+               PYTHONPATH=os.pathsep.join([ROOT] + sys.path))
+    code = ('import json; from anxiety import aggregates as a; '
+            'print(json.dumps([a.TREND_THRESHOLD, a.TREND_MODE, a.TREND_SAMPLE_SIZE, a.TREND_BINS]))')
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == [123, 'sample', 45, 7]
+
+
+def test_density_counts_sum_to_filtered_rows(dataset):
+    filtered = dataset[dataset['Gender'] == 'Female']
+    for col in ['Age', 'Sleep Hours', 'Caffeine Intake (mg/day)']:
+        grid = agg.density_grid(filtered, col, bins=25)
+        assert grid['count'].sum() == len(filtered)
+        assert (grid['count'] > 0).all()
+        assert len(grid['x_start'].unique()) <= 25
+    assert agg.density_grid(filtered.iloc[:0], 'Age').empty
+
+
+def test_sample_is_deterministic_capped_and_stratified(dataset):
+    size = 1000
+    first = agg.stratified_sample(dataset, size, seed=7)
+    again = agg.stratified_sample(dataset, size, seed=7)
+    assert first.index.equals(again.index)
+    assert not first.index.equals(agg.stratified_sample(dataset, size, seed=8).index)
+    assert len(first) == size
+    assert first.index.is_unique
+    # Each anxiety level keeps its share of the rows, up to rounding
+    share = dataset[agg.TARGET].value_counts() / len(dataset)
+    picked = first[agg.TARGET].value_counts().reindex(share.index, fill_value=0)
+    assert (np.abs(picked - share * size) < 1 + 1e-9).all()
+    # Small frames are returned whole
+    assert len(agg.stratified_sample(dataset.iloc[:50], size)) == 50
+
+
+def test_regression_line_is_fitted_on_all_rows(dataset):
+    frame = _large(dataset)
+    view = compute_view(frame)
+    for col in ['Sleep Hours', 'Age']:
+        mode, points, line = view['trends'][col]
+        assert mode in ('density', 'sample')
+        x = frame[col].to_numpy(dtype=np.float64)
+        y = frame[agg.TARGET].to_numpy(dtype=np.float64)
+        slope, intercept = np.polyfit(x, y, 1)
+        np.testing.assert_allclose(line[col], [x.min(), x.max()])
+        np.testing.assert_allclose(line[agg.TARGET], intercept + slope * line[col].to_numpy(), rtol=1e-9)
+
+    # A fit on the sample alone would give a different line
+    sample = agg.stratified_sample(frame, 200)
+    sample_slope = np.polyfit(sample['Sleep Hours'].to_numpy(dtype=np.float64),
+                              sample[agg.TARGET].to_numpy(dtype=np.float64), 1)[0]
+    full = agg.regression_line(frame, 'Sleep Hours')
+    full_slope = np.diff(full[agg.TARGET])[0] / np.diff(full['Sleep Hours'])[0]
+    assert not np.isclose(sample_slope, full_slope)
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+from unittest import mock
+
+import numpy as np
+import pytest
+
+xgboost = pytest.importorskip('xgboost')
+
+from anxiety import bundle as bundle_module  # noqa: E402
+from anxiety.bundle import ARRAYS_FILE, MANIFEST, BundleError, load_bundle, write_bundle  # noqa: E402
+from anxiety.features import BINARY_COLS, FEATURE_ORDER  # noqa: E402
+from anxiety.model import (BUNDLE_DIR, DECISION_THRESHOLD, MODEL_FILE, PREPROCESS_FILE,  # noqa: E402
+                           bundle_is_current, decision_threshold)
+from anxiety.preprocessing import CompiledPreprocessor  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    rng = np.random.default_rng(0)
+    X = rng.random((400, len(FEATURE_ORDER))).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] > 1).astype(int)
+    return xgboost.XGBClassifier(n_estimators=5, max_depth=3).fit(X, y)
+
+
+@pytest.fixture
+def model_dir(tmp_path, classifier):
+    preprocessor = CompiledPreprocessor.from_arrays(
+        np.ones(len(FEATURE_ORDER)), np.zeros(len(FEATURE_ORDER)),
+        {col: {'No': 0, 'Yes': 1} for col in BINARY_COLS})
+    for name in (MODEL_FILE, PREPROCESS_FILE):
+        (tmp_path / name).write_bytes(b'')
+    write_bundle(str(tmp_path / BUNDLE_DIR), preprocessor, classifier, decision_threshold=0.4)
+    return str(tmp_path)
+
+
+def test_load_skips_hashing_untouched_files(model_dir):
+    path = os.path.join(model_dir, BUNDLE_DIR)
+    with mock.patch.object(bundle_module, '_sha256', side_effect=AssertionError('hashed')):
+        load_bundle(path)
+    with mock.patch.object(bundle_module, '_sha256', wraps=bundle_module._sha256) as sha:
+        load_bundle(path, verify_files=True)
+    assert sha.call_count == 2
+
+
+def test_changed_files_are_hashed(model_dir, tmp_path):
+    path = os.path.join(model_dir, BUNDLE_DIR)
+    copy = str(tmp_path / 'copied')
+    # A plain copy gets new mtimes but the same bytes
+    shutil.copytree(path, copy, copy_function=shutil.copyfile)
+    load_bundle(copy)
+
+    arrays = os.path.join(copy, ARRAYS_FILE)
+    with open(arrays, 'r+b') as f:
+        f.seek(100)
+        f.write(b'\xff')
+    with pytest.raises(BundleError, match='Checksum'):
+        load_bundle(copy)
+    with open(arrays, 'ab') as f:
+        f.write(b'\0')
+    with pytest.raises(BundleError, match='Size'):
+        load_bundle(copy)
+
+
+def test_threshold_and_currency(model_dir):
+    assert bundle_is_current(model_dir)
+    assert decision_threshold(model_dir) == 0.4
+    with open(os.path.join(model_dir, BUNDLE_DIR, MANIFEST)) as f:
+        assert json.load(f)['decision_threshold'] == 0.4
+
+    # A retrained preprocess.pkl makes the bundle stale, like a retrained model
+    manifest_mtime = os.stat(os.path.join(model_dir, BUNDLE_DIR, MANIFEST)).st_mtime_ns
+    os.utime(os.path.join(model_dir, PREPROCESS_FILE), ns=(manifest_mtime + 10**9, manifest_mtime + 10**9))
+    assert not bundle_is_current(model_dir)
+    assert decision_threshold(model_dir) == DECISION_THRESHOLD
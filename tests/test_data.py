@@ -0,0 +1,51 @@
+import os
+import pickle
+import shutil
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from anxiety.data import SIDECAR_SUFFIX, clear_cache, load_dataset  # noqa: E402
+from conftest import DATA_PATH  # noqa: E402
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / 'anxiety_dataset.csv')
+    shutil.copy(DATA_PATH, path)
+    clear_cache()
+    yield path
+    clear_cache()
+
+
+def test_sidecar_is_written_and_reused(csv_path):
+    frame = load_dataset(csv_path)
+    sidecar = csv_path + SIDECAR_SUFFIX
+    assert os.path.exists(sidecar)
+    assert [name for name in os.listdir(os.path.dirname(csv_path)) if name.endswith('.tmp')] == []
+    clear_cache()
+    pd.testing.assert_frame_equal(load_dataset(csv_path), frame)
+
+
+@pytest.mark.parametrize('damage', ['truncated', 'garbage', 'missing class', 'not a dict'])
+def test_unreadable_sidecar_falls_back_to_the_csv(csv_path, damage):
+    frame = load_dataset(csv_path)
+    sidecar = csv_path + SIDECAR_SUFFIX
+    with open(sidecar, 'rb') as f:
+        body = f.read()
+    with open(sidecar, 'wb') as f:
+        if damage == 'truncated':
+            f.write(body[:len(body) // 2])
+        elif damage == 'garbage':
+            f.write(b'not a pickle at all')
+        elif damage == 'missing class':
+            # What a pickle from another library version can look like
+            f.write(b'cno_such_module\nNoSuchClass\n.')
+        else:
+            pickle.dump(['frame'], f)
+    clear_cache()
+    pd.testing.assert_frame_equal(load_dataset(csv_path), frame)
+    # The broken sidecar was replaced with a good one
+    clear_cache()
+    assert pd.read_pickle(sidecar)['frame'].equals(frame)
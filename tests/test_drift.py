@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from anxiety.drift import PSI_DRIFT, PSI_WARN, DriftMonitor, bin_counts, build_profile
+from anxiety.preprocessing import FEATURE_ORDER, CompiledPreprocessor
+from anxiety.serve import MicroBatcher
+
+
+@pytest.fixture(scope='module')
+def profile():
+    # Identity scaling, so the scaled rows are their own raw values
+    preprocessor = CompiledPreprocessor.from_arrays(np.ones(len(FEATURE_ORDER)), np.zeros(len(FEATURE_ORDER)), {})
+    X = np.random.default_rng(0).uniform(size=(5000, len(FEATURE_ORDER)))
+    return build_profile(X, preprocessor)
+
+
+def _rows(n, seed=1, shift=0.0):
+    X = np.random.default_rng(seed).uniform(size=(n, len(FEATURE_ORDER))) + shift
+    return X.astype(np.float32)
+
+
+def test_single_rows_match_batch_counts(profile):
+    X = _rows(300)
+    monitor = DriftMonitor(profile)
+    for row in X:
+        monitor.observe(row)
+    monitor.check()
+    np.testing.assert_array_equal(monitor.counts, bin_counts(X.astype(np.float64)))
+    assert monitor.n == 300
+    assert monitor.report()['observations'] == 300
+
+
+def test_non_finite_values_are_counted_not_binned(profile):
+    monitor = DriftMonitor(profile)
+    bad = _rows(1)[0]
+    bad[0], bad[3] = np.nan, np.inf
+    monitor.observe(bad)
+    for row in _rows(300):
+        monitor.observe(row)
+    report = monitor.check()
+    assert report['invalid'] == 2
+    assert report['features'][FEATURE_ORDER[0]]['invalid'] == 1
+    assert report['features'][FEATURE_ORDER[3]]['invalid'] == 1
+    assert np.isfinite(report['max_psi'])
+    assert monitor.counts[0].sum() == 300
+    assert monitor.counts[1].sum() == 301
+
+
+def test_psi_separates_shifted_inputs(profile):
+    same = DriftMonitor(profile)
+    same.observe(_rows(2000))
+    assert same.check()['max_psi'] < PSI_WARN
+
+    shifted = DriftMonitor(profile)
+    shifted.observe(_rows(2000, shift=0.3))
+    report = shifted.check()
+    assert report['max_psi'] > PSI_DRIFT
+    assert len(report['drifted']) == len(FEATURE_ORDER)
+
+
+class _BrokenMonitor:
+    def observe(self, X):
+        raise RuntimeError('monitor failure')
+
+
+class _Model:
+    def predict_proba(self, X, validate_features=True):
+        p = X.mean(axis=1)
+        return np.column_stack([1 - p, p])
+
+
+def test_monitor_failure_does_not_fail_scoring():
+    preprocessor = CompiledPreprocessor.from_arrays(np.ones(len(FEATURE_ORDER)), np.zeros(len(FEATURE_ORDER)), {})
+    batcher = MicroBatcher(_Model(), preprocessor, monitor=_BrokenMonitor())
+    X = _rows(4).astype(np.float64)
+    np.testing.assert_allclose(batcher._score(X), X.mean(axis=1), rtol=1e-6)
@@ -0,0 +1,46 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from anxiety.ingest import SchemaError, append, validate_batch, verify  # noqa: E402
+from anxiety.store import ColumnStore, StoreSource, build  # noqa: E402
+from conftest import DATA_PATH  # noqa: E402
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    build(DATA_PATH, store_dir)
+    return store_dir
+
+
+def _batch(n=300):
+    batch = pd.read_csv(DATA_PATH).sample(n, random_state=0).reset_index(drop=True)
+    # An Occupation the store has never seen, so its category list and aggregates grow
+    batch.loc[::7, 'Occupation'] = 'Pilot'
+    return batch
+
+
+def test_append_keeps_aggregates_exact(store_dir):
+    n_rows = ColumnStore(store_dir).n_rows
+    source = StoreSource(ColumnStore(store_dir))
+    before = source.signature
+
+    assert append(store_dir, _batch()) == n_rows + 300
+    assert verify(store_dir) == []
+
+    source.refresh()
+    assert source.signature != before
+    assert source.store.n_rows == n_rows + 300
+    assert 'Pilot' in source.options['occupation']
+
+
+@pytest.mark.parametrize('age', [17, 65, 130])
+def test_ages_outside_the_survey_range_are_rejected(store_dir, age):
+    batch = _batch(20)
+    batch.loc[3, 'Age'] = age
+    with pytest.raises(SchemaError, match='Age'):
+        validate_batch(batch)
+    with pytest.raises(SchemaError):
+        append(store_dir, batch)
+    assert ColumnStore(store_dir).n_rows == len(pd.read_csv(DATA_PATH))
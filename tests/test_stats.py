@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+from anxiety.stats import GROUP_TEST_COLUMNS, STAT_COLUMNS, _loop_statistics, frame_statistics  # noqa: E402
+
+
+@pytest.mark.parametrize('subset', ['all', 'young smokers'])
+def test_matches_scipy_loops(dataset, subset):
+    df = dataset if subset == 'all' else dataset[(dataset['Age'] < 30) & (dataset['Smoking'] == 'Yes')]
+    result = frame_statistics(df)
+    pvalues, vifs, tests = _loop_statistics(df, STAT_COLUMNS, GROUP_TEST_COLUMNS)
+
+    assert result['n'] == len(df)
+    np.testing.assert_allclose(result['pvalues'].to_numpy(), pvalues, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(result['vif']['VIF'].to_numpy(), vifs, rtol=1e-8)
+    for col, (normal, anova, kruskal) in tests.items():
+        test = result['group_tests'][col]
+        # The loops visit groups in category order, the tables in label order
+        labels = [str(g) for g in df.groupby(col, observed=True).groups]
+        groups = test['groups'].set_index('group').loc[labels]
+        np.testing.assert_allclose(groups['normality p'].to_numpy(), normal, rtol=0, atol=1e-8)
+        np.testing.assert_allclose(test['anova'], (anova.statistic, anova.pvalue), rtol=1e-8, atol=1e-12)
+        np.testing.assert_allclose(test['kruskal'], (kruskal.statistic, kruskal.pvalue), rtol=1e-8, atol=1e-12)
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from anxiety.store import MANIFEST, ColumnStore, build, verify  # noqa: E402
+from conftest import DATA_PATH  # noqa: E402
+
+
+def test_streamed_views_match_in_memory_path(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    store = build(DATA_PATH, store_dir, chunk_rows=3000)
+    assert store.n_rows == len(pd.read_csv(DATA_PATH))
+    # Streamed in several windows too, so the views are summed across window boundaries
+    assert store.n_rows > 3000
+    assert verify(DATA_PATH, store_dir, chunk_rows=3000) == []
+    assert verify(DATA_PATH, store_dir, chunk_rows=997) == []
+
+
+def test_codes_round_trip(tmp_path, dataset):
+    store = build(DATA_PATH, str(tmp_path / 'store'))
+    for col in ['Gender', 'Occupation', 'Smoking']:
+        codes = np.concatenate([w[col] for w in ColumnStore(store.store_dir, 4000).chunks([col])])
+        decoded = np.array(store.columns[col]['categories'], dtype=object)[codes]
+        np.testing.assert_array_equal(decoded, dataset[col].astype(str).to_numpy())
+
+
+@pytest.mark.parametrize('col', ['Occupation', 'Sleep Hours'])
+def test_empty_cells_are_rejected(tmp_path, col):
+    frame = pd.read_csv(DATA_PATH).iloc[:500]
+    frame.loc[123, col] = None
+    csv = tmp_path / 'gap.csv'
+    frame.to_csv(csv, index=False)
+    store_dir = tmp_path / 'store'
+    with pytest.raises(ValueError, match='first at row 123'):
+        build(str(csv), str(store_dir), chunk_rows=100)
+    assert not os.path.exists(store_dir / MANIFEST)
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import MODEL_DIR
+
+xgboost = pytest.importorskip('xgboost')
+joblib = pytest.importorskip('joblib')
+
+from anxiety.features import BINARY_COLS, FEATURE_ORDER  # noqa: E402
+from anxiety.trees import TreeEnsemble, export_trees  # noqa: E402
+
+TOLERANCE = 1e-6
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, len(FEATURE_ORDER))).astype(np.float32)
+    # Binary columns as 0/1 like the encoded features
+    binary = [FEATURE_ORDER.index(col) for col in BINARY_COLS]
+    X[:, binary] = X[:, binary] > 0.5
+    return X
+
+
+@pytest.fixture(scope='module')
+def deployed():
+    path = os.path.join(MODEL_DIR, 'best_xgb.pkl')
+    if not os.path.exists(path):
+        pytest.skip('model/best_xgb.pkl not available')
+    model = joblib.load(path)
+    return model, TreeEnsemble(export_trees(model))
+
+
+def test_batch_matches_booster(deployed):
+    model, ensemble = deployed
+    X = _rows(5000)
+    expected = model.predict_proba(X, validate_features=False)
+    np.testing.assert_allclose(ensemble.predict_proba(X), expected, atol=TOLERANCE)
+
+
+def test_single_row_matches_booster(deployed):
+    model, ensemble = deployed
+    X = _rows(200, seed=1)
+    expected = model.predict_proba(X, validate_features=False)[:, 1]
+    single = np.array([ensemble.predict_proba(row)[0, 1] for row in X])
+    np.testing.assert_allclose(single, expected, atol=TOLERANCE)
+    # A (1, 16) matrix takes the same path as a (16,) vector
+    np.testing.assert_allclose(ensemble.predict_proba(X[:1])[:, 1], expected[:1], atol=TOLERANCE)
+
+
+def test_predict_uses_decision_threshold(deployed):
+    model, ensemble = deployed
+    X = _rows(1000, seed=2)
+    np.testing.assert_array_equal(ensemble.predict(X), model.predict(X, validate_features=False))
+
+
+def test_early_stopped_model_is_trimmed_to_best_iteration():
+    rng = np.random.default_rng(3)
+    X = rng.random((600, 16)).astype(np.float32)
+    # Mostly noise, so validation loss stops improving well before n_estimators
+    y = ((X[:, 0] + rng.normal(0, 0.6, len(X))) > 0.5).astype(int)
+    model = xgboost.XGBClassifier(n_estimators=200, max_depth=4, learning_rate=0.3,
+                                  early_stopping_rounds=5, n_jobs=1)
+    model.fit(X[:400], y[:400], eval_set=[(X[400:], y[400:])], verbose=False)
+    assert model.best_iteration + 1 < 200
+
+    ensemble = TreeEnsemble(export_trees(model))
+    assert len(ensemble.roots) == model.best_iteration + 1
+    # XGBClassifier.predict_proba also stops at best_iteration
+    np.testing.assert_allclose(ensemble.predict_proba(X)[:, 1],
+                               model.predict_proba(X)[:, 1], atol=TOLERANCE)